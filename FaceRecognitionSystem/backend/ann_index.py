@@ -0,0 +1,207 @@
+"""
+Approximate nearest-neighbour (IVF) index over the face gallery
+
+For large galleries an exact chi-square scan per face per frame is too
+slow. The index square-roots each histogram, so Euclidean distance
+tracks chi-square closely (Hellinger). It then projects the result onto
+its top principal components; a learned projection keeps far more
+neighbours than a random one at the same width. The projected rows are
+clustered into nlist cells with k-means. A probe is projected the same
+way and only the gallery rows in its nprobe nearest cells are
+re-ranked with the exact chi-square distance. nprobe is the
+recall/latency knob: higher is closer to exact search and slower.
+
+The index is built at train time and saved as Trainner.ann.npz next to
+the model; its row numbers refer to the gallery saved with it.
+"""
+import os
+
+import numpy as np
+
+# Rows projected / scored per matrix product, to bound temporary memory
+PROJECT_BLOCK = 4096
+
+
+class IVFIndex:
+    def __init__(self, mean, projection, centroids, offsets, rows, nprobe=8):
+        self.mean = mean
+        self.projection = projection
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    # -------------------------------------------------
+    # BUILD
+    # -------------------------------------------------
+
+    @classmethod
+    def build(cls, histograms, nlist=None, dims=256, nprobe=8,
+              iterations=15, sample_size=50000, pca_sample_size=2048, seed=0):
+        """Cluster gallery histograms into an inverted-file index.
+
+        nlist defaults to about 4 * sqrt(rows). The projection is fitted
+        on at most pca_sample_size rows and k-means on at most sample_size
+        rows; every row is then assigned to its nearest cell.
+        """
+        rng = np.random.default_rng(seed)
+        count = len(histograms)
+
+        fit_rows = np.sort(rng.choice(count, min(count, pca_sample_size), replace=False))
+        mean, projection = fit_projection(histograms[fit_rows], dims)
+        features = project(histograms, mean, projection)
+
+        nlist = nlist or max(1, int(4 * np.sqrt(count)))
+        nlist = min(nlist, count)
+
+        sample = features
+        if count > sample_size:
+            sample = features[rng.choice(count, sample_size, replace=False)]
+        centroids = kmeans(sample, nlist, iterations, rng)
+
+        assignment = nearest_centroids(features, centroids, 1)[:, 0]
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+
+        return cls(mean, projection, centroids, offsets.astype(np.int64),
+                   order.astype(np.int64), nprobe)
+
+    # -------------------------------------------------
+    # SEARCH
+    # -------------------------------------------------
+
+    def candidates(self, probes, nprobe=None):
+        """Return the candidate gallery rows for each probe"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        features = project(probes, self.mean, self.projection)
+        cells = nearest_centroids(features, self.centroids, nprobe)
+        return [
+            np.concatenate([
+                self.rows[self.offsets[c]:self.offsets[c + 1]] for c in probe_cells
+            ])
+            for probe_cells in cells
+        ]
+
+    def search(self, gallery, probes, k=1, nprobe=None):
+        """Approximate top-k labels per probe, exact-re-ranked on candidates
+
+        Returns the same structure as FaceGallery.search(). A probe whose
+        nprobe cells are all empty falls back to the exact gallery scan,
+        so a face is never left without a match.
+        """
+        probes = np.atleast_2d(np.asarray(probes, dtype=np.float32))
+        results = []
+        for probe, rows in zip(probes, self.candidates(probes, nprobe)):
+            if len(rows) == 0:
+                results.append(gallery.search(probe, k)[0])
+            else:
+                results.append(gallery.search_rows(probe, rows, k))
+        return results
+
+    # -------------------------------------------------
+    # PERSISTENCE
+    # -------------------------------------------------
+
+    def save(self, prefix):
+        path = prefix + ".ann.npz"
+        with open(path + ".tmp", 'wb') as f:
+            np.savez(
+                f,
+                mean=self.mean,
+                projection=self.projection,
+                centroids=self.centroids,
+                offsets=self.offsets,
+                rows=self.rows
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, prefix, nprobe=8):
+        """Load a saved index, or return None if there isn't one"""
+        path = prefix + ".ann.npz"
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path) as data:
+                return cls(
+                    data['mean'],
+                    data['projection'],
+                    data['centroids'],
+                    data['offsets'],
+                    data['rows'],
+                    nprobe
+                )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading ANN index: {e}")
+            return None
+
+
+def fit_projection(histograms, dims):
+    """Fit a PCA projection of sqrt-histograms; returns (mean, components)
+
+    Uses the eigenvectors of the small rows x rows Gram matrix, which is
+    far cheaper than the bins x bins covariance for LBPH histograms.
+    """
+    roots = np.sqrt(np.asarray(histograms, dtype=np.float32))
+    mean = roots.mean(axis=0)
+    centred = roots - mean
+
+    gram = (centred @ centred.T).astype(np.float64)
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+
+    top = np.argsort(eigenvalues)[::-1][:dims]
+    top = top[eigenvalues[top] > 1e-9]
+    components = (centred.T @ eigenvectors[:, top]) / np.sqrt(eigenvalues[top])
+    return mean, components.astype(np.float32)
+
+
+def project(histograms, mean, projection):
+    """Square-root (Hellinger) map then PCA projection, in blocks"""
+    histograms = np.atleast_2d(histograms)
+    features = np.empty((len(histograms), projection.shape[1]), dtype=np.float32)
+    for start in range(0, len(histograms), PROJECT_BLOCK):
+        block = np.sqrt(np.asarray(histograms[start:start + PROJECT_BLOCK], dtype=np.float32))
+        features[start:start + PROJECT_BLOCK] = (block - mean) @ projection
+    return features
+
+
+def nearest_centroids(features, centroids, n):
+    """Indices of the n nearest centroids (Euclidean) for each feature row"""
+    n = min(n, len(centroids))
+    norms = (centroids * centroids).sum(axis=1)[None, :]
+    result = np.empty((len(features), n), dtype=np.int64)
+
+    for start in range(0, len(features), PROJECT_BLOCK):
+        block = features[start:start + PROJECT_BLOCK]
+        scores = norms - 2.0 * (block @ centroids.T)
+        top = np.argpartition(scores, n - 1, axis=1)[:, :n]
+        rows = np.arange(len(scores))[:, None]
+        result[start:start + PROJECT_BLOCK] = top[rows, np.argsort(scores[rows, top], axis=1)]
+
+    return result
+
+
+def kmeans(features, k, iterations, rng):
+    """Plain Lloyd's k-means; empty clusters are reseeded from random rows"""
+    centroids = features[rng.choice(len(features), k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = nearest_centroids(features, centroids, 1)[:, 0]
+        counts = np.bincount(assignment, minlength=k)
+        filled = counts > 0
+
+        # Sum each cluster's rows with one reduceat over the sorted rows
+        order = np.argsort(assignment, kind='stable')
+        starts = np.searchsorted(assignment[order], np.arange(k))
+        sums = np.add.reduceat(features[order], starts[filled], axis=0)
+
+        centroids[filled] = sums / counts[filled, None]
+        if not filled.all():
+            centroids[~filled] = features[rng.choice(len(features), int((~filled).sum()))]
+
+    return centroids
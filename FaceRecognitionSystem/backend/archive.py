@@ -0,0 +1,205 @@
+"""
+Retention job: moves closed months of gate_access to archive files
+
+Each month is exported, newest first, to a gzip-compressed JSON-lines
+file (gate_access_YYYY_MM.jsonl.gz) and recorded in the
+gate_access_archives table, together with every user's granted-access
+total for the month (archived_access_counts) so counters can still be
+rebuilt. Only then are its rows deleted from gate_access, batch_size at
+a time with a pause in between, so the gate keeps writing while a month
+is removed; the month's partition is dropped once it is empty. A run
+that stops half way resumes the deletes next time.
+
+The history methods of the storage backends read archived months back
+from these files (read_archive) when a date range needs them.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.backend.archive                  # months older than keep_months
+python -m FaceRecognitionSystem.backend.archive --keep-months 6
+python -m FaceRecognitionSystem.backend.archive --month 2024-01
+"""
+import datetime
+import gzip
+import json
+import os
+import time
+
+from FaceRecognitionSystem.backend.migrations import add_months, month_start
+
+FIELDS = ["id", "user_id", "date", "time", "status", "accessed_at"]
+
+
+def _time_text(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _parse_time(text):
+    hours, minutes, seconds = text.split(":")
+    return datetime.timedelta(hours=int(hours), minutes=int(minutes), seconds=int(seconds))
+
+
+def write_archive(path, rows):
+    """Write rows to a gzip JSON-lines file; returns (row count, max id)
+
+    The file is written next to path and renamed into place once it is
+    on disk, so path never holds a partial archive.
+    """
+    count, max_id = 0, 0
+    partial = path + ".partial"
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+            for row in rows:
+                out.write((json.dumps([
+                    row["id"],
+                    row["user_id"],
+                    row["date"].isoformat(),
+                    _time_text(row["time"]),
+                    row["status"],
+                    row["accessed_at"].strftime("%Y-%m-%d %H:%M:%S"),
+                ]) + "\n").encode())
+                count += 1
+                max_id = max(max_id, row["id"])
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+    return count, max_id
+
+
+def read_archive(path):
+    """Yield the rows of an archive file as gate_access rows, in file order"""
+    with gzip.open(path, "rt") as archive:
+        for line in archive:
+            row = dict(zip(FIELDS, json.loads(line)))
+            row["date"] = datetime.date.fromisoformat(row["date"])
+            row["time"] = _parse_time(row["time"])
+            row["accessed_at"] = datetime.datetime.fromisoformat(row["accessed_at"])
+            yield row
+
+
+class AccessArchiver:
+    def __init__(self, backend, directory, batch_size=1000, pause=0.05):
+        self.backend = backend
+        self.directory = directory
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def run(self, keep_months):
+        """Archive every month older than the last keep_months; returns months archived"""
+        cutoff = add_months(month_start(datetime.date.today()), -keep_months)
+        self.resume()
+
+        archived = []
+        month = self._first_live_month()
+        while month and month < cutoff:
+            if self.archive_month(month):
+                archived.append(month)
+            month = add_months(month, 1)
+        self.backend.ensure_partitions()
+        return archived
+
+    def resume(self):
+        """Finish deleting months an earlier run archived but didn't remove"""
+        for archive in self.backend.archived_months():
+            self._purge(archive["month"], archive["max_id"])
+
+    def archive_month(self, month):
+        """Move one closed month to its archive file; returns rows archived
+
+        Months must be archived oldest first: history reads gate_access
+        only from the month after the newest archived one.
+        """
+        month = month_start(month)
+        if month >= month_start(datetime.date.today()):
+            raise Exception("Only closed months can be archived")
+        first = self._first_live_month()
+        if first and first < month:
+            raise Exception(f"Archive {first:%Y-%m} first; months are archived oldest first")
+        if first is None or first > month:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"gate_access_{month:%Y_%m}.jsonl.gz")
+        next_month = add_months(month, 1)
+        row_count, max_id = write_archive(path, self.backend.stream('''
+            SELECT id, user_id, date, time, status, accessed_at
+            FROM gate_access
+            WHERE date >= %s AND date < %s
+            ORDER BY accessed_at DESC, id DESC
+        ''', [month, next_month], self.batch_size))
+
+        # From this commit on, history reads the month from the file
+        with self.backend.connection() as conn:
+            cursor = self.backend.cursor(conn)
+            with self.backend.transaction(conn):
+                cursor.execute(
+                    "INSERT INTO gate_access_archives (month, file, row_count, max_id) "
+                    "VALUES (%s, %s, %s, %s)",
+                    (month, path, row_count, max_id)
+                )
+                cursor.execute('''
+                    INSERT INTO archived_access_counts (user_id, month, granted_count, last_granted_at)
+                    SELECT user_id, %s, COUNT(*), MAX(accessed_at)
+                    FROM gate_access
+                    WHERE date >= %s AND date < %s AND id <= %s
+                    AND status = 'Granted' AND user_id IN (SELECT id FROM users)
+                    GROUP BY user_id
+                ''', (month, month, next_month, max_id))
+
+        self._purge(month, max_id)
+        return row_count
+
+    def _purge(self, month, max_id):
+        month = month_start(_as_date(month))
+        while self.backend.delete_archived_batch(month, max_id, self.batch_size):
+            # Let gate writes in between batches
+            time.sleep(self.pause)
+        self.backend.drop_partition(month)
+
+    def _first_live_month(self):
+        """Month of the oldest gate_access row not archived yet; None if none"""
+        start = self.backend.live_start()
+        with self.backend.connection() as conn:
+            cursor = self.backend.cursor(conn)
+            if start:
+                cursor.execute("SELECT MIN(date) FROM gate_access WHERE date >= %s", (start,))
+            else:
+                cursor.execute("SELECT MIN(date) FROM gate_access")
+            first = cursor.fetchone()[0]
+        return month_start(_as_date(first)) if first else None
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from FaceRecognitionSystem.backend.config import ARCHIVE, DB_CONFIG
+    from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
+
+    parser = argparse.ArgumentParser(description="Move closed months of gate_access to archive files")
+    parser.add_argument("--keep-months", type=int, default=ARCHIVE['keep_months'])
+    parser.add_argument("--month", help="archive only this month (YYYY-MM)")
+    args = parser.parse_args()
+
+    db = FaceRecognitionDB(**DB_CONFIG)
+    archiver = AccessArchiver(
+        db.backend,
+        ARCHIVE['directory'],
+        batch_size=ARCHIVE['batch_size'],
+        pause=ARCHIVE['pause']
+    )
+
+    if args.month:
+        archiver.resume()
+        month = datetime.datetime.strptime(args.month, "%Y-%m").date()
+        print(f"Archived {archiver.archive_month(month)} accesses from {args.month}")
+    else:
+        for month in archiver.run(args.keep_months):
+            print(f"Archived {month:%Y-%m}")
+
+    db.close()
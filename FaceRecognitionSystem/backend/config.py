@@ -18,7 +18,8 @@ PROJECT_DIR = os.path.abspath(os.path.join(BACKEND_DIR, ".."))
 
 DIRECTORIES = [
     os.path.join(BACKEND_DIR, "dataset", "CapturedFaces"),
-    os.path.join(BACKEND_DIR, "dataset", "UnknownFaces")
+    os.path.join(BACKEND_DIR, "dataset", "UnknownFaces"),
+    os.path.join(BACKEND_DIR, "dataset", "SampleStore")
 ]
 
 # -------------------------------------------------
@@ -29,7 +30,18 @@ DB_CONFIG = {
     'host': 'localhost',
     'user': 'root',
     'password': 'amulya@26',
-    'database': 'face_recognition'
+    'database': 'face_recognition',
+
+    # storage engine: 'mysql', or 'sqlite' for a single-box gate without
+    # a MySQL server (the host/user/password/database above are unused)
+    'backend': 'mysql',
+    'sqlite_file': os.path.join(BACKEND_DIR, 'dataset', 'face_recognition.db'),
+
+    # connection pool: connections kept open, seconds to wait for a free
+    # one, and idle seconds after which a connection is pinged before use
+    'pool_size': 5,
+    'pool_timeout': 10,
+    'pool_health_check_interval': 30
 }
 
 # -------------------------------------------------
@@ -52,9 +64,129 @@ FACE_RECOGNITION = {
         'Trainner.yml'
     ),
 
+    # packed training crops (samples.npy + labels.npy + index.json)
+    'sample_store': os.path.join(
+        BACKEND_DIR,
+        'dataset',
+        'SampleStore'
+    ),
+
+    # face detection profile, one of detection_profiles:
+    # downscale = run the cascade on a smaller frame (boxes are mapped
+    # back to full resolution), size_bounds = limit face sizes to the
+    # face_distance_m range, roi = only search detection_roi.
+    # Registration captures with capture_detection_profile, as users
+    # stand closer to the camera than at the gate
+    'detection_profile': 'balanced',
+    'capture_detection_profile': 'full',
+    'detection_profiles': {
+        'full': {'downscale': 1.0, 'scale_factor': 1.2, 'min_neighbors': 5,
+                 'size_bounds': False, 'roi': False},
+        'balanced': {'downscale': 0.5, 'scale_factor': 1.2, 'min_neighbors': 5,
+                     'size_bounds': True, 'roi': True},
+        'fast': {'downscale': 0.33, 'scale_factor': 1.3, 'min_neighbors': 4,
+                 'size_bounds': True, 'roi': True}
+    },
+
+    # gate geometry: camera horizontal field of view, nearest/farthest
+    # distance (metres) of a face at the gate, and the gate lane as
+    # fractions of the frame (x, y, w, h) or None for the whole frame
+    'camera_hfov_deg': 60,
+    'face_width_m': 0.16,
+    'face_distance_m': (0.4, 2.5),
+    'detection_roi': None,
+
+    # side length every face crop is normalized to, for training and
+    # recognition alike
+    'crop_size': 100,
+
+    # 'gallery' matches all faces in a frame with the vectorized,
+    # memory-mapped histogram gallery; 'lbph' uses recognizer.predict
+    'matcher': 'gallery',
+    'top_k': 3,
+
+    # after training, keep at most this many k-medoid prototypes per
+    # user (0 = keep every sample), dropping samples closer than
+    # duplicate_distance to one already kept
+    'prototypes_per_user': 8,
+    'duplicate_distance': 5,
+
+    # approximate (IVF) candidate search for large galleries, needs the
+    # 'gallery' matcher. nlist None = ~4*sqrt(gallery rows); a higher
+    # nprobe gives better recall but slower matching
+    'ann_enabled': False,
+    'ann_nlist': None,
+    'ann_nprobe': 8,
+
+    # live monitor face tracking: detections are linked to tracks by IoU
+    # and each track is recognized once, then only re-checked every
+    # track_recheck_interval frames while unconfirmed. With
+    # track_detect_interval > 1 the cascade is skipped in between and
+    # track_opencv_tracker (e.g. 'KCF', None = keep last box) moves boxes
+    'track_iou_threshold': 0.3,
+    'track_max_missed': 10,
+    'track_recheck_interval': 15,
+    'track_min_votes': 1,
+    'track_detect_interval': 1,
+    'track_opencv_tracker': None,
+
     'confidence_threshold': 50,
     'poor_match_threshold': 75,
-    'samples_per_face': 60
+    'samples_per_face': 60,
+
+    # processes used to extract histograms on a full retrain
+    # (None = one per CPU core)
+    'training_workers': None,
+
+    # how often (seconds) gates check Trainner.yml for a newer model
+    'model_reload_interval': 2
+}
+
+# -------------------------------------------------
+# EVENT RECORDER (WRITE-BEHIND GATE LOG)
+# -------------------------------------------------
+
+EVENT_RECORDER = {
+    # local journal for events that couldn't be written to the database
+    'journal_file': os.path.join(BACKEND_DIR, 'dataset', 'event_journal.jsonl'),
+    'queue_size': 10000,
+    'batch_size': 200,
+    'flush_interval': 1.0,   # seconds after the first queued event
+    'retry_interval': 5.0    # seconds between reconnect attempts
+}
+
+# -------------------------------------------------
+# DATABASE METRICS
+# -------------------------------------------------
+
+DB_METRICS = {
+    # time every FaceRecognitionDB call and SQL statement (off = no
+    # wrapping at all)
+    'enabled': False,
+
+    # statements slower than this (ms) go to the slow log, with their
+    # parameters redacted; the last slow_query_keep stay in memory
+    'slow_query_ms': 100,
+    'slow_query_file': os.path.join(BACKEND_DIR, 'dataset', 'slow_queries.jsonl'),
+    'slow_query_keep': 100,
+
+    # written when the application exits (None = don't)
+    'dump_file': os.path.join(BACKEND_DIR, 'dataset', 'db_metrics.json')
+}
+
+# -------------------------------------------------
+# GATE ACCESS ARCHIVE (RETENTION)
+# -------------------------------------------------
+
+ARCHIVE = {
+    # closed months older than keep_months are moved out of gate_access
+    # into gzip files here; history still reads them back
+    'directory': os.path.join(BACKEND_DIR, 'dataset', 'archive'),
+    'keep_months': 12,
+
+    # rows deleted per statement, and seconds to pause between deletes
+    'batch_size': 1000,
+    'pause': 0.05
 }
 
 # -------------------------------------------------
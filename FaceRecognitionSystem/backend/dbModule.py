@@ -1,116 +1,81 @@
-import mysql.connector
-from mysql.connector import Error
-import datetime
-from FaceRecognitionSystem.backend.config import DB_CONFIG
+from FaceRecognitionSystem.backend.config import DB_CONFIG, DB_METRICS
+from FaceRecognitionSystem.backend.db_metrics import DBMetrics, instrument
+from FaceRecognitionSystem.backend.mysql_storage import MySQLStorage
+from FaceRecognitionSystem.backend.sqlite_storage import SQLiteStorage
+from FaceRecognitionSystem.backend.storage import Error
+
+# Storage engines selectable with DB_CONFIG['backend']
+BACKENDS = {
+    MySQLStorage.name: MySQLStorage,
+    SQLiteStorage.name: SQLiteStorage,
+}
 
 class FaceRecognitionDB:
-    def __init__(self, host, user, password, database):
-        """Initialize database connection"""
-        self.host = host
-        self.user = user
-        self.password = password
-        self.database = database
-        self.connection = None
+    def __init__(self, host=None, user=None, password=None, database=None, pool_size=None,
+                 pool_timeout=None, pool_health_check_interval=None, backend=None,
+                 sqlite_file=None, metrics=None):
+        """Open the configured storage backend (MySQL or SQLite)
+
+        metrics: a DBMetrics to record calls into; by default one is
+        made when DB_METRICS is enabled. Read it back from self.metrics.
+        """
+        # Settings not passed in default to DB_CONFIG, so callers passing
+        # only the MySQL credentials still get the configured backend
+        backend = backend or DB_CONFIG.get('backend', 'mysql')
+        if backend not in BACKENDS:
+            raise Exception(f"Unknown database backend: {backend}")
+
+        if backend == SQLiteStorage.name:
+            self.backend = SQLiteStorage(
+                sqlite_file or DB_CONFIG['sqlite_file'],
+                timeout=pool_timeout or DB_CONFIG.get('pool_timeout', 10)
+            )
+        else:
+            self.backend = MySQLStorage(
+                host, user, password, database,
+                pool_size=pool_size or DB_CONFIG.get('pool_size', 5),
+                pool_timeout=pool_timeout or DB_CONFIG.get('pool_timeout', 10),
+                pool_health_check_interval=(
+                    pool_health_check_interval or DB_CONFIG.get('pool_health_check_interval', 30)
+                )
+            )
+
+        self.metrics = None
+        if metrics is None and DB_METRICS.get('enabled'):
+            metrics = DBMetrics(
+                slow_query_ms=DB_METRICS['slow_query_ms'],
+                slow_query_file=DB_METRICS['slow_query_file'],
+                slow_query_keep=DB_METRICS['slow_query_keep']
+            )
+        if metrics is not None:
+            instrument(self, metrics)
+
         self.initialize_database()
-        
-    def connect(self):
-        """Create a connection to MySQL database"""
-        try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
-            return self.connection
-        except Error as e:
-            print(f"Error connecting to MySQL database: {e}")
-            return None
+
+    def close(self):
+        """Close the backend's connections"""
+        self.backend.close()
     
     def initialize_database(self):
-        """Create database and tables if they don't exist"""
+        """Create database and tables if they don't exist
+
+        A failed migration is fatal: later migrations build on it, and
+        running on a half-migrated schema would fail on every write.
+        """
         try:
-            conn = mysql.connector.connect(
-                host=DB_CONFIG['host'],
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password']
-            )
-            cursor = conn.cursor()
-            
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-            conn.close()
-            
-            conn = self.connect()
-            if conn is None:
-                return
-                
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                id_number VARCHAR(20) NOT NULL,
-                email VARCHAR(100) NOT NULL,
-                registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS gate_access (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT,
-                date DATE NOT NULL,
-                time TIME NOT NULL,
-                status VARCHAR(20) NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-            ''')
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS training_log (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                faces_count INT,
-                status VARCHAR(20)
-            )
-            ''')
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS gate_sessions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                date DATE NOT NULL,
-                time TIME NOT NULL,
-                users_recognized INT,
-                duration FLOAT
-            )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            # Schema changes are versioned in migrations.py
+            self.backend.initialize()
             print("Database and tables initialized successfully")
-            
+
         except Error as e:
             print(f"Error initializing database: {e}")
+            raise
     
     def add_user(self, name, id_number, email):
         """Add a new user and return the user ID"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT id FROM users WHERE id_number = %s", (id_number,))
-            existing_user = cursor.fetchone()
-            
-            if existing_user:
-                return existing_user[0] 
-            
-            cursor.execute(
-                "INSERT INTO users (name, id_number, email) VALUES (%s, %s, %s)",
-                (name, id_number, email)
-            )
-            
-            conn.commit()
-            user_id = cursor.lastrowid
-            conn.close()
-            
-            return user_id
-            
+            return self.backend.add_user(name, id_number, email)
+
         except Error as e:
             print(f"Error adding user: {e}")
             return None
@@ -118,15 +83,8 @@ class FaceRecognitionDB:
     def get_user_details(self, user_id):
         """Get user details by ID"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-            user = cursor.fetchone()
-            
-            conn.close()
-            return user
-            
+            return self.backend.get_user(user_id)
+
         except Error as e:
             print(f"Error getting user details: {e}")
             return None
@@ -134,56 +92,78 @@ class FaceRecognitionDB:
     def record_gate_access(self, user_id, date, time_str, status):
         """Record user gate access"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO gate_access (user_id, date, time, status) VALUES (%s, %s, %s, %s)",
-                (user_id, date, time_str, status)
-            )
-            conn.commit()
-            conn.close()
+            # Log row and counter change commit together or not at all
+            self.backend.write_events([("access", [user_id, date, time_str, status])])
             return True
-            
+
         except Error as e:
             print(f"Error recording gate access: {e}")
             return False
 
+    def write_events(self, events):
+        """Insert a batch of queued gate events in one transaction
+
+        events: list of (kind, values) where kind is "access" with the
+        record_gate_access arguments or "session" with the
+        log_gate_session ones. Unlike the single-event methods this
+        raises Error, so the caller can keep the batch and retry.
+        """
+        self.backend.write_events(events)
+
+    def rebuild_access_counts(self):
+        """Recompute user_access_counts from gate_access; returns users counted"""
+        return self.backend.rebuild_access_counts()
+
+    def rebuild_rollups(self):
+        """Recompute the hourly/daily access rollups from gate_access; returns days covered"""
+        return self.backend.rebuild_rollups()
+
+    def get_hourly_stats(self, start_date, end_date):
+        """Access counts per (date, hour, status) between two dates, inclusive
+
+        Read from the rollup tables kept up to date on every insert, so
+        the cost depends on the range, not on the size of gate_access.
+        """
+        try:
+            return self.backend.hourly_stats(start_date, end_date)
+
+        except Error as e:
+            print(f"Error getting hourly stats: {e}")
+            return []
+
+    def get_daily_stats(self, start_date, end_date):
+        """Access counts per (date, status) between two dates, inclusive"""
+        try:
+            return self.backend.daily_stats(start_date, end_date)
+
+        except Error as e:
+            print(f"Error getting daily stats: {e}")
+            return []
+
+    def get_user_stats(self, start_date, end_date, limit=10):
+        """The users with the most accesses between two dates, busiest first"""
+        try:
+            return self.backend.user_stats(start_date, end_date, limit)
+
+        except Error as e:
+            print(f"Error getting user stats: {e}")
+            return []
+
     def get_access_count(self, user_id):
         """Get the number of times a user has accessed the gate"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT COUNT(*) FROM gate_access WHERE user_id = %s AND status = 'Granted'",
-                (user_id,)
-            )
-            count = cursor.fetchone()[0]
-            
-            conn.close()
-            return count
-            
+            return self.backend.get_access_count(user_id)
+
         except Error as e:
             print(f"Error getting access count: {e}")
             return 0
- 
 
     def log_training(self, faces_count, status="Completed"):
         """Log training session"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO training_log (faces_count, status) VALUES (%s, %s)",
-                (faces_count, status)
-            )
-            
-            conn.commit()
-            conn.close()
+            self.backend.log_training(faces_count, status)
             return True
-            
+
         except Error as e:
             print(f"Error logging training: {e}")
             return False
@@ -191,18 +171,9 @@ class FaceRecognitionDB:
     def log_gate_session(self, date, time_str, users_recognized, duration):
         """Log gate monitoring session"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO gate_sessions (date, time, users_recognized, duration) VALUES (%s, %s, %s, %s)",
-                (date, time_str, users_recognized, duration)
-            )
-            
-            conn.commit()
-            conn.close()
+            self.backend.write_events([("session", [date, time_str, users_recognized, duration])])
             return True
-            
+
         except Error as e:
             print(f"Error logging gate session: {e}")
             return False
@@ -210,44 +181,26 @@ class FaceRecognitionDB:
     def get_all_users(self):
         """Get all users"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("SELECT * FROM users ORDER BY name")
-            users = cursor.fetchall()
-            
-            conn.close()
-            return users
-            
+            return self.backend.get_all_users()
+
         except Error as e:
             print(f"Error getting users: {e}")
             return []
+
+    def search_users(self, term, limit=20):
+        """Users whose name contains term or whose ID number starts with it, best match first"""
+        try:
+            return self.backend.search_users(term, limit)
+
+        except Error as e:
+            print(f"Error searching users: {e}")
+            return []
     
     def get_user_gate_access(self, user_id, start_date=None, end_date=None):
         """Get gate access records for a specific user"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = "SELECT * FROM gate_access WHERE user_id = %s"
-            params = [user_id]
-            
-            if start_date:
-                query += " AND date >= %s"
-                params.append(start_date)
-            
-            if end_date:
-                query += " AND date <= %s"
-                params.append(end_date)
-                
-            query += " ORDER BY date DESC, time DESC"
-            
-            cursor.execute(query, params)
-            access_records = cursor.fetchall()
-            
-            conn.close()
-            return access_records
-            
+            return self.backend.user_history(user_id, start_date, end_date)
+
         except Error as e:
             print(f"Error getting gate access records: {e}")
             return []
@@ -255,74 +208,53 @@ class FaceRecognitionDB:
     def get_all_gate_access(self, date=None):
         """Get all gate access records, optionally filtered by date"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-                SELECT ga.*, u.name, u.id_number, 
-                (SELECT COUNT(*) FROM gate_access WHERE user_id = ga.user_id AND status = 'Granted') as access_count
-                FROM gate_access ga
-                LEFT JOIN users u ON ga.user_id = u.id
-            """
-            
-            params = []
-            if date:
-                query += " WHERE ga.date = %s"
-                params.append(date)
-                
-            query += " ORDER BY ga.date DESC, ga.time DESC"
-            
-            cursor.execute(query, params)
-            access_records = cursor.fetchall()
-            
-            conn.close()
-            return access_records
-            
+            return self.backend.all_history(date)
+
         except Error as e:
             print(f"Error getting all gate access records: {e}")
             return []
 
     def get_filtered_gate_access(self, start_date=None, end_date=None, search_term=None, status=None):
-        """Get filtered gate access records"""
+        """Get filtered gate access records
+
+        search_term matches users as search_users does; their records
+        are then read by user ID.
+        """
         try:
-            conn = self.connect()
-            cursor = conn.cursor(dictionary=True)
-
-            query = """
-                SELECT ga.*, u.name, u.id_number,
-                (SELECT COUNT(*) FROM gate_access WHERE user_id = ga.user_id AND status = 'Granted') as access_count
-                FROM gate_access ga
-                LEFT JOIN users u ON ga.user_id = u.id
-                WHERE 1=1
-            """
-
-            params = []
-
-            if start_date:
-                query += " AND ga.date >= %s"
-                params.append(start_date)
-            
-            if end_date:
-                query += " AND ga.date <= %s"
-                params.append(end_date)
-            
-            if search_term:
-                query += " AND (u.name LIKE %s OR u.id_number = %s)"
-                params.append(f"%{search_term}%")
-                params.append(search_term)
-            
-            if status and status != "All":
-                query += " AND ga.status = %s"
-                params.append(status)
-
-            query += " ORDER BY ga.date DESC, ga.time DESC"
-
-            cursor.execute(query, params)
-            access_records = cursor.fetchall()
-
-            conn.close()
-            return access_records
+            return self.backend.history(start_date, end_date, search_term, status)
 
         except Error as e:
             print(f"Error fetching filtered gate access records: {e}")
             return []
+
+    def get_gate_access_page(self, start_date=None, end_date=None, search_term=None, status=None,
+                             page_size=200, after=None):
+        """Get one page of filtered gate access records, newest first
+
+        Returns (records, next_key). Pass next_key back as after to get
+        the following page; it is None on the last page.
+        """
+        try:
+            return self.backend.history_page(
+                start_date, end_date, search_term, status, page_size, after
+            )
+
+        except Error as e:
+            print(f"Error fetching gate access page: {e}")
+            return [], None
+
+    def iter_gate_access(self, start_date=None, end_date=None, search_term=None, status=None,
+                         batch_size=1000):
+        """Stream every filtered gate access record, newest first
+
+        Rows are read batch_size at a time, so memory stays bounded
+        however many rows match. The stream uses its own connection, so
+        the caller can make other DB calls while iterating.
+        """
+        try:
+            yield from self.backend.iter_history(
+                start_date, end_date, search_term, status, batch_size
+            )
+
+        except Error as e:
+            print(f"Error streaming gate access records: {e}")
@@ -0,0 +1,315 @@
+"""
+Call metrics and slow-statement log for FaceRecognitionDB
+
+instrument(db, metrics) wraps every public FaceRecognitionDB method
+and the backend's cursors on that one object. Each method records its
+call count, a latency histogram, the rows it returned and the SQL
+statements it ran, including failed ones, which the facade otherwise
+only prints. A statement slower than slow_query_ms is kept in the
+slow log with its parameters redacted to their types.
+
+Nothing is wrapped unless DB_METRICS['enabled'] is set (or a DBMetrics
+is passed to FaceRecognitionDB), so a disabled setup runs the plain
+methods with no overhead at all.
+"""
+import datetime
+import functools
+import inspect
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds (milliseconds) of the latency histogram buckets; one
+# more bucket counts everything slower
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+BUCKET_LABELS = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (max if past the last)"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': {label: count for label, count in zip(BUCKET_LABELS, self.counts) if count},
+        }
+
+
+class MethodStats:
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.statements = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'statements': self.statements,
+            'errors': self.errors,
+            'latency': self.latency.to_dict(),
+        }
+
+
+class DBMetrics:
+    def __init__(self, slow_query_ms=100, slow_query_file=None, slow_query_keep=100):
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_file = slow_query_file
+        self.started_at = datetime.datetime.now()
+
+        # Most recent slow statements, newest last
+        self.slow_statements = deque(maxlen=slow_query_keep)
+
+        self._methods = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # -------------------------------------------------
+    # RECORDING
+    # -------------------------------------------------
+
+    def _stats(self, method):
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = MethodStats()
+        return stats
+
+    def record_call(self, method, seconds, rows):
+        with self._lock:
+            stats = self._stats(method)
+            stats.calls += 1
+            stats.rows += rows
+            stats.latency.add(seconds * 1000)
+
+    def record_statement(self, statement, params, seconds, failed=False, batch=None):
+        """Count a statement against the method running it; log it if slow
+
+        batch is the row count of an executemany, params its first row.
+        """
+        method = getattr(self._local, 'method', None) or "(backend)"
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._stats(method)
+            stats.statements += 1
+            stats.errors += failed
+
+        if ms < self.slow_query_ms:
+            return
+        entry = {
+            'at': datetime.datetime.now().isoformat(timespec='milliseconds'),
+            'method': method,
+            'ms': round(ms, 3),
+            'statement': " ".join(statement.split()),
+            'params': redact(params),
+            'failed': failed,
+        }
+        if batch is not None:
+            entry['batch'] = batch
+        with self._lock:
+            self.slow_statements.append(entry)
+            if self.slow_query_file:
+                with open(self.slow_query_file, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    # -------------------------------------------------
+    # READING
+    # -------------------------------------------------
+
+    def snapshot(self):
+        """Everything recorded so far, as plain dicts"""
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'slow_query_ms': self.slow_query_ms,
+                'methods': {name: stats.to_dict() for name, stats in sorted(self._methods.items())},
+                'slow_statements': list(self.slow_statements),
+            }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def reset(self):
+        with self._lock:
+            self._methods = {}
+            self.slow_statements.clear()
+            self.started_at = datetime.datetime.now()
+
+
+def redact(params):
+    """Replace parameter values with their type names"""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: _type_name(value) for key, value in params.items()}
+    return [_type_name(value) for value in params]
+
+
+def _type_name(value):
+    return "NULL" if value is None else f"<{type(value).__name__}>"
+
+
+def _row_count(result):
+    """Rows a facade method returned: list length, 1 for a single row"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])  # (records, next_key) pages
+    if isinstance(result, dict):
+        return 1
+    return 0
+
+
+# -------------------------------------------------
+# WRAPPING
+# -------------------------------------------------
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute/executemany"""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def execute(self, query, params=()):
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute(query, params)
+        except BaseException:
+            self._metrics.record_statement(query, params, time.perf_counter() - start, True)
+            raise
+        self._metrics.record_statement(query, params, time.perf_counter() - start)
+        return result
+
+    def executemany(self, query, rows):
+        rows = list(rows)
+        first = rows[0] if rows else ()
+        start = time.perf_counter()
+        try:
+            result = self._cursor.executemany(query, rows)
+        except BaseException:
+            self._metrics.record_statement(
+                query, first, time.perf_counter() - start, True, batch=len(rows)
+            )
+            raise
+        self._metrics.record_statement(query, first, time.perf_counter() - start, batch=len(rows))
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+def instrument(db, metrics):
+    """Record db's method calls and statements into metrics; sets db.metrics"""
+    for name, function in inspect.getmembers(type(db), inspect.isfunction):
+        if name.startswith("_"):
+            continue
+        method = getattr(db, name)
+        if inspect.isgeneratorfunction(function):
+            setattr(db, name, _wrap_generator(metrics, name, method))
+        else:
+            setattr(db, name, _wrap_method(metrics, name, method))
+
+    backend = db.backend
+    cursor, stream = backend.cursor, backend.stream
+
+    def instrumented_cursor(conn, dictionary=False):
+        return InstrumentedCursor(cursor(conn, dictionary), metrics)
+
+    def instrumented_stream(query, params, batch_size):
+        # A stream's statement is timed up to its first batch of rows
+        start = time.perf_counter()
+        rows = stream(query, params, batch_size)
+        try:
+            first = next(rows, None)
+        except BaseException:
+            metrics.record_statement(query, params, time.perf_counter() - start, True)
+            raise
+        metrics.record_statement(query, params, time.perf_counter() - start)
+        if first is not None:
+            yield first
+            yield from rows
+
+    backend.cursor = instrumented_cursor
+    backend.stream = instrumented_stream
+    db.metrics = metrics
+
+
+def _wrap_method(metrics, name, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        outer = getattr(metrics._local, 'method', None)
+        metrics._local.method = outer or name
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            metrics._local.method = outer
+        if outer is None:
+            metrics.record_call(name, time.perf_counter() - start, _row_count(result))
+        return result
+    return wrapper
+
+
+def _wrap_generator(metrics, name, method):
+    # Timed from the first row requested until the stream ends or is
+    # closed, so that includes the time the consumer spends per row
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        iterator = method(*args, **kwargs)
+        rows = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                # Statements run while producing a row count against name
+                outer = getattr(metrics._local, 'method', None)
+                metrics._local.method = outer or name
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    metrics._local.method = outer
+                rows += 1
+                yield row
+        finally:
+            iterator.close()
+            metrics.record_call(name, time.perf_counter() - start, rows)
+    return wrapper
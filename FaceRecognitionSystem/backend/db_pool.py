@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeout(Error):
+    """No pooled connection became free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived MySQL connections.
+
+    Each thread checks out its own connection with ``connection()``;
+    nested checkouts in the same thread reuse it, so a DB method called
+    from inside another one doesn't take a second connection.
+    Connections are opened lazily, up to size, and run in autocommit
+    mode so a pooled session never holds an old read snapshot. One
+    that has been idle longer than health_check_interval seconds is
+    pinged (and reconnected if the server dropped it) before being
+    handed out, and one that raised a connection error is discarded.
+    """
+
+    def __init__(self, connect_args, size=5, timeout=10, health_check_interval=30):
+        self.connect_args = dict(connect_args)
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # -------------------------------------------------
+    # CHECKOUT
+    # -------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread"""
+        held = getattr(self._local, 'connection', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.connection = conn
+        self._local.depth = 1
+        broken = False
+        try:
+            yield conn
+        except (mysql.connector.OperationalError, mysql.connector.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._local.connection = None
+            self._release(conn, broken)
+
+    def _acquire(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open_if_allowed()
+                if conn is not None:
+                    return conn
+                try:
+                    conn, last_used = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(
+                        msg=f"No database connection free after {self.timeout}s"
+                    )
+
+            if time.monotonic() - last_used < self.health_check_interval:
+                return conn
+            if self._healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def _open_if_allowed(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+
+        try:
+            return self._open()
+        except Error:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _open(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        conn.autocommit = True
+        return conn
+
+    def _healthy(self, conn):
+        """Ping an idle connection, reconnecting once if it went stale"""
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            conn.autocommit = True
+            return True
+        except Error:
+            return False
+
+    def _release(self, conn, broken=False):
+        if not broken:
+            try:
+                # Leave no half-finished explicit transaction behind
+                if conn.in_transaction:
+                    conn.rollback()
+            except Error:
+                broken = True
+
+        if broken or self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    # -------------------------------------------------
+    # SHUTDOWN
+    # -------------------------------------------------
+
+    def close(self):
+        """Close every idle connection (checked-out ones close on return)"""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
@@ -0,0 +1,279 @@
+"""
+Write-behind recorder for gate access and session events
+
+The camera loop only puts events on a bounded in-memory queue; a
+background thread writes them to the database in batches with
+executemany, flushing when batch_size events are waiting or
+flush_interval seconds after the first one arrived. If the database is
+unreachable (or the queue is full) events are appended to a local
+JSON-lines journal instead, and the journal is replayed, oldest first,
+once the database is back.
+
+Journal replay progress is kept in <journal>.offset after every
+committed batch, so a crash can at worst replay one batch twice.
+Events the database rejects outright (e.g. a user deleted meanwhile)
+are moved to <journal>.rejected rather than retried forever.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+from FaceRecognitionSystem.backend.storage import Error, is_data_error
+
+# Sentinel that wakes the writer thread up on stop()
+_STOP = ("stop", None)
+
+
+class EventRecorder:
+    def __init__(self, db, journal_file, queue_size=10000, batch_size=200,
+                 flush_interval=1.0, retry_interval=5.0):
+        self.db = db
+        self.journal_file = journal_file
+        self.offset_file = journal_file + ".offset"
+        self.rejected_file = journal_file + ".rejected"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._journal_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._last_failure = None
+
+        # Running totals, for logging and benchmarks
+        self.written = 0
+        self.journaled = 0
+        self.rejected = 0
+
+    # -------------------------------------------------
+    # PRODUCER SIDE (CAMERA LOOP)
+    # -------------------------------------------------
+
+    def record_access(self, user_id, date, time_str, status):
+        """Queue a gate access event (same arguments as record_gate_access)"""
+        self._put(("access", [user_id, str(date), str(time_str), status]))
+
+    def record_session(self, date, time_str, users_recognized, duration):
+        """Queue a gate session event (same arguments as log_gate_session)"""
+        self._put(("session", [str(date), str(time_str), users_recognized, duration]))
+
+    def _put(self, event):
+        self.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Never block the camera loop; the journal is replayed later
+            self._append_journal([event])
+
+    # -------------------------------------------------
+    # LIFECYCLE
+    # -------------------------------------------------
+
+    def start(self):
+        """Start the writer thread if it isn't running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="EventRecorder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Write out everything queued and stop the writer thread
+
+        Events still queued after timeout are journaled, so nothing is
+        lost on shutdown even if the database is slow.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+        leftover = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not _STOP:
+                leftover.append(event)
+        if leftover:
+            self._append_journal(leftover)
+        self._thread = None
+
+    # -------------------------------------------------
+    # WRITER THREAD
+    # -------------------------------------------------
+
+    def _run(self):
+        self._replay_journal()
+
+        while True:
+            batch, stop = self._collect()
+            if batch:
+                self._write(batch)
+            elif self._retry_due():
+                self._replay_journal()
+            if stop:
+                break
+
+    def _collect(self):
+        """Wait for a batch: batch_size events or flush_interval after the first"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return [], self._stopping.is_set()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self._stopping.is_set():
+                break
+            try:
+                event = self._queue.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                break
+            if event is _STOP:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    def _retry_due(self):
+        return (self._last_failure is None
+                or time.monotonic() - self._last_failure >= self.retry_interval)
+
+    def _write(self, batch):
+        # Failed recently: don't stall on connect timeouts for every batch
+        if not self._retry_due():
+            self._append_journal(batch)
+            return
+
+        # Journaled events are older, so they go first to keep order
+        if self._journal_backlog() and not self._replay_journal():
+            self._append_journal(batch)
+            return
+
+        if self._insert(batch):
+            self.written += len(batch)
+        else:
+            self._append_journal(batch)
+
+    def _insert(self, batch):
+        """Write one batch; returns False if the database is unreachable or its schema incomplete"""
+        try:
+            self.db.write_events(batch)
+            self._last_failure = None
+            return True
+        except Error as e:
+            if is_data_error(e):
+                self._insert_each(batch)
+                return True
+            print(f"Database unavailable, journaling gate events: {e}")
+            self._last_failure = time.monotonic()
+            return False
+
+    def _insert_each(self, batch):
+        """Write events one at a time, setting aside the ones rejected"""
+        for i, event in enumerate(batch):
+            try:
+                self.db.write_events([event])
+            except Error as e:
+                if is_data_error(e):
+                    print(f"Rejected gate event {event}: {e}")
+                    self._append_lines(self.rejected_file, [event])
+                    self.rejected += 1
+                    continue
+                # Lost the database (or part of its schema) part-way: journal the rest for later
+                print(f"Database unavailable, journaling gate events: {e}")
+                self._last_failure = time.monotonic()
+                self._append_journal(batch[i:])
+                return
+
+    # -------------------------------------------------
+    # JOURNAL
+    # -------------------------------------------------
+
+    def _append_journal(self, events):
+        self._append_lines(self.journal_file, events)
+        self.journaled += len(events)
+
+    def _append_lines(self, path, events):
+        with self._journal_lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'a') as f:
+                for kind, values in events:
+                    f.write(json.dumps({"kind": kind, "values": values}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _read_offset(self):
+        try:
+            with open(self.offset_file, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        tmp_path = self.offset_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.offset_file)
+
+    def _journal_backlog(self):
+        """Bytes of journal not yet replayed (0 if there is none)"""
+        try:
+            return max(0, os.path.getsize(self.journal_file) - self._read_offset())
+        except OSError:
+            return 0
+
+    def _replay_journal(self):
+        """Replay the journal in batches; returns True once it is empty"""
+        while True:
+            with self._journal_lock:
+                offset = self._read_offset()
+                events, end = self._read_journal(offset)
+
+                if not events:
+                    # Fully replayed: start a fresh journal
+                    if os.path.exists(self.journal_file):
+                        os.remove(self.journal_file)
+                    if os.path.exists(self.offset_file):
+                        os.remove(self.offset_file)
+                    return True
+
+            if not self._insert(events):
+                return False
+
+            with self._journal_lock:
+                self._write_offset(end)
+            self.written += len(events)
+
+    def _read_journal(self, offset):
+        """Read up to batch_size complete events from offset; returns (events, end)"""
+        events = []
+        try:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(offset)
+                while len(events) < self.batch_size:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        # Missing or half-written last line
+                        break
+                    offset += len(line)
+                    try:
+                        record = json.loads(line)
+                        events.append((record["kind"], record["values"]))
+                    except (ValueError, KeyError):
+                        print(f"Skipping corrupt journal line: {line!r}")
+        except OSError:
+            pass
+        return events, offset
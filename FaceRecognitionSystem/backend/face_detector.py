@@ -0,0 +1,98 @@
+"""
+Haar face detection driven by a configurable detection profile
+
+A profile trades detection range for speed:
+
+- downscale: the cascade runs on a smaller copy of the frame (its image
+  pyramid then starts at that resolution) and boxes are mapped back to
+  full resolution, so recognition still gets full-resolution crops.
+  Faces smaller than the cascade window (24 px for the default cascade)
+  divided by downscale can no longer be found.
+- size_bounds: minSize/maxSize are derived from how near and how far
+  from the camera a person at the gate can stand, so the cascade skips
+  scales that cannot contain a face at the gate.
+- roi: detection is limited to the configured gate-lane region.
+"""
+import math
+
+import cv2
+import numpy as np
+
+# Haar boxes are a little wider than the face itself; widen the bounds
+# so faces at the ends of the distance range are still found
+SIZE_MARGIN = (0.8, 1.25)
+
+
+def face_size_bounds(frame_width, hfov_deg, face_width_m, distance_m):
+    """Return (min, max) face box size in pixels for a pinhole camera.
+
+    A face face_width_m wide at distance d metres spans
+    focal * face_width_m / d pixels, with focal derived from the frame
+    width and horizontal field of view.
+    """
+    near, far = distance_m
+    focal = frame_width / (2 * math.tan(math.radians(hfov_deg) / 2))
+    smallest = focal * face_width_m / far * SIZE_MARGIN[0]
+    largest = focal * face_width_m / near * SIZE_MARGIN[1]
+    return int(smallest), int(math.ceil(largest))
+
+
+class FaceDetector:
+    def __init__(self, models, profile, roi=None, camera_hfov_deg=60,
+                 face_width_m=0.16, face_distance_m=None):
+        self.models = models
+        self.downscale = profile.get('downscale', 1.0)
+        self.scale_factor = profile.get('scale_factor', 1.2)
+        self.min_neighbors = profile.get('min_neighbors', 5)
+
+        self.roi = roi if profile.get('roi') else None
+        self.size_bounds = profile.get('size_bounds') and face_distance_m is not None
+        self.camera_hfov_deg = camera_hfov_deg
+        self.face_width_m = face_width_m
+        self.face_distance_m = face_distance_m
+
+    def region(self, shape):
+        """Pixel (x0, y0, x1, y1) of the detection region for a frame shape"""
+        height, width = shape[:2]
+        if self.roi is None:
+            return 0, 0, width, height
+
+        # ROI is given as fractions of the frame: (x, y, w, h)
+        x, y, w, h = self.roi
+        x0, y0 = int(x * width), int(y * height)
+        x1, y1 = int((x + w) * width), int((y + h) * height)
+        return max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+
+    def detect(self, gray):
+        """Detect faces in a grayscale frame.
+
+        Returns an (N, 4) int array of (x, y, w, h) boxes in the
+        coordinates of the full-resolution frame.
+        """
+        x0, y0, x1, y1 = self.region(gray.shape)
+        image = gray[y0:y1, x0:x1]
+        if image.size == 0:
+            return np.empty((0, 4), dtype=np.int32)
+
+        scale = self.downscale
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        options = {}
+        if self.size_bounds:
+            smallest, largest = face_size_bounds(
+                gray.shape[1], self.camera_hfov_deg, self.face_width_m, self.face_distance_m
+            )
+            options['minSize'] = (max(1, int(smallest * scale)),) * 2
+            options['maxSize'] = (max(1, int(largest * scale)),) * 2
+
+        boxes = self.models.cascade.detectMultiScale(
+            image, self.scale_factor, self.min_neighbors, **options
+        )
+        if len(boxes) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+
+        boxes = np.round(np.asarray(boxes, dtype=np.float64) / scale).astype(np.int32)
+        boxes[:, 0] += x0
+        boxes[:, 1] += y0
+        return boxes
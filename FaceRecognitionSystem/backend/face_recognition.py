@@ -6,9 +6,24 @@ import numpy as np
 
 from FaceRecognitionSystem.backend.utils import (
     get_face_recognizer,
-    get_images_and_labels
+    normalize_face
 )
-from FaceRecognitionSystem.backend.config import FACE_RECOGNITION
+from FaceRecognitionSystem.backend.config import EVENT_RECORDER, FACE_RECOGNITION
+from FaceRecognitionSystem.backend.ann_index import IVFIndex
+from FaceRecognitionSystem.backend.event_recorder import EventRecorder
+from FaceRecognitionSystem.backend.face_detector import FaceDetector
+from FaceRecognitionSystem.backend.gallery import FaceGallery
+from FaceRecognitionSystem.backend.lbph_model import (
+    compute_histograms,
+    default_lbph_params,
+    write_lbph_model
+)
+from FaceRecognitionSystem.backend.model_holder import RecognizerHolder
+from FaceRecognitionSystem.backend.prototypes import compact_histograms
+from FaceRecognitionSystem.backend.sample_store import SampleStore
+from FaceRecognitionSystem.backend.tracking import FaceTracker, clip_box
+from FaceRecognitionSystem.backend.training_pipeline import extract_histograms
+from FaceRecognitionSystem.backend.training_manifest import TrainingManifest
 
 
 class FaceRecognitionSystem:
@@ -23,6 +38,64 @@ class FaceRecognitionSystem:
         self.confidence_threshold = FACE_RECOGNITION["confidence_threshold"]
         self.poor_match_threshold = FACE_RECOGNITION["poor_match_threshold"]
         self.samples_per_face = FACE_RECOGNITION["samples_per_face"]
+        self.training_workers = FACE_RECOGNITION["training_workers"]
+        self.crop_size = FACE_RECOGNITION["crop_size"]
+        self.top_k = FACE_RECOGNITION["top_k"]
+        self.prototypes_per_user = FACE_RECOGNITION["prototypes_per_user"]
+        self.duplicate_distance = FACE_RECOGNITION["duplicate_distance"]
+        self.ann_enabled = FACE_RECOGNITION["ann_enabled"]
+        self.ann_nlist = FACE_RECOGNITION["ann_nlist"]
+        self.gallery_prefix = os.path.splitext(self.training_file)[0]
+
+        # Packed, memory-mapped training crops
+        self.store = SampleStore(
+            FACE_RECOGNITION["sample_store"],
+            self.crop_size
+        )
+
+        # Long-lived cascade + model, hot-reloaded when retrained
+        self.models = RecognizerHolder(
+            self.training_file,
+            self.cascade_path,
+            FACE_RECOGNITION["model_reload_interval"],
+            use_gallery=FACE_RECOGNITION["matcher"] == "gallery",
+            use_ann=FACE_RECOGNITION["ann_enabled"],
+            ann_nprobe=FACE_RECOGNITION["ann_nprobe"]
+        )
+
+        # Shared Haar cascade, run with the configured detection profile;
+        # registration capture has its own, unbounded by gate geometry
+        self.detector = self.create_detector(FACE_RECOGNITION["detection_profile"])
+        self.capture_detector = self.create_detector(FACE_RECOGNITION["capture_detection_profile"])
+
+        # Gate events are written behind the camera loop, in batches
+        self.events = EventRecorder(
+            self.db,
+            EVENT_RECORDER["journal_file"],
+            queue_size=EVENT_RECORDER["queue_size"],
+            batch_size=EVENT_RECORDER["batch_size"],
+            flush_interval=EVENT_RECORDER["flush_interval"],
+            retry_interval=EVENT_RECORDER["retry_interval"]
+        )
+
+    # -------------------------------------------------
+    # FACE DETECTION
+    # -------------------------------------------------
+
+    def create_detector(self, profile_name):
+        """Return a FaceDetector for one of the configured detection profiles"""
+        profiles = FACE_RECOGNITION["detection_profiles"]
+        if profile_name not in profiles:
+            raise Exception(f"Unknown detection profile: {profile_name}")
+
+        return FaceDetector(
+            self.models,
+            profiles[profile_name],
+            roi=FACE_RECOGNITION["detection_roi"],
+            camera_hfov_deg=FACE_RECOGNITION["camera_hfov_deg"],
+            face_width_m=FACE_RECOGNITION["face_width_m"],
+            face_distance_m=FACE_RECOGNITION["face_distance_m"]
+        )
 
     # -------------------------------------------------
     # CAPTURE TRAINING IMAGES
@@ -30,16 +103,9 @@ class FaceRecognitionSystem:
 
     def capture_training_images(self, name, user_id):
         cam = cv2.VideoCapture(0)
-        detector = cv2.CascadeClassifier(self.cascade_path)
-
-        if detector.empty():
-            raise Exception(
-                f"Haar cascade not loaded: {self.cascade_path}"
-            )
 
         sample_num = 0
-        output_path = os.path.dirname(self.training_file)
-        os.makedirs(output_path, exist_ok=True)
+        crops = []
 
         while True:
             ret, img = cam.read()
@@ -47,18 +113,11 @@ class FaceRecognitionSystem:
                 raise Exception("Camera error")
 
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            faces = detector.detectMultiScale(gray, 1.3, 5)
+            faces = self.capture_detector.detect(gray)
 
             for (x, y, w, h) in faces:
                 sample_num += 1
-
-                cv2.imwrite(
-                    os.path.join(
-                        output_path,
-                        f"{name}.{user_id}.{sample_num}.jpg"
-                    ),
-                    gray[y:y + h, x:x + w]
-                )
+                crops.append(gray[y:y + h, x:x + w].copy())
 
                 cv2.rectangle(
                     img, (x, y), (x + w, y + h), (255, 0, 0), 2
@@ -83,90 +142,251 @@ class FaceRecognitionSystem:
 
         cam.release()
         cv2.destroyAllWindows()
+
+        # A new capture replaces whatever the user had before
+        self.store.append(user_id, name, crops, replace=True)
         return sample_num
 
     # -------------------------------------------------
     # TRAIN MODEL
     # -------------------------------------------------
 
-    def train_model(self):
-        training_dir = os.path.dirname(self.training_file)
+    def train_model(self, incremental=False, progress=None):
+        """Train the LBPH model from the packed sample store.
+
+        With incremental=True only store rows not yet in the model are
+        fed to recognizer.update(). Removed or re-captured users can't be
+        dropped from an LBPH model, so those fall back to a full rebuild;
+        call with incremental=False to compact the model periodically.
+
+        progress: optional callback(done, total) for full rebuilds.
+        """
+        self.store.refresh()
 
-        if not os.path.exists(training_dir) or len(os.listdir(training_dir)) == 0:
+        if self.store.count == 0:
             raise Exception("No training images found")
 
-        recognizer = get_face_recognizer()
-        faces, ids = get_images_and_labels(training_dir)
+        manifest = TrainingManifest(self.training_file)
 
-        if len(faces) == 0:
-            raise Exception("No faces detected in training data")
+        if incremental and manifest.load() and manifest.matches_model():
+            new_rows = manifest.new_rows(self.store)
 
-        recognizer.train(faces, np.array(ids))
-        recognizer.save(self.training_file)
+            if new_rows is None:
+                print("Sample store was rewritten, running full rebuild")
+            else:
+                return self._update_model(*new_rows, manifest)
 
-        self.db.log_training(len(faces))
-        return len(faces)
+        # Histogram extraction is spread over a process pool and
+        # reassembled in order, so the model matches a serial train()
+        params = default_lbph_params()
+        histograms, ids = extract_histograms(
+            self.store,
+            params,
+            workers=self.training_workers,
+            progress=progress
+        )
 
-    # -------------------------------------------------
-    # SINGLE IMAGE RECOGNITION (INTEGRATED GATE)
-    # -------------------------------------------------
+        self._publish_model(histograms, ids, params)
+        manifest.save(self.store)
 
-    def recognize_face_from_image(self, image_path):
-        if not os.path.exists(self.training_file):
-            return {"status": "UNKNOWN", "name": None}
+        self.db.log_training(len(ids))
+        return len(ids)
+
+    def _update_model(self, start, stop, manifest):
+        """Feed only store rows [start, stop) into a copy of the trained model"""
+        if stop <= start:
+            return 0
+
+        faces = list(self.store.samples(start, stop))
+        ids = np.array(self.store.labels(start, stop))
 
+        # Update a private copy; the live model keeps serving until swap
         recognizer = get_face_recognizer()
         recognizer.read(self.training_file)
+        recognizer.update(faces, ids)
 
-        face_cascade = cv2.CascadeClassifier(self.cascade_path)
-        if face_cascade.empty():
-            raise Exception(
-                f"Haar cascade not loaded: {self.cascade_path}"
+        self._publish_model(
+            np.vstack(recognizer.getHistograms()),
+            recognizer.getLabels().ravel(),
+            default_lbph_params()
+        )
+        manifest.save(self.store)
+
+        self.db.log_training(len(faces), status="Incremental")
+        return len(faces)
+
+    def _publish_model(self, histograms, labels, params):
+        """Compact, save the gallery, then atomically replace Trainner.yml"""
+        if self.prototypes_per_user:
+            before = histograms.nbytes
+            histograms, labels = compact_histograms(
+                histograms,
+                labels,
+                self.prototypes_per_user,
+                self.duplicate_distance
+            )
+            print(
+                f"Compacted model to {len(labels)} prototypes "
+                f"({100 * (1 - histograms.nbytes / before):.0f}% smaller)"
             )
 
-        img = cv2.imread(image_path)
-        if img is None:
-            return {"status": "UNKNOWN", "name": None}
+        # Saved first: the holder loads them when it sees the new model
+        gallery = FaceGallery.build(histograms, labels)
+        gallery.save(self.gallery_prefix)
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.2, 5)
+        if self.ann_enabled:
+            IVFIndex.build(gallery.histograms, nlist=self.ann_nlist).save(self.gallery_prefix)
+        elif os.path.exists(self.gallery_prefix + ".ann.npz"):
+            # A stale index would point at rows of an older gallery
+            os.remove(self.gallery_prefix + ".ann.npz")
 
-        if len(faces) == 0:
-            return {"status": "UNKNOWN", "name": None}
+        # Write next to the live model and rename over it, so gates
+        # watching the file never read a partially written model
+        os.makedirs(os.path.dirname(self.training_file), exist_ok=True)
+        tmp_file = self.training_file + ".tmp"
+        write_lbph_model(tmp_file, histograms, labels, params)
+        os.replace(tmp_file, self.training_file)
+        self.models.reload(force=True)
 
-        for (x, y, w, h) in faces:
-            user_id, conf = recognizer.predict(gray[y:y + h, x:x + w])
+    # -------------------------------------------------
+    # FRAME / SINGLE IMAGE RECOGNITION (INTEGRATED GATE)
+    # -------------------------------------------------
+
+    def match_faces(self, faces):
+        """Match normalized face crops against the trained model.
+
+        Returns one candidate list per face of (user_id, distance) pairs,
+        best first. The gallery matches the whole batch at once and
+        returns up to top_k users, re-ranking only ANN candidates when the
+        IVF index is enabled; plain LBPH returns only its top-1.
+        """
+        recognizer, gallery, index = self.models.active()
+        if recognizer is None or len(faces) == 0:
+            return [[] for _ in faces]
+
+        if index is not None:
+            return index.search(gallery, compute_histograms(faces), self.top_k)
+
+        if gallery is not None:
+            return gallery.search(compute_histograms(faces), self.top_k)
+
+        return [[recognizer.predict(face)] for face in faces]
+
+    def recognize_faces(self, frame):
+        """Detect and recognize every face in an in-memory frame.
+
+        frame: BGR (or BGRA) colour image or single-channel grayscale
+        ndarray, e.g. straight from cv2.VideoCapture.read().
+
+        Returns a list with one dict per detected face:
+        {"box": (x, y, w, h), "user_id", "name", "confidence", "status",
+        "candidates"} where status is "KNOWN" or "UNKNOWN" and candidates
+        are the best (user_id, distance) matches from match_faces().
+        """
+        if frame is None or self.models.recognizer() is None:
+            return []
+
+        gray = self._to_gray(frame)
+        boxes = self.detector.detect(gray)
+        matches = self.match_faces([
+            normalize_face(gray[y:y + h, x:x + w], self.crop_size)
+            for (x, y, w, h) in boxes
+        ])
+
+        results = []
+        for (x, y, w, h), candidates in zip(boxes, matches):
+            user_id, conf = candidates[0] if candidates else (None, float("inf"))
+            user = None
 
             if conf < self.confidence_threshold:
                 user = self.db.get_user_details(user_id)
-                if user:
-                    return {
-                        "status": "KNOWN",
-                        "name": user["name"]
-                    }
+
+            results.append({
+                "box": (int(x), int(y), int(w), int(h)),
+                "user_id": user_id if user else None,
+                "name": user["name"] if user else None,
+                "confidence": conf,
+                "status": "KNOWN" if user else "UNKNOWN",
+                "candidates": candidates
+            })
+
+        return results
+
+    def recognize_face_from_image(self, image_path):
+        img = cv2.imread(image_path)
+        if img is None:
+            return {"status": "UNKNOWN", "name": None}
+
+        for face in self.recognize_faces(img):
+            if face["status"] == "KNOWN":
+                return {"status": "KNOWN", "name": face["name"]}
 
         return {"status": "UNKNOWN", "name": None}
 
+    def create_tracker(self):
+        """Return a FaceTracker configured from FACE_RECOGNITION"""
+        return FaceTracker(
+            self.confidence_threshold,
+            iou_threshold=FACE_RECOGNITION["track_iou_threshold"],
+            max_missed=FACE_RECOGNITION["track_max_missed"],
+            recheck_interval=FACE_RECOGNITION["track_recheck_interval"],
+            min_votes=FACE_RECOGNITION["track_min_votes"],
+            detect_interval=FACE_RECOGNITION["track_detect_interval"],
+            opencv_tracker=FACE_RECOGNITION["track_opencv_tracker"]
+        )
+
+    def track_faces(self, frame, tracker):
+        """Advance tracker by one frame and recognize only the tracks that need it.
+
+        Returns the FaceTrack objects visible in this frame; each one's
+        identity is the vote-accumulated (user_id, distance).
+        """
+        gray = self._to_gray(frame)
+
+        if tracker.detection_due():
+            tracks = tracker.update(self.detector.detect(gray), frame)
+        else:
+            tracks = tracker.follow(frame)
+
+        pending = [
+            track for track in tracks
+            if tracker.needs_recognition(track) and min(clip_box(track.box, gray.shape)[2:]) > 0
+        ]
+        crops = []
+        for track in pending:
+            x, y, w, h = clip_box(track.box, gray.shape)
+            crops.append(normalize_face(gray[y:y + h, x:x + w], self.crop_size))
+
+        for track, candidates in zip(pending, self.match_faces(crops)):
+            if candidates:
+                tracker.record(track, *candidates[0])
+
+        return tracks
+
+    @staticmethod
+    def _to_gray(frame):
+        if frame.ndim == 2:
+            return frame
+        if frame.shape[2] == 4:
+            return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
     # -------------------------------------------------
     # LIVE GATE MONITOR (FACE-ONLY APP)
     # -------------------------------------------------
 
     def monitor_gate(self, max_runtime=20):
-        if not os.path.exists(self.training_file):
+        if self.models.recognizer() is None:
             raise Exception("Train model first")
 
-        recognizer = get_face_recognizer()
-        recognizer.read(self.training_file)
-
-        face_cascade = cv2.CascadeClassifier(self.cascade_path)
-        if face_cascade.empty():
-            raise Exception(
-                f"Haar cascade not loaded: {self.cascade_path}"
-            )
-
         cam = cv2.VideoCapture(0)
         font = cv2.FONT_HERSHEY_SIMPLEX
 
+        # Each person keeps one track while in view and is recognized
+        # once, not on every frame
+        tracker = self.create_tracker()
+        users = {}
+
         recognized_users = []
         start_time = time.time()
         today = datetime.date.today().strftime("%Y-%m-%d")
@@ -185,39 +405,52 @@ class FaceRecognitionSystem:
             if not ret:
                 break
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.2, 5)
-
-            for (x, y, w, h) in faces:
-                user_id, conf = recognizer.predict(gray[y:y + h, x:x + w])
+            # Picks up a retrained model without restarting the session
+            for track in self.track_faces(frame, tracker):
+                x, y, w, h = clip_box(track.box, frame.shape)
+                user_id, conf = track.identity
                 access_granted = False
+                pending = False
                 label = "Unknown"
 
-                if conf < self.confidence_threshold:
-                    user = self.db.get_user_details(user_id)
+                if conf is not None and conf < self.confidence_threshold:
+                    if user_id not in users:
+                        users[user_id] = self.db.get_user_details(user_id)
+                    user = users[user_id]
                     if user:
-                        access_granted = True
                         label = user["name"]
 
+                    # Access only once the track has its track_min_votes
+                    if user and not track.confirmed:
+                        pending = True
+                    elif user:
+                        access_granted = True
+
                         if user_id not in recognized_users:
                             recognized_users.append(user_id)
                             now = datetime.datetime.now()
-                            self.db.record_gate_access(
+                            self.events.record_access(
                                 user_id,
                                 today,
                                 now.strftime("%H:%M:%S"),
                                 "Granted"
                             )
 
-                elif conf > self.poor_match_threshold:
-                    filename = f"unknown_{int(time.time())}.jpg"
+                elif conf is not None and conf > self.poor_match_threshold and not track.handled:
+                    # One snapshot per unknown person rather than per frame
+                    track.handled = True
+                    filename = f"unknown_{int(time.time())}_{track.id}.jpg"
                     cv2.imwrite(
                         os.path.join(unknown_dir, filename),
                         frame[y:y + h, x:x + w]
                     )
 
-                color = (0, 255, 0) if access_granted else (0, 0, 255)
-                status = "GRANTED" if access_granted else "DENIED"
+                if access_granted:
+                    color, status = (0, 255, 0), "GRANTED"
+                elif pending:
+                    color, status = (0, 255, 255), "PENDING"
+                else:
+                    color, status = (0, 0, 255), "DENIED"
 
                 cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
                 cv2.putText(
@@ -241,11 +474,18 @@ class FaceRecognitionSystem:
         cv2.destroyAllWindows()
 
         duration = round(time.time() - start_time, 2)
-        self.db.log_gate_session(
+        print(
+            f"Gate session: {tracker.frames} frames, {tracker.tracks_created} tracks, "
+            f"{tracker.recognitions} recognitions"
+        )
+        self.events.record_session(
             today,
             datetime.datetime.now().strftime("%H:%M:%S"),
             len(recognized_users),
             duration
         )
 
+        # Session over: write out (or journal) everything still queued
+        self.events.stop()
+
         return len(recognized_users)
@@ -0,0 +1,206 @@
+"""
+Vectorized face-matching gallery
+
+Stores the LBPH histogram of every training sample as one contiguous
+float32 matrix (rows grouped by label) and matches many probe faces at
+once with the same chi-square distance LBPHFaceRecognizer.predict uses
+(HISTCMP_CHISQR_ALT), so distances are directly comparable with the
+configured confidence thresholds:
+
+    d(G, q) = 2 * sum (G - q)^2 / (G + q)
+            = 2 * (sum(G) + sum(q)) - 8 * sum G * q / (G + q)
+
+Only the last sum depends on both sides, and it is zero wherever the
+probe bin is zero, so it is evaluated over the probes' non-zero bins
+for a whole block of gallery rows at a time. The matrices are saved as
+.npy files and loaded with mmap_mode='r', so all gate processes on one
+machine share a single copy via the page cache.
+"""
+import json
+import os
+import uuid
+
+import numpy as np
+
+# Upper bound on temporaries (probes x rows x bins) per block
+BLOCK_ELEMENTS = 1 << 24
+
+
+class FaceGallery:
+    def __init__(self, histograms, labels):
+        self.histograms = histograms
+        self.labels = labels
+
+        # Rows are grouped by label; segment starts drive the per-label min
+        self.label_values, self.segment_starts = np.unique(labels, return_index=True)
+        self.row_sums = np.asarray(histograms.sum(axis=1, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def build(cls, histograms, labels):
+        """Create an in-memory gallery from training histograms and labels"""
+        histograms = np.asarray(histograms, dtype=np.float32)
+        labels = np.asarray(labels, dtype=np.int32)
+
+        order = np.argsort(labels, kind='stable')
+        histograms = np.ascontiguousarray(histograms[order])
+        labels = np.ascontiguousarray(labels[order])
+        return cls(histograms, labels)
+
+    def extended(self, histograms, labels):
+        """Return a new gallery with extra samples added"""
+        if len(self) == 0:
+            return FaceGallery.build(histograms, labels)
+        return FaceGallery.build(
+            np.vstack([self.histograms, histograms]),
+            np.concatenate([self.labels, labels])
+        )
+
+    # -------------------------------------------------
+    # MATCHING
+    # -------------------------------------------------
+
+    def distances(self, probes, rows=None):
+        """Chi-square distance from every probe to every gallery row (P x N)
+
+        rows: optional sorted array of gallery row indices to score
+        instead of the whole gallery (e.g. ANN candidates).
+        """
+        probes = np.atleast_2d(np.asarray(probes, dtype=np.float32))
+        columns = np.flatnonzero(probes.any(axis=0))
+        q = probes[:, columns][:, None, :]
+
+        count = len(self) if rows is None else len(rows)
+        result = np.empty((len(probes), count), dtype=np.float32)
+        block = max(1, BLOCK_ELEMENTS // max(1, len(probes) * len(columns)))
+
+        for start in range(0, count, block):
+            stop = min(start + block, count)
+            if rows is None:
+                g = self.histograms[start:stop][:, columns]
+            else:
+                g = self.histograms[rows[start:stop]][:, columns]
+            g = g[None, :, :]
+
+            total = g + q
+            shared = np.divide(g * q, total, out=np.zeros_like(total), where=total > 0)
+            result[:, start:stop] = shared.sum(axis=2)
+
+        row_sums = self.row_sums if rows is None else self.row_sums[rows]
+        result *= -8.0
+        result += 2.0 * (row_sums[None, :] + probes.sum(axis=1, dtype=np.float64)[:, None])
+
+        # Rounding in the expanded form can dip just below zero
+        np.maximum(result, 0.0, out=result)
+        return result
+
+    def search(self, probes, k=1):
+        """Return the k best labels per probe.
+
+        Returns one list per probe of (label, distance) pairs, best first,
+        with each label appearing at most once.
+        """
+        if len(self) == 0:
+            return [[] for _ in range(len(np.atleast_2d(probes)))]
+
+        distances = self.distances(probes)
+        per_label = np.minimum.reduceat(distances, self.segment_starts, axis=1)
+        return [rank_labels(row, self.label_values, k) for row in per_label]
+
+    def search_rows(self, probe, rows, k=1):
+        """Exact top-k labels for one probe, scoring only the given rows"""
+        if len(rows) == 0:
+            return []
+
+        rows = np.sort(rows)
+        distances = self.distances(probe, rows)[0]
+        labels = self.labels[rows]
+
+        # Sorted candidate rows stay grouped by label, like the gallery
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        per_label = np.minimum.reduceat(distances, starts)
+        return rank_labels(per_label, labels[starts], k)
+
+    # -------------------------------------------------
+    # PERSISTENCE
+    # -------------------------------------------------
+
+    def save(self, prefix):
+        """Write the gallery next to the trainer file.
+
+        Matrices are written under fresh names and a small JSON pointer is
+        swapped in last, so readers never combine files of two versions.
+        """
+        directory = os.path.dirname(prefix)
+        os.makedirs(directory, exist_ok=True)
+        token = uuid.uuid4().hex[:12]
+        files = {}
+
+        for name, array in (
+            ('histograms', self.histograms),
+            ('labels', self.labels)
+        ):
+            filename = f"{os.path.basename(prefix)}.gallery.{token}.{name}.npy"
+            np.save(os.path.join(directory, filename), np.asarray(array))
+            files[name] = filename
+
+        pointer = prefix + ".gallery.json"
+        previous = _read_pointer(pointer) or {}
+        with open(pointer + ".tmp", 'w') as f:
+            json.dump(files, f)
+        os.replace(pointer + ".tmp", pointer)
+
+        # Keep the previous version for gates that read the old pointer
+        # but haven't opened its files yet, and remove the ones before
+        # it. One still mapped by a gate on Windows can't be deleted yet
+        # and is retried on the next save
+        keep = set(files.values()) | set(previous.values())
+        stale_prefix = f"{os.path.basename(prefix)}.gallery."
+        for filename in os.listdir(directory):
+            if (filename.startswith(stale_prefix) and filename.endswith(".npy")
+                    and filename not in keep):
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, prefix, mmap=True):
+        """Load a saved gallery, or return None if there isn't one"""
+        files = _read_pointer(prefix + ".gallery.json")
+        if not files:
+            return None
+
+        directory = os.path.dirname(prefix)
+        mode = 'r' if mmap else None
+        try:
+            arrays = {
+                name: np.load(os.path.join(directory, filename), mmap_mode=mode)
+                for name, filename in files.items()
+            }
+        except OSError as e:
+            print(f"Error loading face gallery: {e}")
+            return None
+
+        return cls(arrays['histograms'], arrays['labels'])
+
+
+def _read_pointer(path):
+    """Return the gallery's file map, or None if it doesn't exist"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def rank_labels(per_label, label_values, k):
+    """Return the k (label, distance) pairs with the smallest distances"""
+    k = min(k, len(per_label))
+    if k == 0:
+        return []
+    top = np.argpartition(per_label, k - 1)[:k]
+    top = top[np.argsort(per_label[top])]
+    return [(int(label_values[j]), float(per_label[j])) for j in top]
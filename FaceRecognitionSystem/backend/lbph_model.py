@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+from FaceRecognitionSystem.backend.utils import get_face_recognizer
+
+
+def default_lbph_params():
+    """Return the parameters of a freshly created LBPH recognizer"""
+    recognizer = get_face_recognizer()
+    return {
+        'radius': recognizer.getRadius(),
+        'neighbors': recognizer.getNeighbors(),
+        'grid_x': recognizer.getGridX(),
+        'grid_y': recognizer.getGridY(),
+        'threshold': recognizer.getThreshold()
+    }
+
+
+def compute_histograms(faces, params=None):
+    """Compute LBPH spatial histograms exactly as recognizer.train() does
+
+    Returns a (len(faces), bins) float32 matrix.
+    """
+    recognizer = get_face_recognizer()
+    if params:
+        recognizer.setRadius(params['radius'])
+        recognizer.setNeighbors(params['neighbors'])
+        recognizer.setGridX(params['grid_x'])
+        recognizer.setGridY(params['grid_y'])
+
+    # Labels are irrelevant here; training is just the histogram extractor
+    recognizer.train(faces, np.zeros(len(faces), dtype=np.int32))
+    return np.vstack(recognizer.getHistograms())
+
+
+def write_lbph_model(path, histograms, labels, params):
+    """Write histograms and labels in the format LBPHFaceRecognizer.read() expects
+
+    The output is byte-identical to recognizer.save() for the same data.
+    """
+    fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+    try:
+        fs.startWriteStruct('opencv_lbphfaces', cv2.FileNode_MAP)
+        fs.write('threshold', float(params['threshold']))
+        fs.write('radius', int(params['radius']))
+        fs.write('neighbors', int(params['neighbors']))
+        fs.write('grid_x', int(params['grid_x']))
+        fs.write('grid_y', int(params['grid_y']))
+
+        fs.startWriteStruct('histograms', cv2.FileNode_SEQ)
+        for row in histograms:
+            fs.write('', np.asarray(row, dtype=np.float32).reshape(1, -1))
+        fs.endWriteStruct()
+
+        fs.write('labels', np.asarray(labels, dtype=np.int32).reshape(-1, 1))
+
+        fs.startWriteStruct('labelsInfo', cv2.FileNode_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+    finally:
+        fs.release()
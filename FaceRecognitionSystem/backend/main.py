@@ -4,7 +4,7 @@ from FaceRecognitionSystem.frontend.main_ui import MainUI
 from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
 from FaceRecognitionSystem.backend.face_recognition import FaceRecognitionSystem
 from FaceRecognitionSystem.backend.utils import ensure_directories_exist
-from FaceRecognitionSystem.backend.config import DB_CONFIG, DIRECTORIES
+from FaceRecognitionSystem.backend.config import DB_CONFIG, DB_METRICS, DIRECTORIES
 
 
 def main():
@@ -35,5 +35,8 @@ def main():
     # Run the application
     window.mainloop()
 
+    if db.metrics and DB_METRICS.get('dump_file'):
+        db.metrics.dump(DB_METRICS['dump_file'])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
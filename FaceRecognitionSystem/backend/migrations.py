@@ -0,0 +1,708 @@
+"""
+Versioned schema migrations for the face recognition database
+
+Each migration is applied once, in order, and recorded in the
+schema_version table. Version 1 is the original CREATE TABLE IF NOT
+EXISTS schema, so existing databases pick up later migrations without
+losing data. SQLITE_MIGRATIONS builds the same tables and indexes, with
+the same version numbers, for the embedded SQLite backend.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.backend.migrations            # apply pending
+python -m FaceRecognitionSystem.backend.migrations --explain  # check query plans
+python -m FaceRecognitionSystem.backend.migrations --rebuild-counts
+python -m FaceRecognitionSystem.backend.migrations --rebuild-rollups
+"""
+import datetime
+import sqlite3
+
+from mysql.connector import Error
+
+# MySQL errors meaning a step of a half-applied migration already ran
+# (DDL commits implicitly, so a crash can leave one partly applied)
+ALREADY_APPLIED = {
+    1060,  # duplicate column name
+    1061,  # duplicate key name
+}
+
+
+def _initial_schema(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        id_number VARCHAR(20) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gate_access (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS training_log (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        faces_count INT,
+        status VARCHAR(20)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gate_sessions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        users_recognized INT,
+        duration FLOAT
+    )
+    ''')
+
+
+def _history_indexes(cursor):
+    # Combined timestamp for range scans and ordering, kept in sync by
+    # MySQL itself so no writer has to change
+    _run(cursor, '''
+    ALTER TABLE gate_access
+    ADD COLUMN accessed_at DATETIME AS (TIMESTAMP(date, time)) STORED
+    ''')
+    _run(cursor, "CREATE INDEX idx_gate_access_accessed_at ON gate_access (accessed_at)")
+    _run(cursor, "CREATE INDEX idx_gate_access_date_time ON gate_access (date, time)")
+    _run(cursor, "CREATE INDEX idx_gate_access_user_status ON gate_access (user_id, status)")
+
+
+def _duplicate_id_numbers(cursor):
+    """Error message listing duplicate users.id_number values, or None"""
+    cursor.execute('''
+    SELECT id_number, COUNT(*) FROM users
+    GROUP BY id_number HAVING COUNT(*) > 1
+    ''')
+    duplicates = cursor.fetchall()
+    if not duplicates:
+        return None
+    return ("Cannot add unique index on users.id_number, duplicate ID numbers: "
+            + ", ".join(str(row[0]) for row in duplicates))
+
+
+def _unique_id_number(cursor):
+    duplicates = _duplicate_id_numbers(cursor)
+    if duplicates:
+        # Left at the previous version; retried on the next start
+        raise Error(msg=duplicates)
+    _run(cursor, "CREATE UNIQUE INDEX idx_users_id_number ON users (id_number)")
+
+
+# Recomputes every user's granted-access count from the full log
+ACCESS_COUNTS_BACKFILL = '''
+INSERT INTO user_access_counts (user_id, granted_count, last_granted_at)
+SELECT user_id, COUNT(*), MAX(accessed_at)
+FROM gate_access
+WHERE status = 'Granted' AND user_id IS NOT NULL
+GROUP BY user_id
+'''
+
+
+def rollup_backfill(hour):
+    """Statements refilling the rollup tables from gate_access rows dated >= %s
+
+    hour is the engine's SQL expression for the hour of gate_access.time.
+    """
+    return [
+        f'''
+        INSERT INTO access_stats_hourly (date, hour, status, access_count)
+        SELECT date, {hour}, status, COUNT(*)
+        FROM gate_access
+        WHERE date >= %s
+        GROUP BY date, {hour}, status
+        ''',
+        '''
+        INSERT INTO access_stats_daily (date, status, access_count)
+        SELECT date, status, COUNT(*)
+        FROM gate_access
+        WHERE date >= %s
+        GROUP BY date, status
+        ''',
+        '''
+        INSERT INTO user_access_stats_daily (user_id, date, status, access_count)
+        SELECT user_id, date, status, COUNT(*)
+        FROM gate_access
+        WHERE date >= %s AND user_id IN (SELECT id FROM users)
+        GROUP BY user_id, date, status
+        ''',
+    ]
+
+
+ROLLUP_BACKFILL = rollup_backfill("HOUR(time)")
+SQLITE_ROLLUP_BACKFILL = rollup_backfill("CAST(substr(time, 1, 2) AS INTEGER)")
+
+# Rollup tables, emptied before a backfill
+ROLLUP_TABLES = ["access_stats_hourly", "access_stats_daily", "user_access_stats_daily"]
+
+# Earliest MySQL DATE: a backfill from here covers every row
+FIRST_DATE = datetime.date(1000, 1, 1)
+
+
+def _access_counts(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_access_counts (
+        user_id INT PRIMARY KEY,
+        granted_count INT NOT NULL DEFAULT 0,
+        last_granted_at DATETIME NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+    ''')
+    cursor.execute("DELETE FROM user_access_counts")
+    cursor.execute(ACCESS_COUNTS_BACKFILL)
+
+
+def _access_rollups(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS access_stats_hourly (
+        date DATE NOT NULL,
+        hour TINYINT NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        access_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (date, hour, status)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS access_stats_daily (
+        date DATE NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        access_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (date, status)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_access_stats_daily (
+        user_id INT NOT NULL,
+        date DATE NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        access_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date, status),
+        INDEX idx_user_access_stats_date (date),
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+    ''')
+
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    for statement in ROLLUP_BACKFILL:
+        cursor.execute(statement, (FIRST_DATE,))
+
+
+# -------------------------------------------------
+# MONTHLY PARTITIONS AND ARCHIVE
+# -------------------------------------------------
+
+def month_start(day):
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_months(cursor):
+    """Months from the oldest gate_access row (or this month) through next month"""
+    cursor.execute("SELECT MIN(date) FROM gate_access")
+    first = cursor.fetchone()[0]
+    if isinstance(first, str):
+        first = datetime.date.fromisoformat(first)
+
+    today = datetime.date.today()
+    last = add_months(month_start(today), 1)
+    month = month_start(min(first or today, today))
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def mysql_partition(month):
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{add_months(month, 1)}')"
+
+
+def _monthly_partitions(cursor):
+    # Partitioned InnoDB tables can't have foreign keys, and every unique
+    # key must include the partitioning column
+    cursor.execute('''
+    SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+    WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'gate_access'
+    ''')
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE gate_access DROP FOREIGN KEY {name}")
+    cursor.execute("ALTER TABLE gate_access DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)")
+
+    partitions = [mysql_partition(month) for month in _partition_months(cursor)]
+    partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    cursor.execute(
+        "ALTER TABLE gate_access PARTITION BY RANGE COLUMNS(date) (" + ", ".join(partitions) + ")"
+    )
+
+
+def _access_archive(cursor):
+    # One row per month moved out of gate_access into an archive file
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gate_access_archives (
+        month DATE PRIMARY KEY,
+        file VARCHAR(255) NOT NULL,
+        row_count INT NOT NULL,
+        max_id INT NOT NULL,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Granted accesses per user in archived months, for counter rebuilds
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS archived_access_counts (
+        user_id INT NOT NULL,
+        month DATE NOT NULL,
+        granted_count INT NOT NULL,
+        last_granted_at DATETIME NULL,
+        PRIMARY KEY (user_id, month),
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+    ''')
+
+
+# Recomputes every user's granted-access count from the live log plus
+# the totals kept for archived months
+ACCESS_COUNTS_REBUILD = '''
+INSERT INTO user_access_counts (user_id, granted_count, last_granted_at)
+SELECT counts.user_id, SUM(counts.granted_count), MAX(counts.last_granted_at)
+FROM (
+    SELECT user_id, COUNT(*) AS granted_count, MAX(accessed_at) AS last_granted_at
+    FROM gate_access
+    WHERE status = 'Granted' AND user_id IS NOT NULL
+    GROUP BY user_id
+    UNION ALL
+    SELECT user_id, granted_count, last_granted_at
+    FROM archived_access_counts
+) counts
+JOIN users u ON u.id = counts.user_id
+GROUP BY counts.user_id
+'''
+
+
+# -------------------------------------------------
+# NAME SEARCH
+# -------------------------------------------------
+
+def name_ngrams(name):
+    """Search tokens of a user name: the (up to) 3 characters from each position
+
+    A lowercased term of 3 characters or fewer occurs in the name
+    exactly when it is a prefix of one of these, and a longer term only
+    if all of its own trigrams are among them.
+    """
+    name = name.lower()
+    return {name[i:i + 3] for i in range(len(name))}
+
+
+def _backfill_name_ngrams(cursor):
+    cursor.execute("SELECT id, name FROM users")
+    rows = [(gram, user_id) for user_id, name in cursor.fetchall() for gram in name_ngrams(name)]
+    if rows:
+        cursor.executemany("INSERT INTO user_name_ngrams (gram, user_id) VALUES (%s, %s)", rows)
+
+
+def _name_search(cursor):
+    # Binary collation: tokens are lowercased already, and prefix ranges
+    # must compare them as stored
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_name_ngrams (
+        gram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+        user_id INT NOT NULL,
+        PRIMARY KEY (gram, user_id),
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+    ''')
+    cursor.execute("DELETE FROM user_name_ngrams")
+    _backfill_name_ngrams(cursor)
+
+
+# (version, description, function(cursor)) in the order they apply
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "gate_access accessed_at column and history indexes", _history_indexes),
+    (3, "unique users.id_number", _unique_id_number),
+    (4, "per-user granted access counters", _access_counts),
+    (5, "hourly and daily access rollups", _access_rollups),
+    (6, "monthly partitions on gate_access", _monthly_partitions),
+    (7, "gate_access archive tables", _access_archive),
+    (8, "n-gram index on user names", _name_search),
+]
+
+
+# -------------------------------------------------
+# SQLITE
+# -------------------------------------------------
+# SQLite DDL is transactional, so each of these applies completely or
+# not at all and needs no ALREADY_APPLIED handling.
+
+def _sqlite_initial_schema(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(100) NOT NULL,
+        id_number VARCHAR(20) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        registration_date TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gate_access (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        status VARCHAR(20) NOT NULL
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS training_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        faces_count INTEGER,
+        status VARCHAR(20)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gate_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        users_recognized INTEGER,
+        duration FLOAT
+    )
+    ''')
+
+
+def _sqlite_history_indexes(cursor):
+    # Dates and times are stored as 'YYYY-MM-DD' / 'HH:MM:SS' text, so
+    # the concatenation sorts and compares like MySQL's DATETIME
+    cursor.execute('''
+    ALTER TABLE gate_access
+    ADD COLUMN accessed_at DATETIME GENERATED ALWAYS AS (date || ' ' || time) VIRTUAL
+    ''')
+    cursor.execute("CREATE INDEX idx_gate_access_accessed_at ON gate_access (accessed_at)")
+    cursor.execute("CREATE INDEX idx_gate_access_date_time ON gate_access (date, time)")
+    cursor.execute("CREATE INDEX idx_gate_access_user_status ON gate_access (user_id, status)")
+
+
+def _sqlite_unique_id_number(cursor):
+    duplicates = _duplicate_id_numbers(cursor)
+    if duplicates:
+        raise sqlite3.IntegrityError(duplicates)
+    cursor.execute("CREATE UNIQUE INDEX idx_users_id_number ON users (id_number)")
+
+
+def _sqlite_access_counts(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_access_counts (
+        user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+        granted_count INTEGER NOT NULL DEFAULT 0,
+        last_granted_at DATETIME NULL
+    )
+    ''')
+    cursor.execute("DELETE FROM user_access_counts")
+    cursor.execute(ACCESS_COUNTS_BACKFILL)
+
+
+def _sqlite_access_rollups(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS access_stats_hourly (
+        date DATE NOT NULL,
+        hour INTEGER NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        access_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (date, hour, status)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS access_stats_daily (
+        date DATE NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        access_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (date, status)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_access_stats_daily (
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        date DATE NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        access_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date, status)
+    )
+    ''')
+    cursor.execute("CREATE INDEX idx_user_access_stats_date ON user_access_stats_daily (date)")
+
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    for statement in SQLITE_ROLLUP_BACKFILL:
+        cursor.execute(statement, (FIRST_DATE,))
+
+
+def sqlite_partition_table(month):
+    """Table holding one month of gate_access; None for the catch-all"""
+    return "gate_access_pmax" if month is None else f"gate_access_p{month:%Y%m}"
+
+
+def create_sqlite_partition(cursor, month):
+    table = sqlite_partition_table(month)
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        accessed_at DATETIME GENERATED ALWAYS AS (date || ' ' || time) VIRTUAL
+    )
+    ''')
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed_at ON {table} (accessed_at)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date_time ON {table} (date, time)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_status ON {table} (user_id, status)")
+
+
+def rebuild_sqlite_partition_view(cursor, months):
+    """Recreate the gate_access view and insert trigger over the month tables
+
+    Reads see one UNION ALL of every month table plus gate_access_pmax.
+    An insert takes the next id from gate_access_seq and lands in the
+    table for its month: the first one also takes anything older, and
+    gate_access_pmax anything past the last month, like MySQL's range
+    partitions.
+    """
+    months = sorted(months)
+    tables = [sqlite_partition_table(month) for month in months] + [sqlite_partition_table(None)]
+
+    # Dropping the view drops its trigger too
+    cursor.execute("DROP VIEW IF EXISTS gate_access")
+    cursor.execute("CREATE VIEW gate_access AS " + " UNION ALL ".join(
+        f"SELECT id, user_id, date, time, status, accessed_at FROM {table}" for table in tables
+    ))
+
+    routes = []
+    for i, table in enumerate(tables):
+        conditions = []
+        if i > 0:
+            conditions.append(f"NEW.date >= '{add_months(months[i - 1], 1)}'")
+        if i < len(months):
+            conditions.append(f"NEW.date < '{add_months(months[i], 1)}'")
+        routes.append(f'''
+        INSERT INTO {table} (id, user_id, date, time, status)
+        SELECT (SELECT id FROM gate_access_seq), NEW.user_id, NEW.date, NEW.time, NEW.status
+        WHERE {" AND ".join(conditions) or "1"};''')
+
+    cursor.execute(
+        "CREATE TRIGGER gate_access_insert INSTEAD OF INSERT ON gate_access BEGIN "
+        "UPDATE gate_access_seq SET id = id + 1;" + "".join(routes) + " END"
+    )
+
+
+def _sqlite_monthly_partitions(cursor):
+    months = _partition_months(cursor)
+
+    # Ids stay unique across the month tables, continuing from the last
+    # one AUTOINCREMENT handed out
+    cursor.execute("CREATE TABLE gate_access_seq (id INTEGER NOT NULL)")
+    cursor.execute('''
+    INSERT INTO gate_access_seq
+    SELECT MAX(COALESCE((SELECT MAX(id) FROM gate_access), 0),
+               COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'gate_access'), 0))
+    ''')
+
+    for month in months + [None]:
+        create_sqlite_partition(cursor, month)
+    for i, month in enumerate(months):
+        lower = f"date >= '{month}' AND " if i > 0 else ""
+        cursor.execute(f'''
+        INSERT INTO {sqlite_partition_table(month)} (id, user_id, date, time, status)
+        SELECT id, user_id, date, time, status FROM gate_access
+        WHERE {lower}date < '{add_months(month, 1)}'
+        ''')
+    cursor.execute(f'''
+    INSERT INTO gate_access_pmax (id, user_id, date, time, status)
+    SELECT id, user_id, date, time, status FROM gate_access
+    WHERE date >= '{add_months(months[-1], 1)}'
+    ''')
+
+    cursor.execute("DROP TABLE gate_access")
+    rebuild_sqlite_partition_view(cursor, months)
+
+
+def _sqlite_access_archive(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gate_access_archives (
+        month DATE PRIMARY KEY,
+        file VARCHAR(255) NOT NULL,
+        row_count INTEGER NOT NULL,
+        max_id INTEGER NOT NULL,
+        archived_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS archived_access_counts (
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        month DATE NOT NULL,
+        granted_count INTEGER NOT NULL,
+        last_granted_at DATETIME NULL,
+        PRIMARY KEY (user_id, month)
+    )
+    ''')
+
+
+def _sqlite_name_search(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_name_ngrams (
+        gram VARCHAR(3) NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        PRIMARY KEY (gram, user_id)
+    ) WITHOUT ROWID
+    ''')
+    _backfill_name_ngrams(cursor)
+
+
+SQLITE_MIGRATIONS = [
+    (1, "initial schema", _sqlite_initial_schema),
+    (2, "gate_access accessed_at column and history indexes", _sqlite_history_indexes),
+    (3, "unique users.id_number", _sqlite_unique_id_number),
+    (4, "per-user granted access counters", _sqlite_access_counts),
+    (5, "hourly and daily access rollups", _sqlite_access_rollups),
+    (6, "monthly partitions on gate_access", _sqlite_monthly_partitions),
+    (7, "gate_access archive tables", _sqlite_access_archive),
+    (8, "n-gram index on user names", _sqlite_name_search),
+]
+
+
+def _run(cursor, statement):
+    """Execute one DDL statement, skipping it if it was already applied"""
+    try:
+        cursor.execute(statement)
+    except Error as e:
+        if e.errno not in ALREADY_APPLIED:
+            raise
+
+
+def current_version(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        description VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate(backend):
+    """Apply every pending migration of a storage backend; returns the versions applied"""
+    applied = []
+
+    with backend.connection() as conn:
+        cursor = backend.cursor(conn)
+        version = current_version(cursor)
+
+        for number, description, apply in backend.migrations:
+            if number <= version:
+                continue
+
+            with backend.transaction(conn):
+                apply(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (number, description)
+                )
+            applied.append(number)
+            print(f"Applied migration {number}: {description}")
+
+    return applied
+
+
+# -------------------------------------------------
+# QUERY PLAN CHECK
+# -------------------------------------------------
+
+def explain_queries(db):
+    """Explain the hot history/lookup queries against the live schema.
+
+    Returns a list of (name, problems, plan) where problems lists any
+    table access that is a full scan or needs a sort. Run it on a
+    populated database: on near-empty tables MySQL rightly prefers a
+    scan.
+    """
+    backend = db.backend
+    today = datetime.date.today()
+    week_ago = today - datetime.timedelta(days=7)
+
+    queries = [
+        ("history, date range", backend.filtered_access_query(week_ago, today)),
+        ("history, date range + status",
+         backend.filtered_access_query(week_ago, today, status="Granted")),
+        ("history, single day", backend.all_access_query(today)),
+        ("access count", (
+            "SELECT granted_count FROM user_access_counts WHERE user_id = %s", [1]
+        )),
+        ("id_number lookup", ("SELECT id FROM users WHERE id_number = %s", ["0"])),
+        ("user search, short term", backend.user_search_query("ab")),
+        ("user search, long term", backend.user_search_query("smith")),
+    ]
+
+    results = []
+    for name, (query, params) in queries:
+        problems, plan = backend.explain(query, params)
+        results.append((name, problems, plan))
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    from FaceRecognitionSystem.backend.config import DB_CONFIG
+    from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
+
+    # Constructing the DB object applies pending migrations
+    db = FaceRecognitionDB(**DB_CONFIG)
+
+    if "--explain" in sys.argv:
+        failed = False
+        for name, problems, plan in explain_queries(db):
+            print(f"{'OK ' if not problems else 'BAD'} {name}: "
+                  + (", ".join(problems) if problems else "uses indexes"))
+            for line in plan:
+                print(f"      {line}")
+            failed = failed or bool(problems)
+        sys.exit(1 if failed else 0)
+
+    if "--rebuild-counts" in sys.argv:
+        users = db.rebuild_access_counts()
+        print(f"Rebuilt access counts for {users} users")
+
+    if "--rebuild-rollups" in sys.argv:
+        days = db.rebuild_rollups()
+        print(f"Rebuilt access rollups for {days} days")
+
+    db.close()
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+from FaceRecognitionSystem.backend.ann_index import IVFIndex
+from FaceRecognitionSystem.backend.gallery import FaceGallery
+from FaceRecognitionSystem.backend.utils import get_face_recognizer
+
+ActiveModel = namedtuple("ActiveModel", ["recognizer", "gallery", "index"])
+
+
+class RecognizerHolder:
+    """Keep the Haar cascade and trained LBPH model resident between calls.
+
+    The model is double-buffered: a newly trained ``Trainner.yml`` is read
+    into a standby recognizer while the active one keeps serving, and the
+    two are swapped with a single reference assignment once loading has
+    finished. Callers therefore never see a half-loaded model.
+
+    With use_gallery=True the vectorized FaceGallery saved alongside the
+    model is loaded (memory-mapped) and swapped together with it, as is
+    the IVF index when use_ann=True.
+    """
+
+    def __init__(self, training_file, cascade_path, reload_interval=2.0,
+                 use_gallery=False, use_ann=False, ann_nprobe=8):
+        self.training_file = training_file
+        self.cascade_path = cascade_path
+        self.reload_interval = reload_interval
+        self.use_gallery = use_gallery
+        self.use_ann = use_ann
+        self.ann_nprobe = ann_nprobe
+
+        self._cascade = None
+        self._active = ActiveModel(None, None, None)
+        self._signature = None
+        self._last_check = None
+        self.version = 0
+
+        self._swap_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    # -------------------------------------------------
+    # HAAR CASCADE
+    # -------------------------------------------------
+
+    @property
+    def cascade(self):
+        """Return the shared cascade classifier, loading it on first use"""
+        if self._cascade is None:
+            with self._swap_lock:
+                if self._cascade is None:
+                    cascade = cv2.CascadeClassifier(self.cascade_path)
+                    if cascade.empty():
+                        raise Exception(
+                            f"Haar cascade not loaded: {self.cascade_path}"
+                        )
+                    self._cascade = cascade
+        return self._cascade
+
+    # -------------------------------------------------
+    # LBPH MODEL
+    # -------------------------------------------------
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.training_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def active(self):
+        """Return the active ActiveModel(recognizer, gallery, index).
+
+        recognizer is None if no model is trained; gallery and index are
+        None if disabled or not saved with the model.
+        """
+        now = time.monotonic()
+        if self._last_check is None or now - self._last_check >= self.reload_interval:
+            self._last_check = now
+            if self._file_signature() != self._signature:
+                self.reload()
+        return self._active
+
+    def recognizer(self):
+        """Return the active recognizer, or None if no model is trained"""
+        return self.active()[0]
+
+    def reload(self, force=False):
+        """Load the trainer file into a standby recognizer and swap it in.
+
+        Returns True if a new model was swapped in. Only one thread loads at
+        a time; concurrent callers keep using the current model.
+        """
+        if not self._load_lock.acquire(blocking=force):
+            return False
+
+        try:
+            signature = self._file_signature()
+            if signature is None:
+                return False
+            if signature == self._signature and not force:
+                return False
+
+            standby = get_face_recognizer()
+            try:
+                standby.read(self.training_file)
+            except cv2.error as e:
+                print(f"Error loading trained model: {e}")
+                return False
+
+            # Saved before the trainer file, so they belong to this model
+            prefix = os.path.splitext(self.training_file)[0]
+            gallery = index = None
+            if self.use_gallery:
+                gallery = FaceGallery.load(prefix)
+            if gallery is not None and self.use_ann:
+                index = IVFIndex.load(prefix, self.ann_nprobe)
+
+            # The file changed while it was being read; try again later
+            if self._file_signature() != signature:
+                return False
+
+            with self._swap_lock:
+                self._active = ActiveModel(standby, gallery, index)
+                self._signature = signature
+                self.version += 1
+            return True
+
+        finally:
+            self._load_lock.release()
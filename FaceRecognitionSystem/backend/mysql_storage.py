@@ -0,0 +1,180 @@
+import datetime
+from contextlib import contextmanager
+
+import mysql.connector
+
+from FaceRecognitionSystem.backend.db_pool import ConnectionPool
+from FaceRecognitionSystem.backend.migrations import (
+    MIGRATIONS,
+    ROLLUP_BACKFILL,
+    add_months,
+    migrate,
+    mysql_partition
+)
+from FaceRecognitionSystem.backend.storage import StorageBackend
+
+# Adds granted accesses to a user's counter: (user_id, count, latest DATETIME)
+GRANTED_COUNT_UPSERT = """
+    INSERT INTO user_access_counts (user_id, granted_count, last_granted_at)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        granted_count = granted_count + VALUES(granted_count),
+        last_granted_at = GREATEST(
+            COALESCE(last_granted_at, VALUES(last_granted_at)),
+            VALUES(last_granted_at)
+        )
+"""
+
+
+class MySQLStorage(StorageBackend):
+    """MySQL server backend; connections come from a ConnectionPool"""
+
+    name = 'mysql'
+    migrations = MIGRATIONS
+    rollup_backfill = ROLLUP_BACKFILL
+    granted_count_upsert = GRANTED_COUNT_UPSERT
+
+    def __init__(self, host, user, password, database, pool_size=5, pool_timeout=10,
+                 pool_health_check_interval=30):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+        self.pool = ConnectionPool(
+            {'host': host, 'user': user, 'password': password, 'database': database},
+            size=pool_size,
+            timeout=pool_timeout,
+            health_check_interval=pool_health_check_interval
+        )
+
+    def initialize(self):
+        conn = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password
+        )
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+        conn.close()
+
+        # Schema changes are versioned in migrations.py
+        migrate(self)
+        self.ensure_partitions()
+
+    def connect(self):
+        """Standalone (unpooled) connection"""
+        return mysql.connector.connect(**self.pool.connect_args)
+
+    def connection(self):
+        return self.pool.connection()
+
+    def cursor(self, conn, dictionary=False):
+        return conn.cursor(dictionary=dictionary)
+
+    @contextmanager
+    def transaction(self, conn):
+        conn.start_transaction()
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def increment_sql(self, table, keys):
+        return (
+            f"INSERT INTO {table} ({', '.join(keys)}, access_count) "
+            f"VALUES ({', '.join(['%s'] * (len(keys) + 1))}) "
+            "ON DUPLICATE KEY UPDATE access_count = access_count + VALUES(access_count)"
+        )
+
+    def stream(self, query, params, batch_size):
+        """Read from an unbuffered cursor on a dedicated connection
+
+        Memory stays bounded however many rows match, and the caller can
+        make other DB calls while iterating.
+        """
+        conn = self.connect()
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params)
+
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            # Closing discards any rows a stopped consumer didn't read
+            conn.close()
+
+    def explain(self, query, params):
+        with self.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("EXPLAIN " + query, params)
+            plan = cursor.fetchall()
+            cursor.close()
+
+        problems = []
+        lines = []
+        for row in plan:
+            if row['type'] == 'ALL':
+                problems.append(f"full scan of {row['table']}")
+            if 'filesort' in (row.get('Extra') or ''):
+                problems.append(f"filesort on {row['table']}")
+            lines.append(f"{row['table']}: type={row['type']} key={row['key']} "
+                         f"rows={row['rows']} {row.get('Extra') or ''}")
+        return problems, lines
+
+    def partition_months(self):
+        rows = self._fetch_all('''
+            SELECT PARTITION_NAME as name FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'gate_access'
+            AND PARTITION_NAME LIKE 'p______'
+        ''', [])
+        return sorted(datetime.datetime.strptime(row['name'], "p%Y%m").date() for row in rows)
+
+    def add_partitions(self, until):
+        months = self.partition_months()
+        month = add_months(months[-1], 1)
+        partitions = []
+        while month <= until:
+            partitions.append(mysql_partition(month))
+            month = add_months(month, 1)
+        if not partitions:
+            return
+
+        # Rows pmax already holds for the new months move with the split
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "ALTER TABLE gate_access REORGANIZE PARTITION pmax INTO ("
+                + ", ".join(partitions) + ", PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+            )
+
+    def delete_archived_batch(self, month, max_id, batch_size):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM gate_access WHERE date >= %s AND date < %s AND id <= %s "
+                "ORDER BY id LIMIT %s",
+                (month, add_months(month, 1), max_id, batch_size)
+            )
+            return cursor.rowcount
+
+    def drop_partition(self, month):
+        months = self.partition_months()
+        if month not in months or len(months) == 1:
+            return False
+
+        partition = f"p{month:%Y%m}"
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM gate_access PARTITION ({partition}) LIMIT 1")
+            if cursor.fetchall():
+                return False
+            cursor.execute(f"ALTER TABLE gate_access DROP PARTITION {partition}")
+        return True
+
+    def close(self):
+        self.pool.close()
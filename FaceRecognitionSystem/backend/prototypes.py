@@ -0,0 +1,146 @@
+"""
+Per-user prototype compression for trained LBPH models
+
+Capture takes samples_per_face crops ~100 ms apart, so most of a user's
+histograms are near-duplicates. compact_histograms() drops those and
+clusters what is left into at most k medoids per user, so prediction
+cost and model size scale with users rather than samples. Medoids are
+real training histograms, so the compacted model is still a valid LBPH
+model and distances keep the same scale as before.
+"""
+import time
+
+import numpy as np
+
+from FaceRecognitionSystem.backend.gallery import FaceGallery
+
+
+def pairwise_distances(histograms):
+    """LBPH chi-square distance between every pair of histograms"""
+    histograms = np.asarray(histograms, dtype=np.float32)
+    gallery = FaceGallery(histograms, np.zeros(len(histograms), dtype=np.int32))
+    return gallery.distances(histograms)
+
+
+def drop_duplicates(distances, threshold):
+    """Greedily keep samples further than threshold from every kept sample"""
+    kept = []
+    for i in range(len(distances)):
+        if not kept or distances[i, kept].min() > threshold:
+            kept.append(i)
+    return np.array(kept, dtype=np.intp)
+
+
+def k_medoids(distances, k, iterations=20):
+    """Cluster a precomputed distance matrix into k medoids.
+
+    Starts from the most central sample and adds the sample furthest from
+    the chosen ones (covering pose/lighting spread), then alternates
+    assignment and medoid update until stable. Returns sorted indices.
+    """
+    n = len(distances)
+    if n <= k:
+        return np.arange(n)
+
+    medoids = [int(np.argmin(distances.sum(axis=1)))]
+    while len(medoids) < k:
+        nearest = distances[:, medoids].min(axis=1)
+        medoids.append(int(np.argmax(nearest)))
+    medoids = np.array(medoids)
+
+    for _ in range(iterations):
+        assignment = np.argmin(distances[:, medoids], axis=1)
+        updated = medoids.copy()
+
+        for cluster in range(k):
+            members = np.flatnonzero(assignment == cluster)
+            if len(members):
+                cost = distances[np.ix_(members, members)].sum(axis=1)
+                updated[cluster] = members[np.argmin(cost)]
+
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+
+    return np.sort(np.unique(medoids))
+
+
+def compact_histograms(histograms, labels, prototypes_per_user, duplicate_distance=0.0):
+    """Reduce each user's histograms to at most prototypes_per_user medoids.
+
+    Users already at or below the limit (e.g. compacted by an earlier
+    run) are kept as they are, so repeated calls after incremental
+    updates only do work for newly added users.
+
+    Returns (histograms, labels) with rows grouped by label.
+    """
+    histograms = np.asarray(histograms, dtype=np.float32)
+    labels = np.asarray(labels, dtype=np.int32)
+
+    # Group rows by label in one sort rather than a scan per user
+    order = np.argsort(labels, kind="stable")
+    _, starts = np.unique(labels[order], return_index=True)
+
+    keep = []
+    for rows in np.split(order, starts[1:]):
+        if len(rows) <= prototypes_per_user:
+            keep.append(rows)
+            continue
+
+        distances = pairwise_distances(histograms[rows])
+        if duplicate_distance > 0:
+            distinct = drop_duplicates(distances, duplicate_distance)
+            rows = rows[distinct]
+            distances = distances[np.ix_(distinct, distinct)]
+
+        keep.append(rows[k_medoids(distances, prototypes_per_user)])
+
+    keep = np.concatenate(keep) if keep else np.empty(0, dtype=np.intp)
+    return histograms[keep], labels[keep]
+
+
+def evaluate_compaction(histograms, labels, prototypes_per_user,
+                        duplicate_distance=0.0, holdout=0.2, seed=0):
+    """Compare the full and compacted models on a held-out split.
+
+    A holdout fraction of every user's samples is kept aside as probes;
+    the rest is the training set that gets compacted. Returns a dict with
+    model size, top-1 accuracy and mean per-probe match latency for both.
+    """
+    histograms = np.asarray(histograms, dtype=np.float32)
+    labels = np.asarray(labels, dtype=np.int32)
+    rng = np.random.default_rng(seed)
+
+    probe_rows, train_rows = [], []
+    for label in np.unique(labels):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        n_probe = int(len(rows) * holdout)
+        probe_rows.extend(rows[:n_probe])
+        train_rows.extend(rows[n_probe:])
+
+    probes, probe_labels = histograms[probe_rows], labels[probe_rows]
+    train, train_labels = histograms[train_rows], labels[train_rows]
+    compact, compact_labels = compact_histograms(
+        train, train_labels, prototypes_per_user, duplicate_distance
+    )
+
+    report = {}
+    for name, (h, l) in (("full", (train, train_labels)),
+                         ("compacted", (compact, compact_labels))):
+        gallery = FaceGallery.build(h, l)
+
+        start = time.perf_counter()
+        results = gallery.search(probes, k=1)
+        elapsed = time.perf_counter() - start
+
+        predicted = np.array([r[0][0] for r in results])
+        report[name] = {
+            "histograms": len(h),
+            "bytes": int(h.nbytes),
+            "accuracy": float(np.mean(predicted == probe_labels)) if len(probes) else 0.0,
+            "ms_per_probe": 1000 * elapsed / max(1, len(probes))
+        }
+
+    report["size_reduction"] = 1 - report["compacted"]["bytes"] / max(1, report["full"]["bytes"])
+    report["probes"] = len(probes)
+    return report
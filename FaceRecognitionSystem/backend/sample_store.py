@@ -0,0 +1,334 @@
+"""
+Packed face sample store
+
+All training crops live in one memory-mappable uint8 array
+(samples.npy, shape capacity x crop_size x crop_size) with a parallel
+int32 label array (labels.npy). index.json records how many rows are in
+use and which row ranges belong to which user. Capacity grows by
+doubling, so appends are amortised O(new samples), and readers get
+zero-copy memmap views instead of decoding thousands of JPEGs.
+
+Removing users renumbers rows, so it never rewrites the arrays in
+place: the compacted arrays go to files of the next generation
+(samples.<generation>.npy) and index.json is switched to them last.
+Readers still on the previous generation keep working; its files are
+only deleted by the compaction after that.
+
+Migrate an existing CapturedFaces folder with:
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.backend.sample_store
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from FaceRecognitionSystem.backend.utils import get_images_and_labels, normalize_face
+
+INITIAL_CAPACITY = 1024
+
+
+class SampleStore:
+    def __init__(self, path, crop_size=100):
+        self.path = path
+        self.crop_size = crop_size
+
+        self.index_file = os.path.join(path, "index.json")
+
+        self.count = 0
+        self.generation = 0
+        self.users = {}
+        self.samples_file, self.labels_file = self._array_files(0)
+
+        self._samples = None
+        self._labels = None
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        self._load_index()
+
+    # -------------------------------------------------
+    # INDEX
+    # -------------------------------------------------
+
+    def refresh(self):
+        """Re-read the index, picking up appends made by other processes"""
+        with self._lock:
+            self._close_arrays()
+            self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return
+
+        with open(self.index_file, 'r') as f:
+            index = json.load(f)
+
+        if index['crop_size'] != self.crop_size:
+            raise Exception(
+                f"Sample store uses {index['crop_size']}px crops, "
+                f"config asks for {self.crop_size}px"
+            )
+
+        self.count = index['count']
+        self.generation = index.get('generation', 0)
+        self.users = {int(k): v for k, v in index['users'].items()}
+        self.samples_file, self.labels_file = self._array_files(self.generation)
+
+    def _save_index(self):
+        index = {
+            'crop_size': self.crop_size,
+            'count': self.count,
+            'generation': self.generation,
+            'users': {str(k): v for k, v in self.users.items()}
+        }
+
+        # Rows beyond 'count' are ignored, so the index is the commit point
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_file, self.index_file)
+
+    # -------------------------------------------------
+    # STORAGE ARRAYS
+    # -------------------------------------------------
+
+    def _array_files(self, generation):
+        """Return the (samples, labels) files of a generation"""
+        suffix = ".npy" if generation == 0 else f".{generation}.npy"
+        return (
+            os.path.join(self.path, "samples" + suffix),
+            os.path.join(self.path, "labels" + suffix)
+        )
+
+    def _remove_stale_arrays(self):
+        """Delete array files older than the previous generation"""
+        for filename in os.listdir(self.path):
+            parts = filename.split(".")
+            if parts[0] not in ("samples", "labels") or parts[-1] != "npy":
+                continue
+            try:
+                generation = int(parts[1]) if len(parts) == 3 else 0
+            except ValueError:
+                continue
+            if generation < self.generation - 1:
+                # One still mapped on Windows is retried next time
+                try:
+                    os.remove(os.path.join(self.path, filename))
+                except OSError:
+                    pass
+
+    def _open_arrays(self, mode='r+'):
+        if self._samples is None and os.path.exists(self.samples_file):
+            self._samples = np.load(self.samples_file, mmap_mode=mode)
+            self._labels = np.load(self.labels_file, mmap_mode=mode)
+        return self._samples, self._labels
+
+    def _close_arrays(self):
+        for array in (self._samples, self._labels):
+            if array is not None and hasattr(array, 'flush'):
+                array.flush()
+        self._samples = None
+        self._labels = None
+
+    def _capacity(self):
+        samples, _ = self._open_arrays()
+        return 0 if samples is None else samples.shape[0]
+
+    def _reserve(self, rows):
+        """Grow the backing files (by doubling) to hold at least rows"""
+        capacity = self._capacity()
+        if capacity >= rows:
+            return
+
+        new_capacity = max(INITIAL_CAPACITY, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+
+        size = self.crop_size
+        samples = np.lib.format.open_memmap(
+            self.samples_file + ".tmp", mode='w+',
+            dtype=np.uint8, shape=(new_capacity, size, size)
+        )
+        labels = np.lib.format.open_memmap(
+            self.labels_file + ".tmp", mode='w+',
+            dtype=np.int32, shape=(new_capacity,)
+        )
+
+        old_samples, old_labels = self._open_arrays()
+        if old_samples is not None:
+            samples[:self.count] = old_samples[:self.count]
+            labels[:self.count] = old_labels[:self.count]
+        samples.flush()
+        labels.flush()
+        del samples, labels
+
+        # Release our maps first; Windows refuses to replace mapped files
+        self._close_arrays()
+        os.replace(self.samples_file + ".tmp", self.samples_file)
+        os.replace(self.labels_file + ".tmp", self.labels_file)
+
+    # -------------------------------------------------
+    # PUBLIC API
+    # -------------------------------------------------
+
+    def append(self, user_id, name, crops, replace=False):
+        """Normalize and append face crops for a user.
+
+        replace=True drops the user's existing samples first (e.g. on
+        re-registration). Returns the number of samples appended.
+        """
+        crops = [normalize_face(c, self.crop_size) for c in crops]
+        if not crops:
+            return 0
+
+        with self._lock:
+            if replace and user_id in self.users:
+                self._remove_users({user_id})
+
+            start = self.count
+            self._reserve(start + len(crops))
+            samples, labels = self._open_arrays()
+
+            samples[start:start + len(crops)] = np.stack(crops)
+            labels[start:start + len(crops)] = user_id
+            samples.flush()
+            labels.flush()
+
+            user = self.users.setdefault(user_id, {'name': name, 'ranges': []})
+            user['name'] = name
+            ranges = user['ranges']
+            if ranges and ranges[-1][0] + ranges[-1][1] == start:
+                ranges[-1][1] += len(crops)
+            else:
+                ranges.append([start, len(crops)])
+
+            self.count += len(crops)
+            self._save_index()
+
+        return len(crops)
+
+    def remove_user(self, user_id):
+        """Drop all samples of a user, compacting the store"""
+        with self._lock:
+            if user_id not in self.users:
+                return False
+            self._remove_users({user_id})
+        return True
+
+    def _remove_users(self, user_ids):
+        """Compact the store without the given users, as a new generation"""
+        old_samples, old_labels = self._open_arrays()
+        generation = self.generation + 1
+        samples_file, labels_file = self._array_files(generation)
+
+        size = self.crop_size
+        capacity = old_samples.shape[0]
+        samples = np.lib.format.open_memmap(
+            samples_file, mode='w+', dtype=np.uint8, shape=(capacity, size, size)
+        )
+        labels = np.lib.format.open_memmap(
+            labels_file, mode='w+', dtype=np.int32, shape=(capacity,)
+        )
+
+        # Copy surviving rows in chunks so memory stays bounded
+        remove = list(user_ids)
+        write = 0
+        for start in range(0, self.count, INITIAL_CAPACITY):
+            stop = min(start + INITIAL_CAPACITY, self.count)
+            mask = ~np.isin(old_labels[start:stop], remove)
+            kept = int(mask.sum())
+            samples[write:write + kept] = old_samples[start:stop][mask]
+            labels[write:write + kept] = old_labels[start:stop][mask]
+            write += kept
+        samples.flush()
+        labels.flush()
+
+        names = {uid: user['name'] for uid, user in self.users.items()}
+        users = {}
+        for row, user_id in enumerate(labels[:write].tolist()):
+            user = users.setdefault(
+                user_id, {'name': names.get(user_id), 'ranges': []}
+            )
+            ranges = user['ranges']
+            if ranges and ranges[-1][0] + ranges[-1][1] == row:
+                ranges[-1][1] += 1
+            else:
+                ranges.append([row, 1])
+        del samples, labels
+
+        # Switch to the new files; rows now mean something else, so any
+        # model built on the previous generation is stale
+        self._close_arrays()
+        self.samples_file, self.labels_file = samples_file, labels_file
+        self.count = write
+        self.users = users
+        self.generation = generation
+        self._save_index()
+        self._remove_stale_arrays()
+
+    def samples(self, start=0, stop=None):
+        """Zero-copy read-only view of crops[start:stop]"""
+        stop = self.count if stop is None else min(stop, self.count)
+        samples, _ = self._open_arrays()
+        if samples is None:
+            return np.empty((0, self.crop_size, self.crop_size), dtype=np.uint8)
+        view = samples[start:stop]
+        view.flags.writeable = False
+        return view
+
+    def labels(self, start=0, stop=None):
+        """Zero-copy read-only view of labels[start:stop]"""
+        stop = self.count if stop is None else min(stop, self.count)
+        _, labels = self._open_arrays()
+        if labels is None:
+            return np.empty(0, dtype=np.int32)
+        view = labels[start:stop]
+        view.flags.writeable = False
+        return view
+
+    def user_rows(self, user_id):
+        """Return the (offset, count) ranges holding a user's samples"""
+        user = self.users.get(user_id)
+        return [tuple(r) for r in user['ranges']] if user else []
+
+
+def import_captured_faces(source_dir, store):
+    """Import a legacy CapturedFaces folder (name.id.n.jpg) into a store
+
+    Returns the number of samples imported.
+    """
+    filenames = sorted(f for f in os.listdir(source_dir) if f.endswith('.jpg'))
+
+    by_user = OrderedDict()
+    for filename in filenames:
+        parts = filename.split(".")
+        try:
+            user_id = int(parts[1])
+        except (IndexError, ValueError):
+            print(f"Skipping unrecognised sample name: {filename}")
+            continue
+        by_user.setdefault(user_id, (parts[0], []))[1].append(filename)
+
+    imported = 0
+    for user_id, (name, user_files) in by_user.items():
+        faces, _ = get_images_and_labels(source_dir, user_files)
+        imported += store.append(user_id, name, faces, replace=True)
+        print(f"Imported {len(faces)} samples for {name} ({user_id})")
+
+    return imported
+
+
+if __name__ == "__main__":
+    from FaceRecognitionSystem.backend.config import FACE_RECOGNITION
+
+    source = os.path.dirname(FACE_RECOGNITION['training_file'])
+    store = SampleStore(
+        FACE_RECOGNITION['sample_store'],
+        FACE_RECOGNITION['crop_size']
+    )
+    total = import_captured_faces(source, store)
+    print(f"Imported {total} samples from {source} into {store.path}")
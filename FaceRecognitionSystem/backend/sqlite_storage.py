@@ -0,0 +1,297 @@
+import datetime
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from FaceRecognitionSystem.backend.migrations import (
+    SQLITE_MIGRATIONS,
+    SQLITE_ROLLUP_BACKFILL,
+    add_months,
+    create_sqlite_partition,
+    migrate,
+    rebuild_sqlite_partition_view,
+    sqlite_partition_table
+)
+from FaceRecognitionSystem.backend.storage import StorageBackend
+
+# Adds granted accesses to a user's counter: (user_id, count, latest DATETIME)
+GRANTED_COUNT_UPSERT = """
+    INSERT INTO user_access_counts (user_id, granted_count, last_granted_at)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (user_id) DO UPDATE SET
+        granted_count = granted_count + excluded.granted_count,
+        last_granted_at = MAX(
+            COALESCE(last_granted_at, excluded.last_granted_at),
+            excluded.last_granted_at
+        )
+"""
+
+
+# -------------------------------------------------
+# TYPE CONVERSION
+# -------------------------------------------------
+# Values are stored as 'YYYY-MM-DD' / 'HH:MM:SS' / 'YYYY-MM-DD HH:MM:SS'
+# text and read back as the types mysql.connector returns for DATE,
+# TIME (a timedelta) and DATETIME/TIMESTAMP columns.
+
+def _to_sql(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, datetime.time):
+        return value.strftime("%H:%M:%S")
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return value
+
+
+def _parse_time(text):
+    hours, minutes, seconds = text.decode().split(":")
+    return datetime.timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+sqlite3.register_converter("DATE", lambda text: datetime.date.fromisoformat(text.decode()))
+sqlite3.register_converter("TIME", _parse_time)
+sqlite3.register_converter("DATETIME", lambda text: datetime.datetime.fromisoformat(text.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda text: datetime.datetime.fromisoformat(text.decode()))
+
+
+class SQLiteCursor:
+    """sqlite3 cursor taking %s placeholders, like mysql.connector's"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self.dictionary = dictionary
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace("%s", "?"), [_to_sql(v) for v in params])
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(
+            query.replace("%s", "?"), ([_to_sql(v) for v in row] for row in rows)
+        )
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteStorage(StorageBackend):
+    """Embedded SQLite backend for single-box gates
+
+    Each thread gets its own connection to the database file. The file
+    runs in WAL mode, so the history UI can read while the event
+    recorder writes; a writer waits up to timeout seconds for another.
+    """
+
+    name = 'sqlite'
+    migrations = SQLITE_MIGRATIONS
+    rollup_backfill = SQLITE_ROLLUP_BACKFILL
+    granted_count_upsert = GRANTED_COUNT_UPSERT
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self.connection() as conn:
+            # Persistent: stored in the database file
+            conn.execute("PRAGMA journal_mode = WAL")
+        migrate(self)
+        self.ensure_partitions()
+
+    def connect(self):
+        """Standalone connection, in autocommit mode like the MySQL ones"""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = self._local.connection = self.connect()
+            with self._lock:
+                self._connections.append(conn)
+        try:
+            yield conn
+        finally:
+            # Leave no half-finished explicit transaction behind
+            if conn.in_transaction:
+                conn.rollback()
+
+    def cursor(self, conn, dictionary=False):
+        return SQLiteCursor(conn.cursor(), dictionary)
+
+    @contextmanager
+    def transaction(self, conn):
+        # IMMEDIATE takes the write lock up front, so two writers queue on
+        # busy timeout instead of one failing to upgrade its read lock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.execute("COMMIT")
+
+    def increment_sql(self, table, keys):
+        return (
+            f"INSERT INTO {table} ({', '.join(keys)}, access_count) "
+            f"VALUES ({', '.join(['%s'] * (len(keys) + 1))}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+            "access_count = access_count + excluded.access_count"
+        )
+
+    def stream(self, query, params, batch_size):
+        """Read through a dedicated connection, batch_size rows at a time
+
+        sqlite3 cursors step through the result lazily, so memory stays
+        bounded; WAL gives the stream a consistent snapshot while other
+        threads keep writing.
+        """
+        conn = self.connect()
+        try:
+            cursor = SQLiteCursor(conn.cursor(), dictionary=True)
+            cursor.execute(query, params)
+
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            conn.close()
+
+    def explain(self, query, params):
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            plan = [row[3] for row in cursor.fetchall()]
+
+        problems = []
+        for detail in plan:
+            # "SCAN ga USING INDEX ..." walks an index in order; a bare
+            # "SCAN ga" reads the whole table
+            if detail.startswith("SCAN ") and " USING " not in detail:
+                problems.append(f"full scan of {detail.split()[1]}")
+            if detail.startswith("USE TEMP B-TREE"):
+                problems.append(detail.lower())
+        return problems, plan
+
+    def partition_months(self):
+        with self.connection() as conn:
+            return self._partition_months(self.cursor(conn))
+
+    def _partition_months(self, cursor):
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'gate_access_p[0-9]*'"
+        )
+        return sorted(datetime.datetime.strptime(name, "gate_access_p%Y%m").date()
+                      for (name,) in cursor.fetchall())
+
+    def add_partitions(self, until):
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            with self.transaction(conn):
+                months = self._partition_months(cursor)
+                month = add_months(months[-1], 1)
+                if month > until:
+                    return
+
+                while month <= until:
+                    # Rows gate_access_pmax already holds for the month move over
+                    table = sqlite_partition_table(month)
+                    create_sqlite_partition(cursor, month)
+                    cursor.execute(f'''
+                        INSERT INTO {table} (id, user_id, date, time, status)
+                        SELECT id, user_id, date, time, status FROM gate_access_pmax
+                        WHERE date >= %s AND date < %s
+                    ''', (month, add_months(month, 1)))
+                    cursor.execute(
+                        "DELETE FROM gate_access_pmax WHERE date >= %s AND date < %s",
+                        (month, add_months(month, 1))
+                    )
+                    months.append(month)
+                    month = add_months(month, 1)
+                rebuild_sqlite_partition_view(cursor, months)
+
+    def delete_archived_batch(self, month, max_id, batch_size):
+        # The view can't be deleted from; the month's rows can sit in its
+        # own table, the first one (older rows) or gate_access_pmax
+        tables = [sqlite_partition_table(m) for m in self.partition_months()]
+        tables.append(sqlite_partition_table(None))
+
+        deleted = 0
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            for table in tables:
+                cursor.execute(f'''
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table}
+                        WHERE date >= %s AND date < %s AND id <= %s
+                        LIMIT %s
+                    )
+                ''', (month, add_months(month, 1), max_id, batch_size - deleted))
+                deleted += cursor.rowcount
+                if deleted >= batch_size:
+                    break
+        return deleted
+
+    def drop_partition(self, month):
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            with self.transaction(conn):
+                months = self._partition_months(cursor)
+                if month not in months or len(months) == 1:
+                    return False
+
+                table = sqlite_partition_table(month)
+                cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+                if cursor.fetchone():
+                    return False
+                cursor.execute(f"DROP TABLE {table}")
+                months.remove(month)
+                rebuild_sqlite_partition_view(cursor, months)
+        return True
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,670 @@
+"""
+Storage backends for FaceRecognitionDB
+
+StorageBackend implements the operations the application needs (user
+lookup, event insert, history queries) once, in SQL both engines
+accept, with %s placeholders. Subclasses supply connections,
+transactions, streaming, query plans, the schema migrations and the
+few statements whose syntax differs:
+
+    MySQLStorage   (mysql_storage.py)   MySQL server, pooled connections
+    SQLiteStorage  (sqlite_storage.py)  embedded file, WAL mode
+
+gate_access is split into monthly partitions (MySQL range partitions,
+SQLite month tables behind a view). Closed months can be moved out to
+archive files (archive.py); the history methods read those back when a
+date range reaches before the first live month.
+
+Backend methods raise on failure; FaceRecognitionDB decides what to
+print and return. Catch Error / DATA_ERRORS (or test is_data_error) from
+here rather than the driver's own classes so callers work with either
+engine.
+"""
+import datetime
+import math
+import sqlite3
+from collections import Counter
+from itertools import islice
+
+import mysql.connector
+
+from FaceRecognitionSystem.backend.archive import read_archive
+from FaceRecognitionSystem.backend.migrations import (
+    ACCESS_COUNTS_REBUILD,
+    FIRST_DATE,
+    ROLLUP_TABLES,
+    add_months,
+    month_start,
+    name_ngrams
+)
+
+# Any database error from either engine
+Error = (mysql.connector.Error, sqlite3.Error)
+
+# Errors caused by the data itself; retrying the same write won't help
+DATA_ERRORS = (
+    mysql.connector.IntegrityError,
+    mysql.connector.DataError,
+    mysql.connector.ProgrammingError,
+    sqlite3.IntegrityError,
+    sqlite3.DataError,
+    sqlite3.ProgrammingError,
+)
+
+# MySQL raises these as ProgrammingError too, but they mean the schema
+# is missing a table or column (e.g. not fully migrated), not bad data
+SCHEMA_ERRNOS = {
+    1054,  # unknown column
+    1146,  # table doesn't exist
+}
+
+
+def is_data_error(e):
+    """True if a database error was caused by the row written, not the database or its schema"""
+    return isinstance(e, DATA_ERRORS) and getattr(e, "errno", None) not in SCHEMA_ERRNOS
+
+
+# Most trigrams of a long search term looked up per candidate user
+MAX_SEARCH_GRAMS = 6
+
+
+class StorageBackend:
+    # Name used for backend in DB_CONFIG
+    name = None
+
+    # (version, description, function(cursor)) applied by initialize()
+    migrations = []
+
+    # Adds granted accesses to a user's counter: (user_id, count, latest DATETIME)
+    granted_count_upsert = None
+
+    # Statements refilling the rollup tables from gate_access rows dated >= %s
+    rollup_backfill = []
+
+    # -------------------------------------------------
+    # ENGINE HOOKS (SUBCLASSES)
+    # -------------------------------------------------
+
+    def initialize(self):
+        """Create the database if needed and apply pending migrations"""
+        raise NotImplementedError
+
+    def connection(self):
+        """Context manager yielding a connection for the current thread"""
+        raise NotImplementedError
+
+    def cursor(self, conn, dictionary=False):
+        """Cursor taking %s placeholders; rows as dicts if dictionary"""
+        raise NotImplementedError
+
+    def transaction(self, conn):
+        """Context manager: commit on exit, roll back on an exception"""
+        raise NotImplementedError
+
+    def increment_sql(self, table, keys):
+        """Upsert adding to table.access_count: params are keys + (count,)"""
+        raise NotImplementedError
+
+    def stream(self, query, params, batch_size):
+        """Yield the rows of query as dicts, batch_size at a time"""
+        raise NotImplementedError
+
+    def explain(self, query, params):
+        """Query plan of query; returns (problems, plan lines)
+
+        problems lists every full table scan and every sort the plan
+        needs (filesort / temp B-tree) instead of reading an index.
+        """
+        raise NotImplementedError
+
+    def partition_months(self):
+        """First days of the months gate_access has a partition for, oldest first"""
+        raise NotImplementedError
+
+    def add_partitions(self, until):
+        """Add monthly partitions after the last one up to the month of until"""
+        raise NotImplementedError
+
+    def delete_archived_batch(self, month, max_id, batch_size):
+        """Delete up to batch_size rows of month with id <= max_id; returns rows deleted"""
+        raise NotImplementedError
+
+    def drop_partition(self, month):
+        """Drop the partition of month if it is empty; returns whether it was dropped"""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    # -------------------------------------------------
+    # USERS
+    # -------------------------------------------------
+
+    def add_user(self, name, id_number, email):
+        """Add a user unless the ID number exists; returns the user ID"""
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            cursor.execute("SELECT id FROM users WHERE id_number = %s", (id_number,))
+            existing_user = cursor.fetchone()
+            if existing_user:
+                return existing_user[0]
+
+            with self.transaction(conn):
+                cursor.execute(
+                    "INSERT INTO users (name, id_number, email) VALUES (%s, %s, %s)",
+                    (name, id_number, email)
+                )
+                user_id = cursor.lastrowid
+                cursor.executemany(
+                    "INSERT INTO user_name_ngrams (gram, user_id) VALUES (%s, %s)",
+                    [(gram, user_id) for gram in name_ngrams(name)]
+                )
+            return user_id
+
+    def get_user(self, user_id):
+        with self.connection() as conn:
+            cursor = self.cursor(conn, dictionary=True)
+            cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+            return cursor.fetchone()
+
+    def get_all_users(self):
+        with self.connection() as conn:
+            cursor = self.cursor(conn, dictionary=True)
+            cursor.execute("SELECT * FROM users ORDER BY name")
+            return cursor.fetchall()
+
+    def user_search_query(self, term):
+        """Build the user search query; returns (query, params)
+
+        Candidates are users whose name has every n-gram of the term
+        (user_name_ngrams) plus users whose ID number starts with it,
+        both read from indexes. A user can come back twice, and n-gram
+        candidates for a term over 3 characters must still be checked.
+        """
+        key = term.strip().lower()
+        if len(key) <= 3:
+            names = "SELECT user_id FROM user_name_ngrams WHERE gram >= %s AND gram < %s"
+            params = [key, _prefix_end(key)]
+        else:
+            # Users having all the trigrams: one primary key lookup per
+            # trigram and candidate, no grouping. A few spread over the
+            # term narrow it down enough.
+            grams = list(dict.fromkeys(key[i:i + 3] for i in range(len(key) - 2)))
+            grams = grams[::math.ceil(len(grams) / MAX_SEARCH_GRAMS)]
+            names = "SELECT g0.user_id FROM user_name_ngrams g0"
+            for i in range(1, len(grams)):
+                names += (f" JOIN user_name_ngrams g{i}"
+                          f" ON g{i}.gram = %s AND g{i}.user_id = g0.user_id")
+            names += " WHERE g0.gram = %s"
+            params = grams[1:] + grams[:1]
+
+        query = f"""
+            SELECT id, name, id_number FROM users WHERE id IN ({names})
+            UNION ALL
+            SELECT id, name, id_number FROM users WHERE id_number >= %s AND id_number < %s
+        """
+        params.extend([term.strip(), _prefix_end(term.strip())])
+        return query, params
+
+    def search_users(self, term, limit=None):
+        """Users matching a name or ID number search, best match first
+
+        A user matches when the name contains the term (ignoring case)
+        or the ID number starts with it. Ranked: exact ID number, ID
+        number prefix, exact name, name prefix, word prefix, anywhere
+        in the name; then by name. Returns dicts with id, name,
+        id_number and rank (0 = best).
+        """
+        term = term.strip() if term else ""
+        if not term:
+            return []
+        key = term.lower()
+
+        users = {}
+        for user in self._fetch_all(*self.user_search_query(term)):
+            name = user["name"].lower()
+            if user["id_number"] == term:
+                rank = 0
+            elif user["id_number"].startswith(term):
+                rank = 1
+            elif name == key:
+                rank = 2
+            elif name.startswith(key):
+                rank = 3
+            elif f" {key}" in name:
+                rank = 4
+            elif key in name:
+                rank = 5
+            else:
+                continue
+            users[user["id"]] = dict(user, rank=rank)
+
+        ranked = sorted(users.values(), key=lambda u: (u["rank"], u["name"].lower(), u["id"]))
+        return ranked[:limit] if limit else ranked
+
+    def _search_ids(self, search_term):
+        """IDs of the users a history search term matches; None for no search"""
+        if not search_term:
+            return None
+        return [user["id"] for user in self.search_users(search_term)]
+
+    # -------------------------------------------------
+    # EVENTS
+    # -------------------------------------------------
+
+    def write_events(self, events):
+        """Insert a batch of gate events in one transaction
+
+        events: list of (kind, values) where kind is "access" with
+        (user_id, date, time, status) or "session" with
+        (date, time, users_recognized, duration).
+        """
+        accesses = [tuple(values) for kind, values in events if kind == "access"]
+        sessions = [tuple(values) for kind, values in events if kind == "session"]
+
+        # One counter upsert per user rather than per event
+        granted = {}
+        for user_id, date, time_str, status in accesses:
+            if status == "Granted" and user_id is not None:
+                count, latest = granted.get(user_id, (0, ""))
+                granted[user_id] = (count + 1, max(latest, f"{date} {time_str}"))
+
+        # Likewise one upsert per rollup bucket
+        hourly, daily, user_daily = Counter(), Counter(), Counter()
+        for user_id, date, time_str, status in accesses:
+            hourly[(date, _hour(time_str), status)] += 1
+            daily[(date, status)] += 1
+            if user_id is not None:
+                user_daily[(user_id, date, status)] += 1
+        rollups = [
+            ("access_stats_hourly", ("date", "hour", "status"), hourly),
+            ("access_stats_daily", ("date", "status"), daily),
+            ("user_access_stats_daily", ("user_id", "date", "status"), user_daily),
+        ]
+
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            with self.transaction(conn):
+                if accesses:
+                    cursor.executemany(
+                        "INSERT INTO gate_access (user_id, date, time, status) VALUES (%s, %s, %s, %s)",
+                        accesses
+                    )
+                if granted:
+                    cursor.executemany(
+                        self.granted_count_upsert,
+                        [(user_id, count, latest) for user_id, (count, latest) in granted.items()]
+                    )
+                for table, keys, counts in rollups:
+                    if counts:
+                        cursor.executemany(
+                            self.increment_sql(table, keys),
+                            [key + (count,) for key, count in counts.items()]
+                        )
+                if sessions:
+                    cursor.executemany(
+                        "INSERT INTO gate_sessions (date, time, users_recognized, duration) VALUES (%s, %s, %s, %s)",
+                        sessions
+                    )
+
+    def log_training(self, faces_count, status):
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            cursor.execute(
+                "INSERT INTO training_log (faces_count, status) VALUES (%s, %s)",
+                (faces_count, status)
+            )
+
+    # -------------------------------------------------
+    # ACCESS COUNTERS
+    # -------------------------------------------------
+
+    def get_access_count(self, user_id):
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            cursor.execute(
+                "SELECT granted_count FROM user_access_counts WHERE user_id = %s",
+                (user_id,)
+            )
+            row = cursor.fetchone()
+            return row[0] if row else 0
+
+    def rebuild_access_counts(self):
+        """Recompute user_access_counts from gate_access; returns users counted
+
+        Archived months count through archived_access_counts. Runs in
+        one transaction, so an access recorded meanwhile waits for it and
+        is counted exactly once.
+        """
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            with self.transaction(conn):
+                cursor.execute("DELETE FROM user_access_counts")
+                cursor.execute(ACCESS_COUNTS_REBUILD)
+                return cursor.rowcount
+
+    # -------------------------------------------------
+    # ROLLUPS
+    # -------------------------------------------------
+
+    def rebuild_rollups(self):
+        """Recompute the hourly/daily rollups from gate_access; returns days covered
+
+        Rollups of archived months are kept as they are.
+        """
+        start = self.live_start() or FIRST_DATE
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            with self.transaction(conn):
+                for table in ROLLUP_TABLES:
+                    cursor.execute(f"DELETE FROM {table} WHERE date >= %s", (start,))
+                for statement in self.rollup_backfill:
+                    cursor.execute(statement, (start,))
+                cursor.execute("SELECT COUNT(DISTINCT date) FROM access_stats_daily")
+                return cursor.fetchone()[0]
+
+    def hourly_stats(self, start_date, end_date):
+        return self._fetch_all('''
+            SELECT date, hour, status, access_count
+            FROM access_stats_hourly
+            WHERE date >= %s AND date <= %s
+            ORDER BY date, hour, status
+        ''', [_as_date(start_date), _as_date(end_date)])
+
+    def daily_stats(self, start_date, end_date):
+        return self._fetch_all('''
+            SELECT date, status, access_count
+            FROM access_stats_daily
+            WHERE date >= %s AND date <= %s
+            ORDER BY date, status
+        ''', [_as_date(start_date), _as_date(end_date)])
+
+    def user_stats(self, start_date, end_date, limit=10):
+        """Users with the most accesses in the range, busiest first"""
+        return self._fetch_all('''
+            SELECT s.user_id, u.name, u.id_number,
+            CAST(SUM(s.access_count) AS SIGNED) as access_count,
+            CAST(SUM(CASE WHEN s.status = 'Granted' THEN s.access_count ELSE 0 END) AS SIGNED)
+                as granted_count
+            FROM user_access_stats_daily s
+            JOIN users u ON u.id = s.user_id
+            WHERE s.date >= %s AND s.date <= %s
+            GROUP BY s.user_id, u.name, u.id_number
+            ORDER BY access_count DESC, s.user_id
+            LIMIT %s
+        ''', [_as_date(start_date), _as_date(end_date), int(limit)])
+
+    # -------------------------------------------------
+    # PARTITIONS AND ARCHIVE
+    # -------------------------------------------------
+
+    def ensure_partitions(self):
+        """Make sure gate_access has partitions through next month"""
+        self.add_partitions(add_months(month_start(datetime.date.today()), 1))
+
+    def archived_months(self):
+        """Archived months, newest first: dicts with month, file, row_count, max_id"""
+        return self._fetch_all(
+            "SELECT month, file, row_count, max_id FROM gate_access_archives ORDER BY month DESC", []
+        )
+
+    def live_start(self):
+        """First day gate_access is queried from, after the archived months; None if none"""
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            cursor.execute("SELECT MAX(month) FROM gate_access_archives")
+            month = cursor.fetchone()[0]
+        return add_months(_as_date(month), 1) if month else None
+
+    def _split_range(self, start_date, end_date):
+        """Split a history date range at live_start
+
+        Returns (live, archived): the (start, end) to query gate_access
+        for and the (start, end) to read archive files for, each None if
+        the range doesn't reach that side.
+        """
+        start = _as_date(start_date) if start_date else None
+        end = _as_date(end_date) if end_date else None
+        boundary = self.live_start()
+        if boundary is None:
+            return (start, end), None
+
+        live = None if end and end < boundary else (max(start or boundary, boundary), end)
+        archived = None if start and start >= boundary else (start, end)
+        return live, archived
+
+    def _archived_rows(self, start_date=None, end_date=None):
+        """Yield archived gate_access rows between the dates, newest first"""
+        for archive in self.archived_months():
+            month = _as_date(archive["month"])
+            if end_date and month > end_date:
+                continue
+            if start_date and add_months(month, 1) <= start_date:
+                break
+            for row in read_archive(archive["file"]):
+                if start_date and row["date"] < start_date:
+                    continue
+                if end_date and row["date"] > end_date:
+                    continue
+                yield row
+
+    def archived_history(self, start_date=None, end_date=None, user_ids=None, status=None,
+                         after=None):
+        """Yield archived rows like filtered_access_query's, newest first"""
+        if user_ids is not None:
+            user_ids = set(user_ids)
+        users = {user["id"]: user for user in self._fetch_all('''
+            SELECT u.id, u.name, u.id_number, COALESCE(c.granted_count, 0) as access_count
+            FROM users u
+            LEFT JOIN user_access_counts c ON c.user_id = u.id
+        ''', [])}
+
+        for row in self._archived_rows(start_date, end_date):
+            user = users.get(row["user_id"], {})
+            if user_ids is not None and row["user_id"] not in user_ids:
+                continue
+            if status and status != "All" and row["status"] != status:
+                continue
+            if after and (row["accessed_at"], row["id"]) >= tuple(after):
+                continue
+            yield dict(row, name=user.get("name"), id_number=user.get("id_number"),
+                       access_count=user.get("access_count", 0))
+
+    # -------------------------------------------------
+    # HISTORY
+    # -------------------------------------------------
+
+    def user_history(self, user_id, start_date=None, end_date=None):
+        live, archived = self._split_range(start_date, end_date)
+        records = []
+
+        if live:
+            start_date, end_date = live
+            query = "SELECT * FROM gate_access WHERE user_id = %s"
+            params = [user_id]
+
+            if start_date:
+                query += " AND date >= %s"
+                params.append(start_date)
+
+            if end_date:
+                query += " AND date <= %s"
+                params.append(end_date)
+
+            query += " ORDER BY date DESC, time DESC"
+            records = self._fetch_all(query, params)
+
+        if archived:
+            records.extend(row for row in self._archived_rows(*archived) if row["user_id"] == user_id)
+        return records
+
+    def all_access_query(self, date=None, since=None):
+        """Build the all-access history query; returns (query, params)
+
+        since limits an all-dates query to rows on or after that day.
+        """
+        query = """
+            SELECT ga.*, u.name, u.id_number,
+            COALESCE(c.granted_count, 0) as access_count
+            FROM gate_access ga
+            LEFT JOIN users u ON ga.user_id = u.id
+            LEFT JOIN user_access_counts c ON c.user_id = ga.user_id
+        """
+
+        params = []
+        if date:
+            query += " WHERE ga.date = %s"
+            params.append(date)
+        elif since:
+            query += " WHERE ga.date >= %s"
+            params.append(since)
+
+        query += " ORDER BY ga.date DESC, ga.time DESC"
+        return query, params
+
+    def filtered_access_query(self, start_date=None, end_date=None, user_ids=None, status=None,
+                              after=None, limit=None):
+        """Build the filtered history query; returns (query, params)
+
+        user_ids limits the rows to those users, e.g. the ones a search
+        term matches (search_users); it must not be empty.
+
+        Date bounds are applied to the indexed accessed_at column as a
+        half-open [start, end + 1 day) range, and repeated on date so
+        only the partitions in range are read. Rows are ordered newest
+        first by (accessed_at, id), i.e. (date, time, id); after is the
+        key of the last row already seen, so a page continues where the
+        previous one stopped without an OFFSET scan.
+        """
+        query = """
+            SELECT ga.*, u.name, u.id_number,
+            COALESCE(c.granted_count, 0) as access_count
+            FROM gate_access ga
+            LEFT JOIN users u ON ga.user_id = u.id
+            LEFT JOIN user_access_counts c ON c.user_id = ga.user_id
+            WHERE 1=1
+        """
+
+        params = []
+
+        if start_date:
+            query += " AND ga.accessed_at >= %s AND ga.date >= %s"
+            params.extend([_as_date(start_date)] * 2)
+
+        if end_date:
+            query += " AND ga.accessed_at < %s AND ga.date <= %s"
+            params.extend([_as_date(end_date) + datetime.timedelta(days=1), _as_date(end_date)])
+
+        if user_ids is not None:
+            query += f" AND ga.user_id IN ({', '.join(['%s'] * len(user_ids))})"
+            params.extend(user_ids)
+
+        if status and status != "All":
+            query += " AND ga.status = %s"
+            params.append(status)
+
+        if after:
+            query += " AND (ga.accessed_at, ga.id) < (%s, %s)"
+            params.extend(after)
+
+        query += " ORDER BY ga.accessed_at DESC, ga.id DESC"
+
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+        return query, params
+
+    def all_history(self, date=None):
+        live, archived = self._split_range(date, date)
+        records = self._fetch_all(*self.all_access_query(date, live[0])) if live else []
+        if archived:
+            records.extend(self.archived_history(*archived))
+        return records
+
+    def history(self, start_date=None, end_date=None, search_term=None, status=None):
+        user_ids = self._search_ids(search_term)
+        if user_ids == []:
+            return []
+
+        live, archived = self._split_range(start_date, end_date)
+        records = []
+        if live:
+            records = self._fetch_all(*self.filtered_access_query(*live, user_ids, status))
+        if archived:
+            records.extend(self.archived_history(*archived, user_ids, status))
+        return records
+
+    def history_page(self, start_date=None, end_date=None, search_term=None, status=None,
+                     page_size=200, after=None):
+        """One page of filtered history; returns (records, next_key)"""
+        user_ids = self._search_ids(search_term)
+        if user_ids == []:
+            return [], None
+
+        live, archived = self._split_range(start_date, end_date)
+        records = []
+
+        # Past the last live row, the page is all archive
+        if live and not (after and live[0] and after[0] < _as_datetime(live[0])):
+            # One extra row tells whether another page follows
+            records = self._fetch_all(*self.filtered_access_query(
+                *live, user_ids, status, after, page_size + 1
+            ))
+        if archived and len(records) <= page_size:
+            records.extend(islice(
+                self.archived_history(*archived, user_ids, status, after),
+                page_size + 1 - len(records)
+            ))
+
+        if len(records) <= page_size:
+            return records, None
+        records = records[:page_size]
+        return records, (records[-1]["accessed_at"], records[-1]["id"])
+
+    def iter_history(self, start_date=None, end_date=None, search_term=None, status=None,
+                     batch_size=1000):
+        user_ids = self._search_ids(search_term)
+        if user_ids == []:
+            return
+
+        live, archived = self._split_range(start_date, end_date)
+        if live:
+            yield from self.stream(
+                *self.filtered_access_query(*live, user_ids, status), batch_size
+            )
+        if archived:
+            yield from self.archived_history(*archived, user_ids, status)
+
+    def _fetch_all(self, query, params):
+        with self.connection() as conn:
+            cursor = self.cursor(conn, dictionary=True)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+
+def _hour(time_value):
+    """Hour of a 'HH:MM:SS' string, datetime.time or TIME timedelta"""
+    if isinstance(time_value, datetime.timedelta):
+        return int(time_value.total_seconds()) // 3600
+    if isinstance(time_value, datetime.time):
+        return time_value.hour
+    return int(str(time_value).split(":")[0])
+
+
+def _as_date(value):
+    """Accept a date or a 'YYYY-MM-DD' string"""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def _prefix_end(prefix):
+    """Smallest string above every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _as_datetime(day):
+    """Midnight at the start of day"""
+    return datetime.datetime.combine(day, datetime.time())
@@ -0,0 +1,366 @@
+"""
+Conformance checks for the storage backends
+
+Runs the same checks against any StorageBackend: user lookup, event
+insert, access counters, rollups and history queries must return the same rows,
+in the same order, with the same Python types on every engine, the
+hot history queries must be served from indexes, and archiving a month
+must not change what the history API returns. SQLite runs in a
+temporary file; MySQL uses a scratch database (DB_CONFIG credentials,
+database <name>_conformance) that is dropped afterwards.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.backend.storage_conformance
+python -m FaceRecognitionSystem.backend.storage_conformance --backend mysql
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+from FaceRecognitionSystem.backend.archive import AccessArchiver
+from FaceRecognitionSystem.backend.migrations import add_months, month_start
+from FaceRecognitionSystem.backend.storage import DATA_ERRORS
+
+DAY = datetime.date(2025, 3, 22)
+
+
+def _day(offset):
+    return DAY + datetime.timedelta(days=offset)
+
+
+def _seed(backend):
+    """Two users and a week of accesses; returns (alice, bob)"""
+    alice = backend.add_user("Alice Smith", "A100", "alice@example.com")
+    bob = backend.add_user("Bob Jones", "B200", "bob@example.com")
+
+    events = []
+    for offset in range(7):
+        date = _day(offset).isoformat()
+        events.append(("access", [alice, date, "08:00:00", "Granted"]))
+        events.append(("access", [bob, date, "08:00:00", "Granted"]))
+        events.append(("access", [None, date, "23:59:59", "Denied"]))
+    events.append(("session", [DAY.isoformat(), "09:00:00", 2, 12.5]))
+    backend.write_events(events)
+    return alice, bob
+
+
+# -------------------------------------------------
+# CHECKS
+# -------------------------------------------------
+# Each takes (backend, alice, bob) and raises AssertionError on failure
+
+def check_users(backend, alice, bob):
+    assert backend.add_user("Alice Again", "A100", "x@example.com") == alice, \
+        "add_user with an existing ID number must return the existing user"
+    user = backend.get_user(alice)
+    assert user["name"] == "Alice Smith" and user["id_number"] == "A100", user
+    assert isinstance(user["registration_date"], datetime.datetime), user
+    assert backend.get_user(-1) is None
+    assert [u["name"] for u in backend.get_all_users()] == ["Alice Smith", "Bob Jones"]
+
+
+def check_row_types(backend, alice, bob):
+    row = backend.history(_day(0), _day(0), status="Granted")[0]
+    assert isinstance(row["date"], datetime.date), row
+    assert row["time"] == datetime.timedelta(hours=8), row
+    assert row["accessed_at"] == datetime.datetime(2025, 3, 22, 8, 0), row
+
+
+def check_access_counts(backend, alice, bob):
+    assert backend.get_access_count(alice) == 7
+    backend.write_events([("access", [alice, _day(7).isoformat(), "07:30:00", "Granted"]),
+                          ("access", [alice, _day(7).isoformat(), "07:31:00", "Denied"])])
+    assert backend.get_access_count(alice) == 8
+    assert backend.get_access_count(-1) == 0
+
+    assert backend.rebuild_access_counts() == 2
+    assert backend.get_access_count(alice) == 8
+    assert backend.get_access_count(bob) == 7
+
+
+def check_bad_event_rolls_back(backend, alice, bob):
+    before = len(backend.history())
+    try:
+        backend.write_events([("access", [alice, DAY.isoformat(), "10:00:00", "Granted"]),
+                              ("access", [999999, DAY.isoformat(), "10:00:01", "Granted"])])
+    except DATA_ERRORS:
+        pass
+    else:
+        raise AssertionError("an access for an unknown user must be rejected")
+    assert len(backend.history()) == before, "a rejected batch must not be partly written"
+    assert backend.get_access_count(alice) == 8
+
+
+def check_date_range(backend, alice, bob):
+    rows = backend.history(_day(1), _day(2))
+    assert len(rows) == 6, f"end date must be inclusive, got {len(rows)} rows"
+    assert {row["date"] for row in rows} == {_day(1), _day(2)}
+    assert len(backend.history("2025-03-23", "2025-03-24")) == 6, "string dates"
+
+
+def check_filters(backend, alice, bob):
+    assert len(backend.history(status="Denied")) == 8
+    assert len(backend.history(status="All")) == 23
+    assert {row["user_id"] for row in backend.history(search_term="smith")} == {alice}, \
+        "name search must be a case-insensitive substring match"
+    assert {row["user_id"] for row in backend.history(search_term="B200")} == {bob}
+    assert {row["user_id"] for row in backend.history(search_term="B2")} == {bob}, \
+        "ID number must match by prefix"
+    assert backend.history(search_term="zz") == []
+
+
+def check_user_search(backend, alice, bob):
+    carol = backend.add_user("Carol Bobbitt", "C300", "carol@example.com")
+    dave = backend.add_user("Dave", "B2001", "dave@example.com")
+
+    def found(term):
+        return [user["id"] for user in backend.search_users(term)]
+
+    assert found("B200") == [bob, dave], "exact ID number first, then ID prefixes"
+    assert found("bob") == [bob, carol], "name prefix before a later word"
+    assert found("ob") == [bob, carol], "substrings of 3 characters or fewer"
+    assert found("obbit") == [carol] and found("OBBIT") == [carol], "longer substrings, any case"
+    assert found("nes b") == [], "every n-gram present isn't enough: the term must occur"
+    assert found("mith") == [alice]
+    assert found("  ") == [] and found("x") == []
+    assert backend.search_users("b", limit=1)[0]["id"] == bob
+    assert backend.history(search_term="Dave") == []
+
+
+def check_order(backend, alice, bob):
+    rows = backend.history()
+    keys = [(row["accessed_at"], row["id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True), "history must be newest first by (accessed_at, id)"
+    assert rows[0]["access_count"] == 8 and rows[0]["name"] == "Alice Smith", rows[0]
+
+    day = backend.all_history(_day(3))
+    assert [row["time"] for row in day] == sorted((row["time"] for row in day), reverse=True)
+    assert len(day) == 3
+    assert len(backend.user_history(bob, _day(2), _day(3))) == 2
+
+
+def check_pages(backend, alice, bob):
+    expected = [row["id"] for row in backend.history()]
+    seen, after = [], None
+    while True:
+        records, after = backend.history_page(page_size=5, after=after)
+        seen.extend(row["id"] for row in records)
+        if after is None:
+            break
+    assert seen == expected, "pages must cover every row once, in order"
+
+
+def check_stream(backend, alice, bob):
+    expected = [row["id"] for row in backend.history(status="Granted")]
+    streamed = [row["id"] for row in backend.iter_history(status="Granted", batch_size=4)]
+    assert streamed == expected
+
+    # Other calls may run while a stream is open
+    rows = backend.iter_history(batch_size=2)
+    next(rows)
+    assert backend.get_access_count(alice) == 8
+    rows.close()
+
+
+def check_threads(backend, alice, bob):
+    before = len(backend.history())
+    errors = []
+
+    def writer(i):
+        try:
+            for j in range(20):
+                backend.write_events([("access", [bob, _day(8).isoformat(), f"12:{i:02d}:{j:02d}", "Granted"])])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+    assert len(backend.history()) == before + 80
+    assert backend.get_access_count(bob) == 7 + 80
+
+
+def check_rollups(backend, alice, bob):
+    first, last = _day(0), _day(8)
+    rows = backend.history(first, last)
+
+    def expected_rollups():
+        hourly, daily, users = Counter(), Counter(), Counter()
+        for row in rows:
+            hour = int(row["time"].total_seconds()) // 3600
+            hourly[(row["date"], hour, row["status"])] += 1
+            daily[(row["date"], row["status"])] += 1
+            if row["user_id"] is not None:
+                users[row["user_id"]] += 1
+        return hourly, daily, users
+
+    def actual_rollups():
+        hourly = {(r["date"], r["hour"], r["status"]): r["access_count"]
+                  for r in backend.hourly_stats(first, last)}
+        daily = {(r["date"], r["status"]): r["access_count"]
+                 for r in backend.daily_stats(first, last)}
+        users = {r["user_id"]: r["access_count"] for r in backend.user_stats(first, last)}
+        return hourly, daily, users
+
+    hourly, daily, users = expected_rollups()
+    assert actual_rollups() == (dict(hourly), dict(daily), dict(users)), \
+        "rollups maintained on insert must match gate_access"
+
+    top = backend.user_stats(first, last, limit=1)
+    assert [r["user_id"] for r in top] == [bob] and top[0]["granted_count"] == 87, top
+    assert backend.daily_stats("2025-03-22", "2025-03-22") == [
+        {"date": DAY, "status": "Denied", "access_count": 1},
+        {"date": DAY, "status": "Granted", "access_count": 2},
+    ]
+
+    assert backend.rebuild_rollups() == 9
+    assert actual_rollups() == (dict(hourly), dict(daily), dict(users)), \
+        "backfill must match the incrementally maintained rollups"
+
+
+def check_query_plans(backend, alice, bob):
+    queries = {
+        "history, date range": backend.filtered_access_query(_day(0), _day(1)),
+        "history, next page": backend.filtered_access_query(
+            _day(0), _day(6), after=(datetime.datetime(2025, 3, 25), 10), limit=5
+        ),
+        "history, single day": backend.all_access_query(_day(0)),
+        "user search, short term": backend.user_search_query("ob"),
+        "user search, long term": backend.user_search_query("smith"),
+    }
+    bad = []
+    for name, (query, params) in queries.items():
+        problems, _ = backend.explain(query, params)
+        if problems:
+            bad.append(f"{name}: {', '.join(problems)}")
+    assert not bad, "; ".join(bad)
+
+
+def check_archive(backend, alice, bob):
+    this_month = month_start(datetime.date.today())
+    months = backend.partition_months()
+    assert this_month in months and add_months(this_month, 1) in months, months
+
+    # Something live after the archived month, so reads span both
+    backend.write_events([("access", [alice, "2025-04-02", "09:00:00", "Granted"])])
+
+    def snapshot():
+        pages, after = [], None
+        while True:
+            records, after = backend.history_page(page_size=7, after=after)
+            pages.append([row["id"] for row in records])
+            if after is None:
+                break
+        return {
+            "history": backend.history(),
+            "range": backend.history(_day(3), "2025-04-30", "alice", "Granted"),
+            "pages": pages,
+            "stream": [row["id"] for row in backend.iter_history(status="Denied", batch_size=3)],
+            "day": backend.all_history(_day(0)),
+            "all": backend.all_history(),
+            "user": backend.user_history(bob),
+            "stats": backend.daily_stats(_day(0), "2025-04-30"),
+        }
+
+    before = snapshot()
+    archiver = AccessArchiver(backend, tempfile.mkdtemp(), batch_size=7, pause=0)
+    assert archiver.archive_month(DAY) == len(before["history"]) - 1
+    assert backend.live_start() == datetime.date(2025, 4, 1)
+    assert backend._fetch_all("SELECT id FROM gate_access WHERE date < %s", ["2025-04-01"]) == [], \
+        "archived rows must be deleted from gate_access"
+
+    after = snapshot()
+    for name in before:
+        assert after[name] == before[name], f"{name} changed after archiving"
+
+    assert backend.rebuild_access_counts() == 2
+    assert backend.get_access_count(alice) == 9 and backend.get_access_count(bob) == 87
+    assert backend.rebuild_rollups() == 10
+    assert backend.daily_stats(_day(0), "2025-04-30") == before["stats"]
+    assert archiver.run(keep_months=0) == [datetime.date(2025, 4, 1)]
+    assert len(backend.history()) == len(before["history"])
+
+
+CHECKS = [
+    check_users,
+    check_row_types,
+    check_access_counts,
+    check_bad_event_rolls_back,
+    check_date_range,
+    check_filters,
+    check_user_search,
+    check_order,
+    check_pages,
+    check_stream,
+    check_threads,
+    check_rollups,
+    check_query_plans,
+    check_archive,
+]
+
+
+def run(backend):
+    """Initialize backend on an empty database and run every check; returns failures"""
+    backend.initialize()
+    alice, bob = _seed(backend)
+
+    failures = 0
+    for check in CHECKS:
+        try:
+            check(backend, alice, bob)
+            print(f"OK   {check.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL {check.__name__}: {e}")
+    return failures
+
+
+def _drop_database(credentials, database):
+    import mysql.connector
+
+    conn = mysql.connector.connect(**credentials)
+    conn.cursor().execute(f"DROP DATABASE IF EXISTS {database}")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        from FaceRecognitionSystem.backend.sqlite_storage import SQLiteStorage
+
+        directory = tempfile.mkdtemp()
+        backend = SQLiteStorage(os.path.join(directory, "conformance.db"))
+        try:
+            failures = run(backend)
+        finally:
+            backend.close()
+    else:
+        from FaceRecognitionSystem.backend.config import DB_CONFIG
+        from FaceRecognitionSystem.backend.mysql_storage import MySQLStorage
+
+        database = DB_CONFIG['database'] + "_conformance"
+        credentials = {k: DB_CONFIG[k] for k in ('host', 'user', 'password')}
+        backend = MySQLStorage(database=database, **credentials)
+        _drop_database(credentials, database)
+        try:
+            failures = run(backend)
+        finally:
+            backend.close()
+            _drop_database(credentials, database)
+
+    print(f"\n{len(CHECKS) - failures}/{len(CHECKS)} checks passed on {args.backend}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Multi-frame face tracking for the live gate monitor
+
+Detections are associated with existing tracks by box overlap (IoU), so
+a person standing in front of the camera keeps one track ID for as long
+as they are visible. Recognition results are accumulated as votes on
+the track instead of being recomputed every frame: a new track is
+recognized straight away, a confirmed track is never recognized again,
+and a low-confidence or unknown track is re-checked only every
+recheck_interval frames. A track picked up again after missed
+detections is re-checked once, and its votes are dropped if that check
+disagrees, so someone stepping into the spot just vacated by another
+person doesn't inherit their identity.
+
+Optionally the cascade runs only every detect_interval frames and an
+OpenCV tracker (e.g. 'KCF', 'CSRT', 'MOSSE') moves the boxes in between.
+"""
+import itertools
+
+import cv2
+import numpy as np
+
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def clip_box(box, shape):
+    """Clip an (x, y, w, h) box to an image of the given shape"""
+    height, width = shape[:2]
+    x, y, w, h = (int(round(v)) for v in box)
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+
+def create_opencv_tracker(name):
+    """Create an OpenCV single-object tracker by name, or None if unavailable"""
+    for module in (cv2, getattr(cv2, "legacy", None)):
+        factory = getattr(module, f"Tracker{name}_create", None) if module else None
+        if factory is not None:
+            return factory()
+    print(f"OpenCV tracker '{name}' not available, using detections only")
+    return None
+
+
+class FaceTrack:
+    def __init__(self, track_id, box, min_votes=1):
+        self.id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.age = 1
+        self.missed = 0
+
+        # user_id -> number of confident matches / best distance seen
+        self.votes = {}
+        self.best_distance = {}
+        self.last_match = (None, None)
+        self.recognitions = 0
+        self.since_recognition = 0
+        self.min_votes = min_votes
+
+        # Re-acquired after missed detections; needs one fresh check
+        self.stale = False
+
+        # Free for the caller, e.g. "access already logged for this track"
+        self.handled = False
+        self.opencv_tracker = None
+
+    @property
+    def confirmed(self):
+        """True once one user has collected min_votes confident matches"""
+        return bool(self.votes) and max(self.votes.values()) >= self.min_votes
+
+    @property
+    def identity(self):
+        """Return (user_id, distance) for the track.
+
+        The user with the most confident votes (ties broken by best
+        distance) if any; otherwise the latest match, or (None, None) if
+        the track hasn't been recognized yet.
+        """
+        if not self.votes:
+            return self.last_match
+        user_id = min(self.votes, key=lambda u: (-self.votes[u], self.best_distance[u]))
+        return user_id, self.best_distance[user_id]
+
+
+class FaceTracker:
+    def __init__(self, confidence_threshold, iou_threshold=0.3, max_missed=10,
+                 recheck_interval=15, min_votes=1, detect_interval=1,
+                 opencv_tracker=None):
+        self.confidence_threshold = confidence_threshold
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.recheck_interval = recheck_interval
+        self.min_votes = min_votes
+        self.detect_interval = max(1, detect_interval)
+        self.opencv_tracker = opencv_tracker
+
+        self.tracks = []
+        self.frame_index = 0
+        self._ids = itertools.count(1)
+
+        # Running totals, for logging and benchmarks
+        self.frames = 0
+        self.recognitions = 0
+        self.tracks_created = 0
+
+    # -------------------------------------------------
+    # ASSOCIATION
+    # -------------------------------------------------
+
+    def detection_due(self):
+        """True if the cascade should run on the current frame"""
+        return self.frame_index % self.detect_interval == 0
+
+    def update(self, boxes, frame=None):
+        """Associate this frame's detections with tracks.
+
+        Matches greedily by highest IoU. Unmatched detections start new
+        tracks; tracks unmatched for more than max_missed detection
+        frames are dropped. Returns the tracks visible in this frame.
+        """
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        pairs = sorted(
+            (
+                (iou(track.box, box), t, b)
+                for t, track in enumerate(self.tracks)
+                for b, box in enumerate(boxes)
+            ),
+            reverse=True
+        )
+
+        matched_tracks, matched_boxes = set(), set()
+        visible = []
+        for overlap, t, b in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if t in matched_tracks or b in matched_boxes:
+                continue
+            matched_tracks.add(t)
+            matched_boxes.add(b)
+
+            track = self.tracks[t]
+            track.box = boxes[b]
+            if track.missed:
+                track.stale = True
+            track.missed = 0
+            self._advance(track, frame)
+            visible.append(track)
+
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+
+        for b, box in enumerate(boxes):
+            if b not in matched_boxes:
+                track = FaceTrack(next(self._ids), box, self.min_votes)
+                self._start_opencv_tracker(track, frame)
+                survivors.append(track)
+                visible.append(track)
+                self.tracks_created += 1
+
+        self.tracks = survivors
+        self._next_frame()
+        return visible
+
+    def follow(self, frame):
+        """Carry tracks through a frame without detections.
+
+        Boxes are moved by the OpenCV tracker when one is configured,
+        otherwise they stay where they were last detected. Returns the
+        tracks still visible.
+        """
+        visible = []
+        for track in self.tracks:
+            if track.missed:
+                continue
+            if track.opencv_tracker is not None:
+                ok, box = track.opencv_tracker.update(frame)
+                if not ok:
+                    continue
+                track.box = clip_box(box, frame.shape)
+            track.age += 1
+            track.since_recognition += 1
+            visible.append(track)
+
+        self._next_frame()
+        return visible
+
+    def _advance(self, track, frame):
+        track.age += 1
+        track.since_recognition += 1
+        self._start_opencv_tracker(track, frame)
+
+    def _start_opencv_tracker(self, track, frame):
+        # Re-seeded from every detection, so tracker drift never accumulates
+        if self.opencv_tracker and frame is not None and self.detect_interval > 1:
+            track.opencv_tracker = create_opencv_tracker(self.opencv_tracker)
+            if track.opencv_tracker is not None:
+                track.opencv_tracker.init(frame, track.box)
+
+    def _next_frame(self):
+        self.frame_index += 1
+        self.frames += 1
+
+    # -------------------------------------------------
+    # RECOGNITION VOTES
+    # -------------------------------------------------
+
+    def needs_recognition(self, track):
+        """New and stale tracks always; unconfirmed ones every recheck_interval frames"""
+        if track.recognitions == 0 or track.stale:
+            return True
+        if track.confirmed:
+            return False
+        return track.since_recognition >= self.recheck_interval
+
+    def record(self, track, user_id, distance):
+        """Add one recognition result to a track's votes"""
+        track.recognitions += 1
+        track.since_recognition = 0
+        track.last_match = (user_id, distance)
+        self.recognitions += 1
+
+        confident = distance < self.confidence_threshold
+        if track.stale:
+            track.stale = False
+            if track.votes and (not confident or user_id != track.identity[0]):
+                track.votes.clear()
+                track.best_distance.clear()
+
+        if confident:
+            track.votes[user_id] = track.votes.get(user_id, 0) + 1
+            track.best_distance[user_id] = min(
+                distance, track.best_distance.get(user_id, np.inf)
+            )
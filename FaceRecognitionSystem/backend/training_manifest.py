@@ -0,0 +1,74 @@
+import json
+import os
+
+
+def file_signature(path):
+    """Return (mtime_ns, size) for a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class TrainingManifest:
+    """Record of which sample store rows are already baked into Trainner.yml.
+
+    Stored as JSON next to the trainer file. The store is append-only
+    between generations, so "rows 0..N of generation G" fully describes
+    the trained samples. The trainer file's own signature is kept too, so
+    a model replaced outside this manifest forces a full rebuild.
+    """
+
+    def __init__(self, training_file):
+        self.training_file = training_file
+        self.path = os.path.splitext(training_file)[0] + ".manifest.json"
+        self.generation = None
+        self.rows = 0
+        self.model = None
+
+    def load(self):
+        """Load the manifest from disk; returns False if it is missing"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.generation = None
+            self.rows = 0
+            self.model = None
+            return False
+
+        self.generation = data.get('generation')
+        self.rows = data.get('rows', 0)
+        self.model = data.get('model')
+        return True
+
+    def save(self, store):
+        """Record every row currently in the store as trained"""
+        self.generation = store.generation
+        self.rows = store.count
+        self.model = file_signature(self.training_file)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'model': self.model,
+                'generation': self.generation,
+                'rows': self.rows
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def matches_model(self):
+        """True if the manifest describes the trainer file currently on disk"""
+        current = file_signature(self.training_file)
+        return current is not None and current == self.model
+
+    def new_rows(self, store):
+        """Return the (start, stop) store rows missing from the model.
+
+        Returns None if the store was compacted or rewritten since the
+        model was trained, in which case only a full rebuild is valid.
+        """
+        if self.generation != store.generation or self.rows > store.count:
+            return None
+        return self.rows, store.count
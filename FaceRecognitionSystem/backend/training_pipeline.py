@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from FaceRecognitionSystem.backend.lbph_model import compute_histograms
+
+
+def _extract_chunk(args):
+    """Worker: map the sample store and compute histograms for a row range"""
+    samples_file, start, stop, params = args
+    samples = np.load(samples_file, mmap_mode='r')
+    return compute_histograms(list(samples[start:stop]), params)
+
+
+def extract_histograms(store, params, start=0, stop=None, workers=None,
+                       chunk_size=1024, progress=None):
+    """Extract LBPH histograms for store rows [start, stop) across a process pool.
+
+    Workers memory-map the packed sample file themselves, so no pixel
+    data is pickled between processes. Chunks are reassembled in row
+    order, so the result is identical to a serial recognizer.train()
+    over the same crops.
+
+    progress: optional callback(done, total) called as chunks complete.
+
+    Returns (histograms, labels) as a float32 matrix and int32 array.
+    """
+    stop = store.count if stop is None else min(stop, store.count)
+    labels = np.array(store.labels(start, stop), dtype=np.int32)
+    total = stop - start
+
+    if total <= 0:
+        return np.empty((0, 0), dtype=np.float32), labels
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [
+        (store.samples_file, i, min(i + chunk_size, stop), params)
+        for i in range(start, stop, chunk_size)
+    ]
+
+    if workers == 1 or len(chunks) == 1:
+        return _assemble(map(_extract_chunk, chunks), chunks, total, progress), labels
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order regardless of completion order
+        results = pool.map(_extract_chunk, chunks)
+        return _assemble(results, chunks, total, progress), labels
+
+
+def _assemble(results, chunks, total, progress):
+    histograms = None
+    offset = 0
+
+    for (_, start, stop, _), hists in zip(chunks, results):
+        if histograms is None:
+            histograms = np.empty((total, hists.shape[1]), dtype=np.float32)
+        histograms[offset:offset + len(hists)] = hists
+        offset += len(hists)
+
+        if progress:
+            progress(offset, total)
+
+    return histograms
@@ -40,10 +40,25 @@ def get_face_recognizer():
         except:
             raise Exception("OpenCV face recognizer not available")
 
-def get_images_and_labels(path):
-    """Get face images and their corresponding IDs from the training directory"""
+def normalize_face(face, size):
+    """Convert a face crop to a size x size grayscale uint8 image"""
+    face = np.asarray(face, dtype=np.uint8)
+    if face.ndim == 3:
+        face = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+    if face.shape != (size, size):
+        interpolation = cv2.INTER_AREA if face.shape[0] > size else cv2.INTER_LINEAR
+        face = cv2.resize(face, (size, size), interpolation=interpolation)
+    return face
+
+def get_images_and_labels(path, filenames=None):
+    """Get face images and their corresponding IDs from the training directory
+
+    If filenames is given, only those samples are loaded.
+    """
     # Get the path of all the files in the folder
-    imagePaths = [os.path.join(path, f) for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+    if filenames is None:
+        filenames = os.listdir(path)
+    imagePaths = [os.path.join(path, f) for f in filenames if os.path.isfile(os.path.join(path, f))]
     
     # Create empty lists for faces and IDs
     faces = []
@@ -52,8 +67,8 @@ def get_images_and_labels(path):
     # Loop through all image paths
     for imagePath in imagePaths:
         try:
-            # Skip trainer file
-            if imagePath.endswith('Trainner.yml'):
+            # Skip trainer file and anything else that isn't a sample
+            if not imagePath.endswith('.jpg'):
                 continue
                 
             # Open and convert image to grayscale
@@ -0,0 +1,92 @@
+"""
+Benchmark: dashboard stats from rollup tables vs. scanning gate_access
+
+Fills a scratch SQLite database with --rows gate events spread over
+--days days (rollups are maintained on insert, as in production), then
+times the hourly stats query the history dashboard makes, once computed
+on the fly with GROUP BY over gate_access and once read from the
+access_stats_hourly rollup, for a one-day, one-week and full range.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.access_rollups --rows 200000 --days 365
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from FaceRecognitionSystem.backend.sqlite_storage import SQLiteStorage
+
+# What the dashboard would run without rollups
+SCAN_QUERY = """
+    SELECT date, CAST(substr(time, 1, 2) AS INTEGER) as hour, status, COUNT(*) as access_count
+    FROM gate_access
+    WHERE date >= %s AND date <= %s
+    GROUP BY date, hour, status
+"""
+
+
+def fill(backend, rows, days, users, batch_size=5000):
+    """Insert rows random events; returns events written per second"""
+    random.seed(0)
+    user_ids = [backend.add_user(f"User {i}", f"ID{i:05d}", f"user{i}@example.com")
+                for i in range(users)]
+    first = datetime.date.today() - datetime.timedelta(days=days - 1)
+
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - offset)):
+            date = first + datetime.timedelta(days=random.randrange(days))
+            time_str = f"{random.randrange(6, 22):02d}:{random.randrange(60):02d}:{random.randrange(60):02d}"
+            if random.random() < 0.8:
+                batch.append(("access", [random.choice(user_ids), date.isoformat(), time_str, "Granted"]))
+            else:
+                batch.append(("access", [None, date.isoformat(), time_str, "Denied"]))
+        backend.write_events(batch)
+    return rows / (time.perf_counter() - start)
+
+
+def timed(function, repeat):
+    """Best of repeat runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = SQLiteStorage(os.path.join(tempfile.mkdtemp(), "rollups.db"))
+    backend.initialize()
+    rate = fill(backend, args.rows, args.days, args.users)
+    print(f"{args.rows} events over {args.days} days, inserted at {rate:.0f} events/s\n")
+
+    today = datetime.date.today()
+    ranges = [
+        ("1 day", today, today),
+        ("7 days", today - datetime.timedelta(days=6), today),
+        (f"{args.days} days", today - datetime.timedelta(days=args.days - 1), today),
+    ]
+
+    print(f"{'range':>10} {'scan ms':>9} {'rollup ms':>10} {'speedup':>8}")
+    for name, start, end in ranges:
+        scan = timed(lambda: backend._fetch_all(SCAN_QUERY, [start, end]), args.repeat)
+        rollup = timed(lambda: backend.hourly_stats(start, end), args.repeat)
+        print(f"{name:>10} {scan:>9.1f} {rollup:>10.2f} {scan / rollup:>7.0f}x")
+
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: IVF approximate search vs. exact gallery scan
+
+Builds a synthetic gallery (several captures per user, as left after
+prototype compaction), probes it with fresh captures of enrolled users
+and reports recall@1 (ANN top-1 label == exact top-1 label) and
+p50/p99 per-probe latency for exact search and several nprobe values.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.ann_search --users 20000 --per-user 2
+"""
+import argparse
+import time
+
+import numpy as np
+
+from FaceRecognitionSystem.backend.ann_index import IVFIndex
+from FaceRecognitionSystem.backend.config import FACE_RECOGNITION
+from FaceRecognitionSystem.backend.gallery import FaceGallery
+from FaceRecognitionSystem.backend.lbph_model import compute_histograms
+from FaceRecognitionSystem.benchmarks.prototype_compaction import synthetic_captures
+
+
+def timed(search, probes):
+    """Run search one probe at a time, as a gate does; return results + ms list"""
+    results, latencies = [], []
+    for probe in probes:
+        start = time.perf_counter()
+        results.append(search(probe[None, :])[0])
+        latencies.append(1000 * (time.perf_counter() - start))
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=2)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    size = FACE_RECOGNITION["crop_size"]
+    faces, labels = synthetic_captures(args.users, args.per_user + 1, size)
+
+    # Last capture of each user is kept back as a probe
+    is_probe = np.arange(len(labels)) % (args.per_user + 1) == args.per_user
+    print(f"Extracting histograms for {len(faces)} synthetic captures...")
+    histograms = compute_histograms(faces)
+
+    gallery = FaceGallery.build(histograms[~is_probe], labels[~is_probe])
+    rng = np.random.default_rng(1)
+    probe_rows = rng.choice(np.flatnonzero(is_probe), min(args.probes, int(is_probe.sum())), replace=False)
+    probes = histograms[probe_rows]
+
+    start = time.perf_counter()
+    index = IVFIndex.build(gallery.histograms, nlist=args.nlist)
+    print(f"Built IVF index: {index.nlist} cells over {len(gallery)} rows "
+          f"in {time.perf_counter() - start:.1f}s\n")
+
+    exact, exact_ms = timed(lambda p: gallery.search(p, 1), probes)
+    exact_top1 = np.array([r[0][0] for r in exact])
+
+    print(f"{'search':>12} {'recall@1':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'exact':>12} {100.0:>8.1f}% {np.percentile(exact_ms, 50):>8.2f} "
+          f"{np.percentile(exact_ms, 99):>8.2f}")
+
+    for nprobe in args.nprobe:
+        ann, ann_ms = timed(lambda p: index.search(gallery, p, 1, nprobe), probes)
+        ann_top1 = np.array([r[0][0] if r else -1 for r in ann])
+        recall = 100 * np.mean(ann_top1 == exact_top1)
+        print(f"{'nprobe=' + str(nprobe):>12} {recall:>8.1f}% "
+              f"{np.percentile(ann_ms, 50):>8.2f} {np.percentile(ann_ms, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: cost of DB metrics on FaceRecognitionDB calls
+
+Times --calls calls of get_access_count (one indexed lookup, the
+cheapest call the gate makes) against a scratch SQLite database: on
+the backend directly, through FaceRecognitionDB with metrics disabled
+and with metrics enabled, and prints the per-call overhead.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.db_metrics --calls 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from FaceRecognitionSystem.backend.db_metrics import DBMetrics
+from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
+
+
+def per_call_us(function, calls, repeat):
+    """Best of repeat runs, in microseconds per call"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "metrics.db")
+    plain = FaceRecognitionDB(backend='sqlite', sqlite_file=path)
+    user_id = plain.add_user("Bench User", "B0001", "bench@example.com")
+    plain.record_gate_access(user_id, "2025-01-01", "09:00:00", "Granted")
+    metered = FaceRecognitionDB(
+        backend='sqlite', sqlite_file=path, metrics=DBMetrics(slow_query_ms=1000)
+    )
+
+    backend = per_call_us(lambda: plain.backend.get_access_count(user_id), args.calls, args.repeat)
+    disabled = per_call_us(lambda: plain.get_access_count(user_id), args.calls, args.repeat)
+    enabled = per_call_us(lambda: metered.get_access_count(user_id), args.calls, args.repeat)
+
+    print(f"{'backend':>10} {backend:8.2f} us/call")
+    print(f"{'disabled':>10} {disabled:8.2f} us/call  ({disabled - backend:+.2f})")
+    print(f"{'enabled':>10} {enabled:8.2f} us/call  ({enabled - backend:+.2f})")
+
+    stats = metered.metrics.snapshot()['methods']['get_access_count']
+    print(f"\nrecorded {stats['calls']} calls, p50 {stats['latency']['p50_ms']} ms, "
+          f"p99 {stats['latency']['p99_ms']} ms")
+
+    plain.close()
+    metered.close()
+
+
+if __name__ == "__main__":
+    main()
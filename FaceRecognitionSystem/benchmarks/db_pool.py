@@ -0,0 +1,75 @@
+"""
+Benchmark: pooled DB access vs. a new connection per call
+
+Runs the get_user_details lookup the gate monitor makes per recognized
+face, first the old way (connect, query, close on every call) and then
+through FaceRecognitionDB's connection pool, from 1..N threads, and
+reports operations per second. Needs the MySQL server from DB_CONFIG.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.db_pool --ops 2000 --threads 1 4
+"""
+import argparse
+import threading
+import time
+
+import mysql.connector
+
+from FaceRecognitionSystem.backend.config import DB_CONFIG
+from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
+
+
+def connect_per_call(db, user_id):
+    """The pre-pool behaviour of every FaceRecognitionDB method"""
+    conn = mysql.connector.connect(**db.backend.pool.connect_args)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+    cursor.fetchone()
+    conn.close()
+
+
+def pooled(db, user_id):
+    db.get_user_details(user_id)
+
+
+def run(operation, db, user_ids, ops, threads):
+    """Split ops over threads; return operations per second"""
+    per_thread = max(1, ops // threads)
+
+    def worker(offset):
+        for i in range(per_thread):
+            operation(db, user_ids[(offset + i) % len(user_ids)])
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    db = FaceRecognitionDB(**dict(DB_CONFIG, backend='mysql'))
+    user_ids = [u["id"] for u in db.get_all_users()] or [1]
+
+    # Open the pool's connections before timing
+    run(pooled, db, user_ids, db.backend.pool.size * 2, db.backend.pool.size)
+
+    print(f"{args.ops} lookups, pool_size={db.backend.pool.size}\n")
+    print(f"{'threads':>7} {'per-call ops/s':>15} {'pooled ops/s':>13} {'speedup':>8}")
+    for threads in args.threads:
+        baseline = run(connect_per_call, db, user_ids, args.ops, threads)
+        pooled_rate = run(pooled, db, user_ids, args.ops, threads)
+        print(f"{threads:>7} {baseline:>15.0f} {pooled_rate:>13.0f} {pooled_rate / baseline:>7.1f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: face detection ms/frame per detection profile
+
+Runs every configured detection profile over the same frames and
+reports mean/p50/p99 ms per frame, faces found, and how many of the
+'full' profile's faces each profile also found (IoU >= 0.3). Frames
+come from --video, or synthetic 1280x720 scenes without faces if none
+is given (which measures only the cost of scanning).
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.detection_profiles --video gate_clip.mp4
+python -m FaceRecognitionSystem.benchmarks.detection_profiles --roi 0.25 0 0.5 1
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from FaceRecognitionSystem.backend.config import FACE_RECOGNITION
+from FaceRecognitionSystem.backend.face_recognition import FaceRecognitionSystem
+from FaceRecognitionSystem.backend.tracking import iou
+
+
+def load_frames(args):
+    if args.video:
+        cam = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cam.read()
+            if not ret:
+                break
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        cam.release()
+        return frames
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(args.frames):
+        noise = rng.integers(0, 256, (args.height, args.width), dtype=np.uint8)
+        frames.append(cv2.GaussianBlur(noise, (9, 9), 0))
+    return frames
+
+
+def matched(reference, boxes):
+    """Number of reference boxes overlapped by one of boxes"""
+    return sum(any(iou(r, b) >= 0.3 for b in boxes) for r in reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--video", help="recorded gate clip (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--roi", type=float, nargs=4, metavar=("X", "Y", "W", "H"),
+                        help="override detection_roi (fractions of the frame)")
+    args = parser.parse_args()
+
+    if args.roi:
+        FACE_RECOGNITION["detection_roi"] = tuple(args.roi)
+
+    frames = load_frames(args)
+    if not frames:
+        raise SystemExit("No frames to benchmark")
+
+    system = FaceRecognitionSystem(None)
+    profiles = list(FACE_RECOGNITION["detection_profiles"])
+    print(
+        f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]}, "
+        f"roi={FACE_RECOGNITION['detection_roi']}\n"
+    )
+
+    reference = None
+    print(f"{'profile':>10} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'faces':>6} {'vs full':>8}")
+    for name in ["full"] + [p for p in profiles if p != "full"]:
+        detector = system.create_detector(name)
+        detector.detect(frames[0])
+
+        latencies, detections = [], []
+        for gray in frames:
+            start = time.perf_counter()
+            boxes = detector.detect(gray)
+            latencies.append(1000 * (time.perf_counter() - start))
+            detections.append([tuple(b) for b in boxes])
+
+        if reference is None:
+            reference = detections
+        found = sum(len(d) for d in detections)
+        recall = sum(matched(r, d) for r, d in zip(reference, detections))
+        total = sum(len(r) for r in reference)
+
+        latencies = np.array(latencies)
+        print(
+            f"{name:>10} {latencies.mean():>8.2f} {np.percentile(latencies, 50):>8.2f} "
+            f"{np.percentile(latencies, 99):>8.2f} {found:>6} "
+            f"{(f'{100 * recall / total:.0f}%' if total else '-'):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
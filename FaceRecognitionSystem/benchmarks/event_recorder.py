@@ -0,0 +1,135 @@
+"""
+Benchmark: write-behind event recorder vs. synchronous inserts
+
+Measures what the recognition loop pays per gate event (p50/p99/max
+latency of the call it makes) and how many events per second reach the
+database: the old synchronous record_gate_access vs. EventRecorder.
+
+With --mysql the configured MySQL server is used (rows are written to
+gate_access). Otherwise a simulated database with --call-ms latency per
+round trip is used. --outage N makes it unreachable for the first N
+seconds, to exercise journaling and replay.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.event_recorder --events 5000
+python -m FaceRecognitionSystem.benchmarks.event_recorder --events 5000 --outage 2
+python -m FaceRecognitionSystem.benchmarks.event_recorder --mysql --events 2000
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+import mysql.connector
+import numpy as np
+
+from FaceRecognitionSystem.backend.event_recorder import EventRecorder
+
+
+class SimulatedDB:
+    """Stands in for FaceRecognitionDB: fixed latency per round trip"""
+
+    def __init__(self, call_ms, row_us, outage_s):
+        self.call_s = call_ms / 1000
+        self.row_s = row_us / 1e6
+        self.up_at = time.monotonic() + outage_s
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self, rows):
+        if time.monotonic() < self.up_at:
+            raise mysql.connector.OperationalError(msg="simulated outage")
+        time.sleep(self.call_s + rows * self.row_s)
+        with self._lock:
+            self.rows += rows
+
+    def record_gate_access(self, user_id, date, time_str, status):
+        # INSERT + counter upsert + COMMIT
+        self._round_trip(1)
+        time.sleep(2 * self.call_s)
+        return True
+
+    def write_events(self, events):
+        self._round_trip(len(events))
+
+
+def percentiles(latencies):
+    latencies = np.array(latencies) * 1e6
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), latencies.max()
+
+
+def produce(record, events, rate):
+    """Call record() for each event at the given rate; return per-call latencies"""
+    latencies = []
+    interval = 1.0 / rate if rate else 0
+    next_at = time.perf_counter()
+    today = datetime.date.today().strftime("%Y-%m-%d")
+
+    for _ in range(events):
+        if interval:
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        start = time.perf_counter()
+        record(None, today, datetime.datetime.now().strftime("%H:%M:%S"), "Denied")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=0, help="events/s (0 = as fast as possible)")
+    parser.add_argument("--mysql", action="store_true")
+    parser.add_argument("--call-ms", type=float, default=1.0)
+    parser.add_argument("--row-us", type=float, default=20.0)
+    parser.add_argument("--outage", type=float, default=0.0)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.mysql:
+        from FaceRecognitionSystem.backend.config import DB_CONFIG
+        from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
+        db = FaceRecognitionDB(**DB_CONFIG)
+        sync_db = db
+    else:
+        db = SimulatedDB(args.call_ms, args.row_us, args.outage)
+        sync_db = SimulatedDB(args.call_ms, args.row_us, 0)
+
+    print(f"{args.events} events, {'MySQL' if args.mysql else 'simulated DB'}\n")
+    print(f"{'mode':>13} {'p50 us':>9} {'p99 us':>9} {'max us':>9} {'events/s':>9}")
+
+    # Synchronous baseline (a fraction of the events is enough to time it)
+    sync_events = min(args.events, 500)
+    start = time.perf_counter()
+    latencies = produce(sync_db.record_gate_access, sync_events, args.rate)
+    elapsed = time.perf_counter() - start
+    p50, p99, worst = percentiles(latencies)
+    print(f"{'synchronous':>13} {p50:>9.0f} {p99:>9.0f} {worst:>9.0f} {sync_events / elapsed:>9.0f}")
+
+    journal = os.path.join(tempfile.mkdtemp(), "event_journal.jsonl")
+    recorder = EventRecorder(db, journal, batch_size=args.batch_size,
+                             flush_interval=0.5, retry_interval=0.5)
+    recorder.start()
+
+    start = time.perf_counter()
+    latencies = produce(recorder.record_access, args.events, args.rate)
+
+    # Throughput counts until every event is in the database
+    while recorder.written < args.events:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    recorder.stop()
+
+    p50, p99, worst = percentiles(latencies)
+    print(f"{'write-behind':>13} {p50:>9.0f} {p99:>9.0f} {worst:>9.0f} {args.events / elapsed:>9.0f}")
+    print(f"\njournaled during outage: {recorder.journaled}, rejected: {recorder.rejected}")
+    if not args.mysql:
+        print(f"rows in simulated DB: {db.rows} of {args.events}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark: per-frame recognition vs. tracked recognition
+
+With --video, plays a recorded gate clip through the trained model
+twice: once matching every detected face on every frame (the old
+monitor_gate loop) and once through the face tracker. Reports
+recognitions per second of video, ms per frame and the users each mode
+identified. Needs a trained model.
+
+Without --video, simulates people walking up to the gate (jittery
+boxes, missed detections, some poor matches) to show the effect of the
+tracker settings alone.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.face_tracking --video gate_clip.mp4
+python -m FaceRecognitionSystem.benchmarks.face_tracking --people 20 --seconds 5
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from FaceRecognitionSystem.backend.config import FACE_RECOGNITION
+from FaceRecognitionSystem.backend.face_recognition import FaceRecognitionSystem
+from FaceRecognitionSystem.backend.tracking import FaceTracker
+from FaceRecognitionSystem.backend.utils import normalize_face
+
+
+def read_frames(path, limit):
+    cam = cv2.VideoCapture(path)
+    fps = cam.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cam.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cam.release()
+    return frames, fps
+
+
+def run_per_frame(system, frames):
+    """The old loop: detect and match every face on every frame"""
+    recognitions, users = 0, set()
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        boxes = system.models.cascade.detectMultiScale(gray, 1.2, 5)
+        matches = system.match_faces([
+            normalize_face(gray[y:y + h, x:x + w], system.crop_size)
+            for (x, y, w, h) in boxes
+        ])
+        recognitions += len(boxes)
+        users.update(
+            c[0][0] for c in matches if c and c[0][1] < system.confidence_threshold
+        )
+    return recognitions, users
+
+
+def run_tracked(system, frames):
+    tracker = system.create_tracker()
+    users = set()
+    for frame in frames:
+        for track in system.track_faces(frame, tracker):
+            user_id, conf = track.identity
+            if conf is not None and conf < system.confidence_threshold:
+                users.add(user_id)
+    return tracker.recognitions, users
+
+
+def benchmark_video(args):
+    system = FaceRecognitionSystem(None)
+    if system.models.recognizer() is None:
+        raise SystemExit("Train a model first")
+
+    frames, fps = read_frames(args.video, args.max_frames)
+    if not frames:
+        raise SystemExit(f"Could not read frames from {args.video}")
+    seconds = len(frames) / fps
+    print(f"{len(frames)} frames ({seconds:.1f}s at {fps:.0f} fps)\n")
+
+    print(f"{'mode':>10} {'recog':>7} {'recog/s':>8} {'ms/frame':>9}  users")
+    for name, run in (("per-frame", run_per_frame), ("tracked", run_tracked)):
+        start = time.perf_counter()
+        recognitions, users = run(system, frames)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>10} {recognitions:>7} {recognitions / seconds:>8.1f} "
+            f"{1000 * elapsed / len(frames):>9.2f}  {sorted(users)}"
+        )
+
+
+def simulate(args):
+    """Simulated detections: people standing at the gate, one at a time"""
+    rng = np.random.default_rng(0)
+    threshold = FACE_RECOGNITION["confidence_threshold"]
+    tracker = FaceTracker(
+        threshold,
+        iou_threshold=FACE_RECOGNITION["track_iou_threshold"],
+        max_missed=FACE_RECOGNITION["track_max_missed"],
+        recheck_interval=FACE_RECOGNITION["track_recheck_interval"],
+        min_votes=FACE_RECOGNITION["track_min_votes"]
+    )
+
+    per_frame = 0
+    frames_per_person = int(args.seconds * args.fps)
+    for person in range(args.people):
+        x, y = rng.integers(150, 350, 2)
+        known = rng.random() >= args.unknown_fraction
+        for _ in range(frames_per_person):
+            x, y = x + rng.integers(-3, 4), y + rng.integers(-3, 4)
+            boxes = [] if rng.random() < args.miss_rate else [(x, y, 140, 140)]
+            per_frame += len(boxes)
+
+            for track in tracker.update(boxes):
+                if tracker.needs_recognition(track):
+                    # Known users match well most of the time
+                    confident = known and rng.random() < 0.8
+                    distance = rng.uniform(20, 45) if confident else rng.uniform(55, 90)
+                    tracker.record(track, person + 1, distance)
+
+        # Empty frames while the next person steps up
+        for _ in range(int(args.gap * args.fps)):
+            tracker.update([])
+
+    seconds = args.people * (args.seconds + args.gap)
+    print(f"{args.people} people x {args.seconds}s at {args.fps} fps (simulated detections)\n")
+    print(f"{'mode':>10} {'recog':>7} {'recog/s':>8}")
+    print(f"{'per-frame':>10} {per_frame:>7} {per_frame / seconds:>8.1f}")
+    print(f"{'tracked':>10} {tracker.recognitions:>7} {tracker.recognitions / seconds:>8.1f}")
+    print(f"\n{tracker.tracks_created} tracks, "
+          f"{100 * (1 - tracker.recognitions / max(1, per_frame)):.1f}% fewer recognitions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--video", help="recorded gate clip to replay")
+    parser.add_argument("--max-frames", type=int, default=3000)
+    parser.add_argument("--people", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--gap", type=float, default=1, help="seconds between people")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--miss-rate", type=float, default=0.05)
+    parser.add_argument("--unknown-fraction", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.video:
+        benchmark_video(args)
+    else:
+        simulate(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: indexed user search vs. LIKE '%term%' for the history filter
+
+Fills a scratch SQLite database with --users users and --rows gate
+events, then times a filtered history page for a handful of search
+terms, once with the old `u.name LIKE '%term%' OR u.id_number = term`
+join (which has to scan) and once through search_users + the user_id
+index. The user lookup alone (search_users) is timed too, as the
+keystroke-driven filter would call it.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.name_search --users 50000 --rows 200000
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+
+from FaceRecognitionSystem.backend.sqlite_storage import SQLiteStorage
+from FaceRecognitionSystem.benchmarks.access_rollups import timed
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Sneha", "Vikram", "Ananya", "Kiran", "Meera",
+               "Arjun", "Divya", "Rohan", "Lakshmi", "Sanjay", "Kavya", "Nikhil", "Pooja"]
+LAST_NAMES = ["Sharma", "Reddy", "Iyer", "Patel", "Nair", "Gupta", "Rao", "Menon",
+              "Kumar", "Joshi", "Das", "Pillai", "Verma", "Bose", "Naidu", "Kapoor"]
+
+# What the history filter ran before
+LIKE_QUERY = """
+    SELECT ga.*, u.name, u.id_number,
+    COALESCE(c.granted_count, 0) as access_count
+    FROM gate_access ga
+    LEFT JOIN users u ON ga.user_id = u.id
+    LEFT JOIN user_access_counts c ON c.user_id = ga.user_id
+    WHERE (u.name LIKE %s OR u.id_number = %s)
+    ORDER BY ga.accessed_at DESC, ga.id DESC
+    LIMIT %s
+"""
+
+
+def fill(backend, users, rows, batch_size=5000):
+    random.seed(0)
+    user_ids = []
+    for i in range(users):
+        name = f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}{i}"
+        user_ids.append(backend.add_user(name, f"EMP{i:06d}", f"user{i}@example.com"))
+
+    today = datetime.date.today()
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - offset)):
+            date = today - datetime.timedelta(days=random.randrange(60))
+            time_str = f"{random.randrange(6, 22):02d}:{random.randrange(60):02d}:{random.randrange(60):02d}"
+            batch.append(("access", [random.choice(user_ids), date.isoformat(), time_str, "Granted"]))
+        backend.write_events(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = SQLiteStorage(os.path.join(tempfile.mkdtemp(), "search.db"))
+    backend.initialize()
+    fill(backend, args.users, args.rows)
+    print(f"{args.users} users, {args.rows} events\n")
+
+    terms = ["EMP004217", "EMP0042", "12345", "Lakshmi Pillai", "kap"]
+    print(f"{'term':>16} {'matches':>8} {'LIKE ms':>8} {'search ms':>10} {'history ms':>11} {'speedup':>8}")
+    for term in terms:
+        matches = len(backend.search_users(term))
+        like = timed(lambda: backend._fetch_all(LIKE_QUERY, [f"%{term}%", term, args.page_size]),
+                     args.repeat)
+        search = timed(lambda: backend.search_users(term), args.repeat)
+        history = timed(lambda: backend.history_page(search_term=term, page_size=args.page_size),
+                        args.repeat)
+        print(f"{term:>16} {matches:>8} {like:>8.1f} {search:>10.2f} {history:>11.2f} "
+              f"{like / history:>7.1f}x")
+
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
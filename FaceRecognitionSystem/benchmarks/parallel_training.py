@@ -0,0 +1,93 @@
+"""
+Benchmark: parallel LBPH histogram extraction vs. worker count
+
+Packs a synthetic set of grayscale face crops into a sample store, then
+times the training pipeline with 1..N worker processes and checks every
+run matches the serial output.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.parallel_training --count 100000
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from FaceRecognitionSystem.backend.lbph_model import default_lbph_params
+from FaceRecognitionSystem.backend.sample_store import SampleStore
+from FaceRecognitionSystem.backend.training_pipeline import extract_histograms
+
+
+def make_synthetic_store(path, count, size, users):
+    """Pack count blurred-noise crops spread over the given number of users"""
+    rng = np.random.default_rng(0)
+    store = SampleStore(path, size)
+    per_user = max(1, count // users)
+
+    for user_id in range(1, users + 1):
+        n = min(per_user, count - store.count)
+        if n <= 0:
+            break
+        crops = rng.integers(0, 256, (n, size, size), dtype=np.uint8)
+        crops = [cv2.GaussianBlur(c, (5, 5), 0) for c in crops]
+        store.append(user_id, f"synthetic{user_id}", crops)
+
+    return store
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--size", type=int, default=64)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    params = default_lbph_params()
+
+    with tempfile.TemporaryDirectory() as path:
+        print(f"Packing {args.count} synthetic {args.size}x{args.size} crops...")
+        store = make_synthetic_store(path, args.count, args.size, args.users)
+
+        baseline = None
+        serial_time = None
+        print(f"\n{'workers':>8} {'seconds':>10} {'crops/s':>10} {'speedup':>8} {'identical':>10}")
+
+        for workers in worker_counts(args.max_workers):
+            start = time.perf_counter()
+            histograms, labels = extract_histograms(
+                store, params,
+                workers=workers, chunk_size=args.chunk_size
+            )
+            elapsed = time.perf_counter() - start
+
+            # Compare digests so only one run's histograms are held at once
+            digest = hashlib.sha1(histograms.tobytes() + labels.tobytes()).hexdigest()
+            if baseline is None:
+                baseline = digest
+                serial_time = elapsed
+            identical = digest == baseline
+
+            print(
+                f"{workers:>8} {elapsed:>10.2f} {len(labels) / elapsed:>10.0f} "
+                f"{serial_time / elapsed:>7.2f}x {str(identical):>10}"
+            )
+            del histograms, labels
+
+
+if __name__ == "__main__":
+    main()
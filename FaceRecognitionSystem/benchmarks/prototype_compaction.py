@@ -0,0 +1,83 @@
+"""
+Benchmark: per-user prototype compaction
+
+Holds out part of every user's samples, compacts the rest to k
+prototypes per user and compares model size, top-1 accuracy and match
+latency against the uncompacted model. Uses synthetic "captures"
+(small shifts, noise and lighting changes of one base face per user)
+unless --store is given, in which case the real sample store is used.
+
+#in terminal /egate/
+python -m FaceRecognitionSystem.benchmarks.prototype_compaction --users 200
+python -m FaceRecognitionSystem.benchmarks.prototype_compaction --store
+"""
+import argparse
+
+import cv2
+import numpy as np
+
+from FaceRecognitionSystem.backend.config import FACE_RECOGNITION
+from FaceRecognitionSystem.backend.lbph_model import compute_histograms
+from FaceRecognitionSystem.backend.prototypes import evaluate_compaction
+from FaceRecognitionSystem.backend.sample_store import SampleStore
+
+
+def synthetic_captures(users, samples, size, seed=0):
+    """Simulate samples_per_face captures of each user taken 100 ms apart"""
+    rng = np.random.default_rng(seed)
+    faces, labels = [], []
+
+    for user_id in range(1, users + 1):
+        base = cv2.GaussianBlur(
+            rng.integers(0, 256, (size + 8, size + 8), dtype=np.uint8), (7, 7), 0
+        )
+        for _ in range(samples):
+            dx, dy = rng.integers(0, 9, 2)
+            crop = base[dy:dy + size, dx:dx + size].astype(np.int16)
+            crop += rng.integers(-12, 13) + rng.integers(-6, 7, crop.shape, dtype=np.int16)
+            faces.append(np.clip(crop, 0, 255).astype(np.uint8))
+            labels.append(user_id)
+
+    return faces, np.array(labels, dtype=np.int32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--store", action="store_true", help="use the configured sample store")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=FACE_RECOGNITION["samples_per_face"])
+    parser.add_argument("--prototypes", type=int, default=FACE_RECOGNITION["prototypes_per_user"] or 8)
+    parser.add_argument("--duplicate-distance", type=float, default=FACE_RECOGNITION["duplicate_distance"])
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.store:
+        store = SampleStore(FACE_RECOGNITION["sample_store"], FACE_RECOGNITION["crop_size"])
+        faces, labels = list(store.samples()), np.array(store.labels())
+    else:
+        faces, labels = synthetic_captures(
+            args.users, args.samples, FACE_RECOGNITION["crop_size"]
+        )
+
+    print(f"Extracting histograms for {len(faces)} samples...")
+    histograms = compute_histograms(faces)
+
+    report = evaluate_compaction(
+        histograms, labels, args.prototypes,
+        duplicate_distance=args.duplicate_distance,
+        holdout=args.holdout
+    )
+
+    print(f"\n{report['probes']} held-out probes, {args.prototypes} prototypes/user\n")
+    print(f"{'model':>10} {'histograms':>11} {'MB':>8} {'top-1 acc':>10} {'ms/probe':>9}")
+    for name in ("full", "compacted"):
+        r = report[name]
+        print(
+            f"{name:>10} {r['histograms']:>11} {r['bytes'] / 2**20:>8.1f} "
+            f"{100 * r['accuracy']:>9.1f}% {r['ms_per_probe']:>9.2f}"
+        )
+    print(f"\nSize reduction: {100 * report['size_reduction']:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
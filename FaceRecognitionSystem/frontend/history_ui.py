@@ -5,6 +5,9 @@ from datetime import datetime
 from tkcalendar import DateEntry  # You may need to install this: pip install tkcalendar
 from FaceRecognitionSystem.frontend.theme import LABEL_STYLE, BUTTON_STYLE
 
+# Access records fetched per "Load More"
+PAGE_SIZE = 200
+
 class HistoryUI:
     def __init__(self, parent, db_instance):
         self.parent = parent
@@ -68,10 +71,28 @@ class HistoryUI:
         tk.Label(message_frame, 
                 text="Welcome to the access history dashboard. Use the filters below to search through records.",
                 font=("Segoe UI", 11), bg="white", fg="#34495e", justify=tk.LEFT).pack(anchor="w")
+
+        # Busiest user and accesses per hour of day for the selected dates
+        top_user_label = tk.Label(summary_frame, text="", font=("Segoe UI", 10),
+                                  bg="white", fg="#7f8c8d")
+        top_user_label.pack(anchor="w")
+        hours_chart = tk.Canvas(summary_frame, height=90, bg="white", highlightthickness=0)
+        hours_chart.pack(fill=tk.X, pady=(5, 0))
         
         # Configure column weights for stats
         for i in range(4):
             stats_frame.columnconfigure(i, weight=1)
+
+        stat_cards = {}
+        for i, (title, color) in enumerate([("Total Accesses", "#3498db"), ("Granted", "#2ecc71"),
+                                            ("Denied", "#e74c3c"), ("Peak Hour", "#9b59b6")]):
+            card = tk.Frame(stats_frame, bg="white", padx=15, pady=10,
+                            highlightbackground="#dcdde1", highlightthickness=1)
+            card.grid(row=0, column=i, sticky="ew", padx=(0 if i == 0 else 10, 0))
+            tk.Label(card, text=title, font=("Segoe UI", 10), bg="white", fg="#7f8c8d").pack(anchor="w")
+            stat_cards[title] = tk.Label(card, text="-", font=("Segoe UI", 18, "bold"),
+                                         bg="white", fg=color)
+            stat_cards[title].pack(anchor="w")
         
         # Filter Section with better styling
         filter_container = tk.Frame(main_frame, bg="white", padx=20, pady=15)
@@ -260,30 +281,41 @@ class HistoryUI:
                              bg="#ecf0f1", fg="#34495e", padx=15, pady=8, bd=0)
         print_btn.pack(side=tk.RIGHT)
         
+        load_more_btn = tk.Button(actions_frame, text="Load More", font=("Segoe UI", 10),
+                                 bg="#ecf0f1", fg="#34495e", padx=15, pady=8, bd=0,
+                                 state=tk.DISABLED)
+        load_more_btn.pack(side=tk.RIGHT, padx=(0, 10))
+
+        # Rows are loaded a page at a time; next_key continues the listing
+        page = {"filters": None, "next_key": None, "count": 0}
+
         # Function definitions
-        def refresh():
-            tree.delete(*tree.get_children())
-            
-            # Get filter values
+        def current_filters():
             start = start_date.get_date().strftime('%Y-%m-%d')
             end = end_date.get_date().strftime('%Y-%m-%d')
             search = search_entry.get()
             if search == "Enter name or ID":
                 search = ""
             status = status_box.get()
-            
-            data = self.db.get_filtered_gate_access(start, end, search, status)
+            return start, end, search, status
+
+        def row_values(entry):
+            return (
+                entry.get("name", ""),
+                entry.get("id_number", ""),
+                entry.get("date", ""),
+                entry.get("time", ""),
+                entry.get("status", ""),
+                entry.get("access_count", 0),
+                entry.get("location", "N/A")  # Added location
+            )
+
+        def load_page():
+            data, page["next_key"] = self.db.get_gate_access_page(
+                *page["filters"], page_size=PAGE_SIZE, after=page["next_key"]
+            )
             for entry in data:
-                values = (
-                    entry.get("name", ""),
-                    entry.get("id_number", ""),
-                    entry.get("date", ""),
-                    entry.get("time", ""),
-                    entry.get("status", ""),
-                    entry.get("access_count", 0),
-                    entry.get("location", "N/A")  # Added location
-                )
-                item_id = tree.insert("", tk.END, values=values)
+                item_id = tree.insert("", tk.END, values=row_values(entry))
                 
                 # Color code based on status
                 if entry.get("status") == "Granted":
@@ -294,7 +326,53 @@ class HistoryUI:
                     tree.item(item_id, tags=("denied",))
             
             # Update info label
-            info_label.config(text=f"Showing {len(data)} records")
+            page["count"] += len(data)
+            more = page["next_key"] is not None
+            info_label.config(
+                text=f"Showing {page['count']} records" + (" (more available)" if more else "")
+            )
+            load_more_btn.config(state=tk.NORMAL if more else tk.DISABLED)
+
+        def update_summary(start, end):
+            # Read from the rollup tables: cost doesn't grow with the log
+            per_hour = [0] * 24
+            granted = 0
+            for row in self.db.get_hourly_stats(start, end):
+                per_hour[row["hour"]] += row["access_count"]
+                if row["status"] == "Granted":
+                    granted += row["access_count"]
+            total = sum(per_hour)
+            peak = max(range(24), key=per_hour.__getitem__)
+
+            stat_cards["Total Accesses"].config(text=str(total))
+            stat_cards["Granted"].config(text=str(granted))
+            stat_cards["Denied"].config(text=str(total - granted))
+            stat_cards["Peak Hour"].config(text=f"{peak:02d}:00" if total else "-")
+
+            top = self.db.get_user_stats(start, end, limit=1)
+            top_user_label.config(
+                text=f"Most frequent user: {top[0]['name']} ({top[0]['access_count']} accesses)"
+                if top else "No accesses in the selected dates"
+            )
+
+            # Accesses per hour of day
+            hours_chart.delete("all")
+            width = max(hours_chart.winfo_width(), 1000)
+            bar = width / 24
+            for hour, count in enumerate(per_hour):
+                height = 70 * count / max(max(per_hour), 1)
+                x = hour * bar
+                hours_chart.create_rectangle(x + 2, 75 - height, x + bar - 2, 75,
+                                             fill="#9b59b6" if hour == peak and total else "#3498db",
+                                             width=0)
+                hours_chart.create_text(x + bar / 2, 85, text=f"{hour:02d}",
+                                        font=("Segoe UI", 7), fill="#7f8c8d")
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            page.update(filters=current_filters(), next_key=None, count=0)
+            load_page()
+            update_summary(*page["filters"][:2])
 
         def reset_filters():
             # Reset date entries to today
@@ -322,12 +400,16 @@ class HistoryUI:
             
             if path:
                 try:
+                    # Every matching record, streamed rather than only the
+                    # loaded pages
+                    count = 0
                     with open(path, 'w', newline='') as f:
                         writer = csv.writer(f)
                         writer.writerow(columns)
-                        for child in tree.get_children():
-                            writer.writerow(tree.item(child)['values'])
-                    messagebox.showinfo("Success", f"Exported to {path}")
+                        for entry in self.db.iter_gate_access(*current_filters()):
+                            writer.writerow(row_values(entry))
+                            count += 1
+                    messagebox.showinfo("Success", f"Exported {count} records to {path}")
                 except Exception as e:
                     messagebox.showerror("Error", str(e))
 
@@ -335,6 +417,7 @@ class HistoryUI:
         search_btn.config(command=refresh)
         reset_btn.config(command=reset_filters)
         export_btn.config(command=export)
+        load_more_btn.config(command=load_page)
         print_btn.config(command=lambda: messagebox.showinfo("Print", "Sending to printer..."))
         
         # Add hover effects to buttons
@@ -354,4 +437,7 @@ class HistoryUI:
         export_btn.bind("<Leave>", lambda event: on_enter(event, export_btn, "#3498db", "white"))
         
         print_btn.bind("<Enter>", lambda event: on_enter(event, print_btn, "#dcdde1", "#2c3e50"))
-        print_btn.bind("<Leave>", lambda event: on_enter(event, print_btn, "#ecf0f1", "#34495e"))
\ No newline at end of file
+        print_btn.bind("<Leave>", lambda event: on_enter(event, print_btn, "#ecf0f1", "#34495e"))
+
+        # Summary for the default (today's) date range
+        update_summary(*current_filters()[:2])
@@ -311,8 +311,13 @@ class MainUI:
 
     def train_system(self):
         try:
-            self.fr_system.train_model()
-            messagebox.showinfo("Training Complete", "Face recognition system trained successfully.")
+            # Only new registrations are trained; falls back to a full
+            # rebuild when samples were deleted or re-captured
+            faces_count = self.fr_system.train_model(incremental=True)
+            if faces_count == 0:
+                messagebox.showinfo("Training Complete", "No new faces to train; the model is up to date.")
+            else:
+                messagebox.showinfo("Training Complete", "Face recognition system trained successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Training failed: {e}")
 
@@ -11,6 +11,8 @@ from FaceRecognitionSystem.backend.dbModule import FaceRecognitionDB
 from FaceRecognitionSystem.backend.config import DB_CONFIG
 
 from NumberPlateSystem.utils.plate_recognition import extract_plate_text
+from NumberPlateSystem.utils.motion_gate import MotionGate
+from NumberPlateSystem.utils.plate_stabilizer import PlateStabilizer
 from NumberPlateSystem.data.vehicle_database import verify_vehicle
 from PIL import Image
 
@@ -21,6 +23,12 @@ class GateLogic:
         db = FaceRecognitionDB(**DB_CONFIG)
         self.face_system = FaceRecognitionSystem(db)
 
+        # Plate detection only reruns when the lane changed; otherwise
+        # the last plate read is reused
+        self.plate_gate = MotionGate()
+        self.plate_stabilizer = PlateStabilizer()
+        self.last_plate = None
+
     def process_frame(self, frame):
         """
         frame: OpenCV BGR frame
@@ -35,28 +43,39 @@ class GateLogic:
         }
 
         # ---------- FACE CHECK ----------
-        temp_path = "temp_gate.jpg"
-        cv2.imwrite(temp_path, frame)
-
-        face_result = self.face_system.recognize_face_from_image(temp_path)
+        faces = self.face_system.recognize_faces(frame)
+        known = [f["name"] for f in faces if f["status"] == "KNOWN"]
 
-        if face_result["status"] != "KNOWN":
+        if not known:
             results["decision"] = "DENIED"
             results["reason"] = "Unknown face detected"
         else:
-            results["faces"].append(face_result["name"])
+            results["faces"].extend(known)
 
         # ---------- PLATE CHECK ----------
-        pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        plate = extract_plate_text(pil_image)
+        # Frames keep going through while a plate is still being read
+        ran, plate = self.plate_gate.run(
+            frame, self.detect_plate, force=self.plate_stabilizer.pending
+        )
+        if ran:
+            self.last_plate = plate
+        else:
+            plate = self.last_plate
 
         if plate:
             results["plates"].append(plate)
             if not verify_vehicle(plate)["exists"]:
                 results["decision"] = "DENIED"
                 results["reason"] = "Unregistered vehicle detected"
+        elif self.plate_stabilizer.pending:
+            results["decision"] = "DENIED"
+            results["reason"] = "Reading number plate"
         else:
             results["decision"] = "DENIED"
             results["reason"] = "No number plate detected"
 
         return results
+
+    def detect_plate(self, frame):
+        pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return extract_plate_text(pil_image, stabilizer=self.plate_stabilizer)
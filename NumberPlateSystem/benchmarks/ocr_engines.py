@@ -0,0 +1,114 @@
+"""
+Benchmark: speed and accuracy of the OCR paths
+
+Renders --plates labelled synthetic plates (benchmarks/plates.py),
+thresholds them the way extract_plate_text does, then reads them:
+
+- pytesseract: one image_to_string call per plate, as the plate
+  recognizer did before the OCR pool (a tesseract process per plate)
+- each available engine called directly, one plate at a time (latency)
+- each available engine in an OCRPool of --workers threads, with all
+  plates submitted up front the way several cameras would
+
+Prints plates/sec, ms/plate, whole-plate accuracy and character
+accuracy for each. Engines that are not installed are reported as
+skipped. The native engine is trained on OpenCV's Hershey fonts, which
+the synthetic plates are drawn with too, so its accuracy here is an
+upper bound for camera images.
+
+#in terminal /egate/
+python -m NumberPlateSystem.benchmarks.ocr_engines --plates 200 --workers 2
+"""
+import argparse
+import time
+from difflib import SequenceMatcher
+
+from NumberPlateSystem.benchmarks.plates import labelled_plates
+from NumberPlateSystem.utils import ocr_engine
+from NumberPlateSystem.utils.ocr_engine import ENGINES, OCRPool, PytesseractEngine, engine_class
+from NumberPlateSystem.utils.plate_recognition import threshold_plate
+
+
+def read_per_process(images):
+    """The old path: image_to_string per plate"""
+    PytesseractEngine()  # sets tesseract_cmd
+    pytesseract = ocr_engine.pytesseract
+    texts = []
+    for image in images:
+        raw = pytesseract.image_to_string(image, config=PytesseractEngine.CONFIG)
+        texts.append("".join(c for c in raw.upper() if c in ocr_engine.PLATE_CHARS))
+    return texts
+
+
+def read_direct(name, images):
+    engine = engine_class(name)()
+    try:
+        engine.recognize(images[0])
+        start = time.perf_counter()
+        texts = [engine.recognize(image).text for image in images]
+        return texts, time.perf_counter() - start
+    finally:
+        engine.close()
+
+
+def read_pooled(name, workers, images):
+    pool = OCRPool(name, workers)
+    try:
+        pool.recognize(images[0])  # engines loaded before timing
+        start = time.perf_counter()
+        futures = [pool.submit(image) for image in images]
+        texts = [future.result().text for future in futures]
+        return texts, time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+def report(path, labels, texts, seconds):
+    correct = sum(text == label for text, label in zip(texts, labels))
+    # Characters in the right order, e.g. a dropped character costs one
+    chars = sum(sum(block.size for block in SequenceMatcher(None, label, text).get_matching_blocks())
+                for text, label in zip(texts, labels))
+    print(f"{label_column(path)} {len(texts) / seconds:>10.1f} {seconds * 1000 / len(texts):>10.2f} "
+          f"{correct / len(texts):>9.1%} {chars / sum(map(len, labels)):>9.1%}")
+
+
+def label_column(path):
+    return f"{path:>24}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plates", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    plates = labelled_plates(args.plates)
+    labels = [text for text, _ in plates]
+    images = [threshold_plate(image) for _, image in plates]
+    print(f"{args.plates} synthetic plates\n")
+    print(f"{label_column('path')} {'plates/s':>10} {'ms/plate':>10} {'plates':>9} {'chars':>9}")
+
+    if ocr_engine.pytesseract is None:
+        print(f"{label_column('pytesseract per plate')}  skipped: pytesseract not installed")
+    else:
+        try:
+            start = time.perf_counter()
+            texts = read_per_process(images)
+            report("pytesseract per plate", labels, texts, time.perf_counter() - start)
+        except Exception as e:
+            print(f"{label_column('pytesseract per plate')}  skipped: {e}")
+
+    for name in ENGINES:
+        runs = [(name, lambda: read_direct(name, images)),
+                (f"{name} pool x{args.workers}", lambda: read_pooled(name, args.workers, images))]
+        for path, run in runs:
+            try:
+                texts, seconds = run()
+            except Exception as e:
+                print(f"{label_column(path)}  skipped: {e}")
+                continue
+            report(path, labels, texts, seconds)
+
+
+if __name__ == "__main__":
+    main()
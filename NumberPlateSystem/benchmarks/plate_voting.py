@@ -0,0 +1,119 @@
+"""
+Benchmark: OCR calls and plate accuracy with per-stream voting
+
+--cars cars each wait at the gate for --ticks live ticks. Every tick is
+a fresh camera frame of the car (new sensor noise and focus blur), run
+through extract_plate_text once with no stabilizer, the way every tick
+was read before, and once the way the live loops read it now: behind
+the MotionGate, with the stream's PlateStabilizer, which keeps frames
+coming while it is reading and stops OCR once the plate is locked.
+
+Prints OCR calls per car and how often the plate returned was right
+and wrong: per tick without the stabilizer, per car (its first plate
+returned) with it, plus how many ticks that took.
+
+#in terminal /egate/
+python -m NumberPlateSystem.benchmarks.plate_voting --cars 30 --ticks 10
+"""
+import argparse
+import contextlib
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from NumberPlateSystem.benchmarks.plates import lane_background, park_car, random_plate_text, render_plate
+from NumberPlateSystem.utils.motion_gate import MotionGate
+from NumberPlateSystem.utils.ocr_engine import get_ocr_pool, use_ocr_engine
+from NumberPlateSystem.utils.plate_recognition import extract_plate_text
+from NumberPlateSystem.utils.plate_stabilizer import PlateStabilizer
+
+
+def camera_frame(scene, rng, noise):
+    """One noisy, slightly out-of-focus shot of a scene (PIL, RGB)"""
+    frame = scene + rng.normal(0, noise, scene.shape)
+    frame = cv2.GaussianBlur(np.clip(frame, 0, 255).astype(np.uint8), (5, 5), rng.uniform(0.1, 1.4))
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+class CountingPool:
+    """Counts recognize() calls on the shared OCR pool"""
+
+    def __init__(self, pool):
+        self.calls = 0
+        self._recognize = pool.recognize
+        pool.recognize = self.recognize
+
+    def recognize(self, image, timeout=None):
+        self.calls += 1
+        return self._recognize(image, timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cars", type=int, default=30)
+    parser.add_argument("--ticks", type=int, default=10, help="live ticks each car waits")
+    parser.add_argument("--noise", type=float, default=14, help="sensor noise (gray levels)")
+    parser.add_argument("--engine", default="native", help="OCR engine")
+    args = parser.parse_args()
+
+    use_ocr_engine(args.engine)
+    counter = CountingPool(get_ocr_pool())
+    rng = np.random.default_rng(0)
+    background = lane_background(rng)
+
+    single = {'calls': 0, 'right': 0, 'wrong': 0}
+    voted = {'calls': 0, 'right': 0, 'wrong': 0, 'locked': 0, 'ticks': []}
+    stabilizer = PlateStabilizer()
+    gate = MotionGate(refresh_seconds=None)
+    empty_lane = Image.fromarray(cv2.cvtColor(background, cv2.COLOR_BGR2RGB))
+
+    def detect(frame):
+        return extract_plate_text(frame, stabilizer=stabilizer)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.cars):
+            text = random_plate_text(rng)
+            scene = park_car(background, render_plate(text, rng, height=36, tilt=0)).astype(np.float32)
+            frames = [camera_frame(scene, rng, args.noise) for _ in range(args.ticks)]
+
+            # One reading per tick
+            start = counter.calls
+            for frame in frames:
+                plate = extract_plate_text(frame)
+                single['right'] += plate == text
+                single['wrong'] += plate not in (None, text)
+            single['calls'] += counter.calls - start
+
+            # Gate + stabilizer, as the live loops use them
+            start = counter.calls
+            first = None
+            for tick, frame in enumerate(frames, 1):
+                _, plate = gate.run(frame, detect, force=stabilizer.pending)
+                if plate and first is None:
+                    first = plate
+                    voted['ticks'].append(tick)
+            voted['right'] += first == text
+            voted['wrong'] += first not in (None, text)
+            voted['locked'] += stabilizer.locked is not None
+            voted['calls'] += counter.calls - start
+
+            # The car drives off
+            for _ in range(stabilizer.release_after):
+                gate.run(empty_lane, detect, force=True)
+
+    ticks = args.cars * args.ticks
+    print(f"{args.cars} cars x {args.ticks} ticks, noise {args.noise:g}, OCR engine {args.engine}\n")
+    print(f"{'':>12} {'OCR/car':>8} {'right':>7} {'wrong':>7}")
+    print(f"{'every tick':>12} {single['calls'] / args.cars:>8.1f} "
+          f"{single['right'] / ticks:>7.1%} {single['wrong'] / ticks:>7.1%}  (of ticks)")
+    print(f"{'gate+voting':>12} {voted['calls'] / args.cars:>8.1f} "
+          f"{voted['right'] / args.cars:>7.1%} {voted['wrong'] / args.cars:>7.1%}  (of cars)")
+    if voted['ticks']:
+        print(f"\nfirst plate after {np.mean(voted['ticks']):.1f} ticks on average, "
+              f"{voted['locked']}/{args.cars} cars locked")
+
+
+if __name__ == "__main__":
+    main()
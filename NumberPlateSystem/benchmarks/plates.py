@@ -0,0 +1,95 @@
+"""
+Synthetic labelled number plates for the OCR benchmarks
+
+Plates follow the Indian format (e.g. TS09EF1234), drawn with OpenCV
+fonts on a white plate with a black border, then slightly rotated,
+blurred and noised so they look like camera crops. lane_background and
+park_car build whole camera frames around them.
+"""
+import string
+
+import cv2
+import numpy as np
+
+FONTS = [cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX]
+
+
+def random_plate_text(rng):
+    """Random plate number like TS09EF1234"""
+    letters = string.ascii_uppercase
+    return ("".join(rng.choice(list(letters), 2))
+            + f"{rng.integers(1, 100):02d}"
+            + "".join(rng.choice(list(letters), 2))
+            + f"{rng.integers(0, 10000):04d}")
+
+
+def render_plate(text, rng, height=60, tilt=3):
+    """
+    Draw a plate crop
+
+    Args:
+        text: Plate number
+        rng: numpy.random.Generator
+        height: Plate height in pixels
+        tilt: Largest rotation, in degrees (0 for a plate pasted into
+            a whole frame, which has to keep its straight outline)
+
+    Returns:
+        BGR plate image
+    """
+    font = FONTS[rng.integers(len(FONTS))]
+    scale = height / 36
+    thickness = max(2, int(round(height / 22)))
+    (text_w, text_h), _ = cv2.getTextSize(text, font, scale, thickness)
+
+    margin = height // 5
+    width = text_w + 2 * margin
+    plate = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.rectangle(plate, (1, 1), (width - 2, height - 2), (0, 0, 0), 2)
+    cv2.putText(plate, text, (margin, (height + text_h) // 2), font, scale,
+                (0, 0, 0), thickness, cv2.LINE_AA)
+
+    # Camera-like distortions
+    angle = rng.uniform(-tilt, tilt)
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    plate = cv2.warpAffine(plate, matrix, (width, height), borderValue=(255, 255, 255))
+    plate = cv2.GaussianBlur(plate, (3, 3), rng.uniform(0.3, 1.0))
+    noise = rng.normal(0, 8, plate.shape)
+    return np.clip(plate + noise, 0, 255).astype(np.uint8)
+
+
+def labelled_plates(count, seed=0, height=60):
+    """count (text, BGR plate image) pairs, the same for the same seed"""
+    rng = np.random.default_rng(seed)
+    plates = []
+    for _ in range(count):
+        text = random_plate_text(rng)
+        plates.append((text, render_plate(text, rng, height)))
+    return plates
+
+
+def lane_background(rng, width=640, height=480):
+    """Empty lane: a shaded road with some texture (BGR)"""
+    shade = np.linspace(90, 150, height, dtype=np.float32)[:, None]
+    texture = cv2.GaussianBlur(rng.normal(0, 12, (height, width)).astype(np.float32), (9, 9), 0)
+    road = np.clip(shade + texture, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(road, cv2.COLOR_GRAY2BGR)
+
+
+def park_car(frame, plate, x=None):
+    """
+    Draw a car body with plate on it into the lane, centred unless x is given
+
+    Returns:
+        New BGR frame
+    """
+    frame = frame.copy()
+    height, width = frame.shape[:2]
+    plate_h, plate_w = plate.shape[:2]
+    left = (width - plate_w) // 2 if x is None else x
+    top = int(height * 0.6)
+    cv2.rectangle(frame, (left - 60, top - 150), (left + plate_w + 60, top + plate_h + 60),
+                  (40, 40, 120), -1)
+    visible = frame[top:top + plate_h, max(left, 0):min(left + plate_w, width)]
+    visible[:] = plate[:, max(0, -left):max(0, -left) + visible.shape[1]]
+    return frame
@@ -0,0 +1,107 @@
+"""
+Benchmark: plate lookups and registrations with --plates registered
+
+Writes a scratch registered_vehicles.json with --plates plates and
+times, per call:
+
+- verify: the old path (parse the whole file, scan the list) against
+  VehicleRegistry.get, for a registered plate and an unknown one
+- register: the old path (parse, list membership test, rewrite the
+  file) against VehicleRegistry.register (index test, append)
+- the registry's reload after another process changed the file
+
+#in terminal /egate/
+python -m NumberPlateSystem.benchmarks.vehicle_registry --plates 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from NumberPlateSystem.benchmarks.plates import random_plate_text
+from NumberPlateSystem.data.vehicle_database import VehicleRegistry
+
+
+# What verify_vehicle / register_vehicle did before
+def legacy_verify(path, plate):
+    with open(path, 'r') as f:
+        registered_data = json.load(f)
+    for entry in registered_data:
+        if entry['plate'] == plate:
+            return {'exists': True, 'registered_at': entry.get('registered_at', 'Unknown')}
+    return {'exists': False}
+
+
+def legacy_register(path, plate):
+    with open(path, 'r') as f:
+        registered_data = json.load(f)
+    if plate in [entry['plate'] for entry in registered_data]:
+        return {'success': False}
+    registered_data.append({"plate": plate, "registered_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+    with open(path, 'w') as f:
+        json.dump(registered_data, f, indent=2)
+    return {'success': True}
+
+
+def per_call_ms(function, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        function(i)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plates", type=int, default=100000)
+    parser.add_argument("--calls", type=int, default=20, help="calls timed on the old paths")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    plates = list(dict.fromkeys(random_plate_text(rng) for _ in range(args.plates)))
+    path = os.path.join(tempfile.mkdtemp(), "registered_vehicles.json")
+    with open(path, "w") as f:
+        json.dump([{"plate": p, "registered_at": "2025-01-01 00:00:00"} for p in plates], f, indent=2)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"{len(plates)} registered plates ({size_mb:.1f} MB)\n")
+
+    registry = VehicleRegistry(path)
+    start = time.perf_counter()
+    registry.refresh()
+    first_load = (time.perf_counter() - start) * 1000
+
+    known = plates[len(plates) // 2]
+    fast_calls = args.calls * 1000
+    rows = [
+        ("verify, registered", lambda i: legacy_verify(path, known), lambda i: registry.get(known)),
+        ("verify, unknown", lambda i: legacy_verify(path, "ZZ00ZZ0000"), lambda i: registry.get("ZZ00ZZ0000")),
+    ]
+    print(f"{'':>20} {'old ms':>10} {'registry ms':>12} {'speedup':>9}")
+    for label, old, new in rows:
+        old_ms = per_call_ms(old, args.calls)
+        new_ms = per_call_ms(new, fast_calls)
+        print(f"{label:>20} {old_ms:>10.2f} {new_ms:>12.4f} {old_ms / new_ms:>8.0f}x")
+
+    old_ms = per_call_ms(lambda i: legacy_register(path, f"OLD{i:07d}"), args.calls)
+    registry.refresh()
+    new_ms = per_call_ms(lambda i: registry.register(f"NEW{i:07d}"), args.calls * 10)
+    print(f"{'register':>20} {old_ms:>10.2f} {new_ms:>12.4f} {old_ms / new_ms:>8.0f}x")
+
+    # Another process registers a plate: the next lookup reloads once
+    legacy_register(path, "EXT0000001")
+    start = time.perf_counter()
+    found = registry.get("EXT0000001") is not None
+    reload_ms = (time.perf_counter() - start) * 1000
+    print(f"\nfirst load {first_load:.0f} ms, reload after an outside change {reload_ms:.0f} ms "
+          f"(found: {found})")
+
+    # The appended file is still the JSON the old code reads and writes
+    with open(path) as f:
+        assert len(json.load(f)) == len(registry.all())
+
+
+if __name__ == "__main__":
+    main()
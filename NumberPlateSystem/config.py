@@ -22,6 +22,35 @@ FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 CAPTURE_INTERVAL = 5
 
+# OCR settings
+# 'tesserocr' keeps Tesseract loaded in-process (tesserocr package),
+# 'pytesseract' starts the tesseract program for every plate, 'native'
+# reads the characters with the built-in classifier (no Tesseract
+# needed), 'auto' uses tesserocr when it is installed
+OCR_ENGINE = "auto"
+OCR_WORKERS = 2
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # pytesseract only
+TESSDATA_PATH = None  # tesserocr only; None = its built-in tessdata path
+
+# Live detection gate (utils/motion_gate.py)
+# Plate detection only runs on a frame when at least MOTION_MIN_CHANGED
+# of the lane ROI differs from the frame it last ran on by more than
+# MOTION_PIXEL_THRESHOLD gray levels. Lower values = more sensitive.
+MOTION_GATE_ENABLED = True
+LANE_ROI = None  # (x, y, width, height) as fractions of the frame; None = whole frame
+MOTION_PIXEL_THRESHOLD = 25
+MOTION_MIN_CHANGED = 0.02
+MOTION_REFRESH_SECONDS = 60  # detect at least this often anyway; None = never
+MOTION_SETTLE_FRAMES = 2  # frames still checked after the lane stops changing
+
+# Live plate voting (utils/plate_stabilizer.py)
+# A plate is locked (and no longer OCR'd while it stays in view) once
+# PLATE_MIN_READINGS readings give every character PLATE_CONFIDENCE
+PLATE_VOTE_FRAMES = 5
+PLATE_CONFIDENCE = 70
+PLATE_MIN_READINGS = 2
+PLATE_RELEASE_MISSES = 3  # frames without a plate before the vehicle counts as gone
+
 # Color scheme (UI – safe to keep)
 DARK_BG = "#1e1e2e"
 LIGHT_BG = "#313244"
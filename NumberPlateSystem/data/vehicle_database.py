@@ -1,102 +1,229 @@
 """
 Database operations for registered vehicles
+
+Vehicles live in a JSON list in DATA_FILE. VehicleRegistry keeps that
+list in memory with a hash index by normalized plate, and re-reads the
+file only when its modification time or size changed (e.g. it was
+edited by hand or by another process), so verifying a plate is a dict
+lookup instead of a parse and a scan of the whole file.
 """
 import json
 import os
+import textwrap
+import threading
 from datetime import datetime
 from NumberPlateSystem.config import DATA_FILE
 
+
+def normalize_plate(plate):
+    """
+    Key a plate is indexed by: upper case letters and digits only
+
+    "TN 28 BJ 2223", "tn28bj2223" and "TN-28-BJ-2223" are one plate.
+    """
+    plate = str(plate).upper()
+    if plate.isalnum():
+        return plate
+    return "".join(char for char in plate if char.isalnum())
+
+
+class VehicleRegistry:
+    """Registered vehicles of one JSON file, indexed by normalized plate"""
+
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+        self._entries = []
+        self._index = {}
+        self._stamp = None
+        self._lock = threading.RLock()
+
+    # -------------------------------------------------
+    # FILE
+    # -------------------------------------------------
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        """Re-read the file if it changed since it was last read or written"""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return
+            entries = []
+            if stamp is not None:
+                try:
+                    with open(self.path, 'r') as f:
+                        entries = json.load(f)
+                except (json.JSONDecodeError, IOError) as e:
+                    print(f"Error loading database: {e}")
+            self._set_entries(entries)
+            self._stamp = stamp
+
+    def _set_entries(self, entries):
+        self._entries = entries
+        self._index = {}
+        for entry in entries:
+            # The first registration of a plate wins, as the scan did
+            self._index.setdefault(normalize_plate(entry['plate']), entry)
+
+    def _write(self, entries):
+        try:
+            # Ensure directory exists
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            with open(self.path, 'w') as f:
+                json.dump(entries, f, indent=2)
+        except IOError as e:
+            print(f"Error saving database: {e}")
+            return False
+        self._stamp = self._file_stamp()
+        return True
+
+    def _append(self, entry):
+        """
+        Add one entry to the end of the file without rewriting it
+
+        Overwrites the closing bracket of the list with the entry,
+        laid out as json.dump(indent=2) would; falls back to writing
+        the whole file if the file does not end the way it expects.
+        """
+        try:
+            with open(self.path, 'rb+') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                f.seek(max(0, end - 64))
+                tail = f.read()
+                bracket = tail.rstrip().rfind(b"]")
+                before = tail[:bracket].rstrip()
+                if bracket < 0 or not before.endswith(b"}"):
+                    raise ValueError("unexpected end of file")
+                f.seek(end - len(tail) + len(before))
+                f.truncate()
+                f.write((",\n" + textwrap.indent(json.dumps(entry, indent=2), "  ") + "\n]").encode())
+        except (OSError, ValueError):
+            return self._write(self._entries)
+        self._stamp = self._file_stamp()
+        return True
+
+    # -------------------------------------------------
+    # VEHICLES
+    # -------------------------------------------------
+
+    def all(self):
+        """List of all vehicle entries"""
+        with self._lock:
+            self.refresh()
+            return list(self._entries)
+
+    def get(self, plate):
+        """Entry registered for plate, or None"""
+        with self._lock:
+            self.refresh()
+            return self._index.get(normalize_plate(plate))
+
+    def register(self, plate):
+        """Register plate; returns the new entry, or None if it is already registered"""
+        with self._lock:
+            self.refresh()
+            key = normalize_plate(plate)
+            if key in self._index:
+                return None
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            entry = {"plate": plate, "registered_at": timestamp}
+            self._entries.append(entry)
+            self._index[key] = entry
+            if len(self._entries) > 1 and self._stamp is not None:
+                self._append(entry)
+            else:
+                self._write(self._entries)
+            return entry
+
+    def remove(self, plate):
+        """Remove every entry for plate; returns True if there was one"""
+        with self._lock:
+            self.refresh()
+            key = normalize_plate(plate)
+            if key not in self._index:
+                return False
+            self._set_entries([e for e in self._entries if normalize_plate(e['plate']) != key])
+            self._write(self._entries)
+            return True
+
+    def replace(self, entries):
+        """Replace all entries (and the file)"""
+        with self._lock:
+            self._set_entries(list(entries))
+            return self._write(self._entries)
+
+
+# Shared registry of DATA_FILE, used by the functions below
+registry = VehicleRegistry()
+
+
 def load_database():
     """
     Load vehicle database from file
-    
+
     Returns:
         List of registered vehicle entries
     """
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading database: {e}")
-            return []
-    else:
-        return []
+    return registry.all()
 
 def save_database(data):
     """
     Save vehicle database to file
-    
+
     Args:
         data: List of vehicle entries
     """
-    try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-        
-        with open(DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-            
-        return True
-    except IOError as e:
-        print(f"Error saving database: {e}")
-        return False
+    return registry.replace(data)
 
 def register_vehicle(plate):
     """
     Register a new vehicle in database
-    
+
     Args:
         plate: Plate number text
-        
+
     Returns:
         Dict with registration result
     """
-    # Load current database
-    registered_data = load_database()
-    
-    # Check if already registered
-    if plate in [entry['plate'] for entry in registered_data]:
+    entry = registry.register(plate)
+    if entry is None:
         return {
             'success': False,
             'message': 'Plate already registered'
         }
-    
-    # Add new entry
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    new_entry = {"plate": plate, "registered_at": timestamp}
-    registered_data.append(new_entry)
-    
-    # Save updated database
-    save_database(registered_data)
-    
+
     return {
         'success': True,
         'message': 'Plate registered successfully',
-        'timestamp': timestamp
+        'timestamp': entry['registered_at']
     }
 
 def verify_vehicle(plate):
     """
     Verify if a vehicle is registered
-    
+
     Args:
         plate: Plate number text
-        
+
     Returns:
         Dict with verification result
     """
-    # Load current database
-    registered_data = load_database()
-    
-    # Check if plate exists
-    for entry in registered_data:
-        if entry['plate'] == plate:
-            return {
-                'exists': True,
-                'registered_at': entry.get('registered_at', 'Unknown')
-            }
-    
+    entry = registry.get(plate)
+    if entry is not None:
+        return {
+            'exists': True,
+            'registered_at': entry.get('registered_at', 'Unknown')
+        }
+
     return {
         'exists': False
     }
@@ -104,7 +231,7 @@ def verify_vehicle(plate):
 def get_all_vehicles():
     """
     Get all registered vehicles
-    
+
     Returns:
         List of all vehicle entries
     """
@@ -113,22 +240,11 @@ def get_all_vehicles():
 def remove_vehicle(plate):
     """
     Remove a vehicle from database
-    
+
     Args:
         plate: Plate number text
-        
+
     Returns:
         Boolean indicating success
     """
-    # Load current database
-    registered_data = load_database()
-    
-    # Filter out the entry
-    updated_data = [entry for entry in registered_data if entry['plate'] != plate]
-    
-    # Check if any entry was removed
-    if len(updated_data) < len(registered_data):
-        save_database(updated_data)
-        return True
-    
-    return False
\ No newline at end of file
+    return registry.remove(plate)
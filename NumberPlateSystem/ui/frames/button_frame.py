@@ -5,6 +5,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from NumberPlateSystem.ui.components import HoverButton
 from NumberPlateSystem.utils.plate_recognition import extract_plate_text
+from NumberPlateSystem.utils.motion_gate import MotionGate
+from NumberPlateSystem.utils.plate_stabilizer import PlateStabilizer
 from NumberPlateSystem.data.vehicle_database import register_vehicle, verify_vehicle, get_all_vehicles
 from NumberPlateSystem.config import BTN_BG, TEXT_COLOR
 
@@ -112,6 +114,11 @@ class ButtonFrame:
         # Track if live verification is active
         self.live_verification_active = False
         self.live_verify_job = None
+
+        # Skips live frames where nothing changed in the lane
+        self.plate_gate = MotionGate()
+        # Votes over this stream's readings until the plate is certain
+        self.plate_stabilizer = PlateStabilizer()
     
     def handle_upload_image(self):
         """Handle image upload button click"""
@@ -215,6 +222,8 @@ class ButtonFrame:
         self.app.update_status("Live verification started")
         
         # Start the verification process
+        self.plate_gate.reset()
+        self.plate_stabilizer.reset()
         self.perform_live_verification()
         
     def stop_live_verification(self):
@@ -226,7 +235,7 @@ class ButtonFrame:
             self.frame.after_cancel(self.live_verify_job)
             self.live_verify_job = None
             
-        self.app.update_status("Live verification stopped")
+        self.app.update_status(f"Live verification stopped ({self.plate_gate.summary()})")
         
     def perform_live_verification(self):
         """Perform live verification at regular intervals"""
@@ -240,12 +249,15 @@ class ButtonFrame:
         current_image = image_frame.capture_camera_frame()
         
         if current_image:
-            self.app.update_status("Processing live camera frame...")
-            
-            # Process the image with AI
-            plate = extract_plate_text(current_image, self.app.update_status)
+            # Process the image with AI, unless the lane looks the same
+            # as the last time it was processed
+            ran, plate = self.plate_gate.run(
+                current_image, self.detect_live_plate, force=self.plate_stabilizer.pending
+            )
             
-            if plate:
+            if not ran:
+                self.app.update_status("No change in lane")
+            elif plate:
                 # Verify the plate
                 result = verify_vehicle(plate)
                 
@@ -272,6 +284,11 @@ class ButtonFrame:
         # Schedule next verification (every 5 seconds)
         self.live_verify_job = self.frame.after(5000, self.perform_live_verification)
     
+    def detect_live_plate(self, image):
+        """Run plate detection on a live frame"""
+        self.app.update_status("Processing live camera frame...")
+        return extract_plate_text(image, self.app.update_status, self.plate_stabilizer)
+    
     def get_current_time(self):
         """Get formatted current time"""
         from datetime import datetime
@@ -0,0 +1,204 @@
+"""
+Plate character segmentation and a k-nearest-neighbour glyph classifier
+
+Plates have one fixed alphabet and a handful of fonts, so reading them
+does not need a general OCR engine: the thresholded plate is split into
+character blobs by connected components, each blob is scaled to a small
+square glyph, and its k nearest glyphs among ones rendered from
+OpenCV's fonts at start-up vote on the character. The neighbours are
+found with one matrix product against all training glyphs, which is
+several times quicker than cv2.ml.KNearest for this set.
+"""
+import functools
+
+import cv2
+import numpy as np
+
+# Glyphs are compared as GLYPH_SIZE x GLYPH_SIZE binary images
+GLYPH_SIZE = 16
+
+# Neighbours that vote for each glyph
+K = 5
+
+# A glyph this many pixels away from its nearest training glyph gets
+# zero confidence
+MAX_MISMATCH = 0.3 * GLYPH_SIZE * GLYPH_SIZE
+
+# OpenCV fonts the classifier is trained on
+TRAINING_FONTS = [
+    cv2.FONT_HERSHEY_SIMPLEX,
+    cv2.FONT_HERSHEY_DUPLEX,
+    cv2.FONT_HERSHEY_COMPLEX,
+    cv2.FONT_HERSHEY_TRIPLEX,
+]
+
+
+def segment_characters(thresh):
+    """
+    Split a thresholded plate into character masks, left to right
+
+    Args:
+        thresh: Binary plate image, dark characters on a light plate
+            (as threshold_plate returns it)
+
+    Returns:
+        List of binary masks (255 = ink), one per character, cropped to
+        the character
+    """
+    ink = cv2.bitwise_not(thresh)
+    plate_h, plate_w = thresh.shape[:2]
+
+    # Erase the plate frame, which characters near the edge can touch
+    rows = cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, plate_w // 3), 1))
+    columns = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(1, int(plate_h * 0.9))))
+    frame = cv2.morphologyEx(ink, cv2.MORPH_OPEN, rows) | cv2.morphologyEx(ink, cv2.MORPH_OPEN, columns)
+    ink = cv2.subtract(ink, cv2.dilate(frame, np.ones((5, 5), np.uint8)))
+
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+    blobs = []
+    for label in range(1, count):
+        x, y, w, h, area = stats[label]
+        # Characters are tall; what is left of the frame, bolts and
+        # specks is not
+        if not 0.3 * plate_h <= h <= 0.95 * plate_h:
+            continue
+        if w > plate_w / 2 or area < 0.05 * w * h:
+            continue
+        blobs.append((x, y, w, h, label))
+
+    if not blobs:
+        return []
+
+    # Drop blobs far off the common character height (e.g. a state emblem)
+    median_h = np.median([h for _, _, _, h, _ in blobs])
+    blobs = [b for b in blobs if 0.75 * median_h <= b[3] <= 1.25 * median_h]
+
+    # Neighbouring characters that touch come out as one wide blob
+    narrow = [w for _, _, w, h, _ in blobs if w <= h]
+    char_w = np.median(narrow) if narrow else np.median([h for *_, h, _ in blobs]) * 0.6
+
+    masks = []
+    for x, y, w, h, label in sorted(blobs):
+        crop = (labels[y:y + h, x:x + w] == label).astype(np.uint8) * 255
+        pieces = int(round(w / char_w)) if w > 1.6 * char_w else 1
+        for piece in _split_columns(crop, pieces):
+            piece = _trim(piece)
+            if piece is not None:
+                masks.append(piece)
+    return masks
+
+
+def _split_columns(mask, pieces):
+    """Cut a mask into pieces at the emptiest columns near even spacing"""
+    if pieces <= 1:
+        return [mask]
+    width = mask.shape[1]
+    ink = np.count_nonzero(mask, axis=0)
+    window = max(1, width // (pieces * 5))
+    cuts = [0]
+    for i in range(1, pieces):
+        guess = i * width // pieces
+        low, high = max(cuts[-1] + 1, guess - window), min(width - 1, guess + window)
+        cuts.append(low + int(np.argmin(ink[low:high + 1])))
+    cuts.append(width)
+    return [mask[:, a:b] for a, b in zip(cuts, cuts[1:])]
+
+
+def _trim(mask):
+    """Crop a mask to its ink; None if it has none"""
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return None
+    x, y, w, h = cv2.boundingRect(points)
+    return mask[y:y + h, x:x + w]
+
+
+def glyph_features(mask):
+    """
+    Scale a character mask into the middle of a square, keeping its shape
+
+    Returns:
+        float32 vector of GLYPH_SIZE * GLYPH_SIZE values in {0, 1}
+    """
+    h, w = mask.shape
+    side = max(h, w)
+    square = np.zeros((side, side), dtype=np.uint8)
+    top, left = (side - h) // 2, (side - w) // 2
+    square[top:top + h, left:left + w] = mask
+    glyph = cv2.resize(square, (GLYPH_SIZE, GLYPH_SIZE), interpolation=cv2.INTER_AREA)
+    return (glyph > 127).astype(np.float32).ravel()
+
+
+def render_glyphs(chars, fonts=None):
+    """
+    Training glyphs for chars in every font at a few weights and slants
+
+    Returns:
+        (features, labels): float32 array (n, GLYPH_SIZE**2) and the
+        characters the rows show
+    """
+    features, labels = [], []
+    for font in fonts or TRAINING_FONTS:
+        for thickness in range(2, 9, 2):
+            for angle in (-4, 0, 4):
+                for char in chars:
+                    canvas = np.zeros((80, 80), dtype=np.uint8)
+                    cv2.putText(canvas, char, (14, 62), font, 2.0, 255, thickness, cv2.LINE_AA)
+                    matrix = cv2.getRotationMatrix2D((40, 40), angle, 1.0)
+                    canvas = cv2.warpAffine(canvas, matrix, (80, 80))
+                    _, canvas = cv2.threshold(canvas, 127, 255, cv2.THRESH_BINARY)
+                    features.append(glyph_features(_trim(canvas)))
+                    labels.append(char)
+    return np.array(features, dtype=np.float32), labels
+
+
+@functools.lru_cache(maxsize=None)
+def _training_set(chars):
+    # Rendered once per process, shared by every classifier
+    return render_glyphs(chars)
+
+
+class CharClassifier:
+    """k-nearest-neighbour classifier over rendered plate glyphs"""
+
+    def __init__(self, chars):
+        self.chars = chars
+        self.glyphs, labels = _training_set(chars)
+        self.labels = np.array([chars.index(c) for c in labels])
+        self.glyph_norms = np.einsum("ij,ij->i", self.glyphs, self.glyphs)
+
+    def classify(self, masks):
+        """
+        Read character masks
+
+        Args:
+            masks: Masks from segment_characters
+
+        Returns:
+            List of (character, confidence 0-100) pairs
+        """
+        if not masks:
+            return []
+        samples = np.array([glyph_features(mask) for mask in masks], dtype=np.float32)
+
+        # Squared distances (= differing pixels) to every training glyph
+        distances = (np.einsum("ij,ij->i", samples, samples)[:, None]
+                     + self.glyph_norms[None, :] - 2 * samples @ self.glyphs.T)
+        nearest = np.argpartition(distances, K, axis=1)[:, :K]
+
+        pairs = []
+        for row, neighbours in zip(distances, nearest):
+            neighbours = neighbours[np.argsort(row[neighbours])]
+            votes = np.bincount(self.labels[neighbours], minlength=len(self.chars))
+            # Ties go to the class of the nearest neighbour
+            best = self.labels[neighbours[0]]
+            if votes.max() > votes[best]:
+                best = int(np.argmax(votes))
+
+            # Share of neighbours agreeing, scaled down the further the
+            # glyph is from anything seen in training
+            agreement = votes[best] / K
+            fit = max(0.0, 1.0 - row[neighbours[0]] / MAX_MISMATCH)
+            pairs.append((self.chars[best], round(float(100 * agreement * fit), 1)))
+        return pairs
@@ -0,0 +1,155 @@
+"""
+Scene-change gate in front of plate detection
+
+Live verification used to run the full plate chain (bilateral filter,
+Canny, findContours, OCR) on every scheduled frame, even with an empty
+lane or the same car parked in it. MotionGate compares a small, blurred
+grayscale copy of the lane ROI with the frame detection last ran on,
+and only lets a frame through when enough of the ROI changed; sensor
+noise and slow light changes stay under the thresholds. A few frames
+after a change are let through as well, so a car that was still moving
+(blurred) when it was first seen is read again once it has stopped.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from NumberPlateSystem.config import (
+    LANE_ROI, MOTION_GATE_ENABLED, MOTION_MIN_CHANGED, MOTION_PIXEL_THRESHOLD, MOTION_REFRESH_SECONDS,
+    MOTION_SETTLE_FRAMES
+)
+
+# ROI is compared at this width (pixels)
+GATE_WIDTH = 160
+
+
+class MotionGate:
+    """Decide, frame by frame, whether the lane changed enough to detect again"""
+
+    def __init__(self, roi=LANE_ROI, pixel_threshold=MOTION_PIXEL_THRESHOLD,
+                 min_changed=MOTION_MIN_CHANGED, refresh_seconds=MOTION_REFRESH_SECONDS,
+                 settle_frames=MOTION_SETTLE_FRAMES, enabled=MOTION_GATE_ENABLED):
+        """
+        Args:
+            roi: (x, y, width, height) of the lane as fractions of the
+                frame, or None for the whole frame
+            pixel_threshold: Gray-level difference (0-255) that counts a
+                pixel as changed
+            min_changed: Fraction of ROI pixels that must change
+            refresh_seconds: Let a frame through at least this often
+                anyway (None = never)
+            settle_frames: Frames let through after the lane stops
+                changing
+            enabled: False lets every frame through
+        """
+        self.roi = roi
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.refresh_seconds = refresh_seconds
+        self.settle_frames = settle_frames
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame and counters; the next frame goes through"""
+        self.reference = None
+        self.reference_at = 0.0
+        self.settling = 0
+        self.frames = 0
+        self.detections = 0
+        self.gate_cpu = 0.0
+        self.detection_cpu = 0.0
+
+    def _lane(self, frame):
+        """Small blurred grayscale copy of the ROI"""
+        # Channel order does not matter for differencing, so PIL (RGB)
+        # and OpenCV (BGR) frames are both taken as they are
+        image = np.asarray(frame)
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+        if self.roi:
+            height, width = image.shape
+            x, y, w, h = self.roi
+            image = image[int(y * height):int((y + h) * height), int(x * width):int((x + w) * width)]
+
+        scale = GATE_WIDTH / image.shape[1]
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(image, (5, 5), 0)
+
+    def changed(self, frame, now=None, force=False):
+        """
+        Whether frame differs enough from the last frame detection ran on
+
+        Args:
+            frame: PIL Image or NumPy frame
+            now: time.monotonic() value (for tests and replays)
+            force: Let the frame through regardless, e.g. while a plate
+                is still being read
+
+        Returns:
+            True if detection should run on this frame (it then becomes
+            the new reference)
+        """
+        start = time.process_time()
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+
+        lane = self._lane(frame) if self.enabled else None
+        moved = False
+        if force or not self.enabled or self.reference is None or self.reference.shape != lane.shape:
+            run = True
+        else:
+            diff = cv2.absdiff(lane, self.reference)
+            moved = np.count_nonzero(diff > self.pixel_threshold) / diff.size >= self.min_changed
+            run = moved or self.settling > 0 or (
+                self.refresh_seconds is not None and now - self.reference_at >= self.refresh_seconds
+            )
+
+        self.settling = self.settle_frames if moved else max(0, self.settling - 1)
+        if run:
+            self.reference = lane
+            self.reference_at = now
+            self.detections += 1
+        self.gate_cpu += time.process_time() - start
+        return run
+
+    def run(self, frame, detect, now=None, force=False):
+        """
+        detect(frame) if the lane changed
+
+        Returns:
+            (ran, result): result is None when detection was skipped
+        """
+        if not self.changed(frame, now, force):
+            return False, None
+        start = time.process_time()
+        try:
+            return True, detect(frame)
+        finally:
+            self.detection_cpu += time.process_time() - start
+
+    def stats(self):
+        """
+        Frames seen and CPU time spent and (by estimate) saved
+
+        The saving assumes a skipped frame would have cost the average
+        CPU time of the detections that did run.
+        """
+        skipped = self.frames - self.detections
+        per_detection = self.detection_cpu / self.detections if self.detections else 0.0
+        return {
+            'frames': self.frames,
+            'detections': self.detections,
+            'skipped': skipped,
+            'gate_cpu_s': round(self.gate_cpu, 3),
+            'detection_cpu_s': round(self.detection_cpu, 3),
+            'saved_cpu_s': round(skipped * per_detection - self.gate_cpu, 3),
+        }
+
+    def summary(self):
+        """One-line stats for the status bar or console"""
+        stats = self.stats()
+        return (f"{stats['skipped']} of {stats['frames']} frames skipped, "
+                f"~{stats['saved_cpu_s']:.1f} s CPU saved")
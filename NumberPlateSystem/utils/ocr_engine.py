@@ -0,0 +1,285 @@
+"""
+OCR engines and a pool of long-lived OCR workers for plate text
+
+pytesseract runs the tesseract program once per plate: it writes the
+image to a temp file, starts a process that loads the language data,
+and parses its output, so every plate pays tens of milliseconds
+before recognition starts. TesserocrEngine instead keeps one
+Tesseract API (language data loaded) per worker thread, and takes the
+plate image straight from memory. NativeEngine skips Tesseract
+altogether and reads the characters with a small in-process classifier
+(utils/char_classifier.py).
+
+OCRPool runs one engine per worker thread and hands them plate images
+(NumPy arrays) from a queue; get_ocr_pool() returns the shared pool
+configured in config.py.
+"""
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+from NumberPlateSystem.utils.char_classifier import CharClassifier, segment_characters
+from NumberPlateSystem.config import OCR_ENGINE, OCR_WORKERS, TESSDATA_PATH, TESSERACT_CMD
+
+# Characters that can appear on a plate
+PLATE_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# text: plate characters only, upper case
+# confidences: one 0-100 score per character of text
+# raw: what the engine returned, for debugging
+OCRResult = namedtuple("OCRResult", ["text", "confidences", "raw"])
+
+
+def _plate_chars(pairs):
+    """Keep the (character, confidence) pairs that are plate characters"""
+    pairs = [(char.upper(), conf) for char, conf in pairs if char.upper() in PLATE_CHARS]
+    return "".join(char for char, _ in pairs), [conf for _, conf in pairs]
+
+
+def _as_gray(image):
+    """Contiguous 8-bit single-channel copy of an image array"""
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return np.ascontiguousarray(image, dtype=np.uint8)
+
+
+class TesserocrEngine:
+    """Tesseract through its C API, loaded once (not thread-safe: one per thread)"""
+
+    name = "tesserocr"
+
+    def __init__(self):
+        kwargs = {'lang': 'eng', 'psm': tesserocr.PSM.SINGLE_LINE, 'oem': tesserocr.OEM.DEFAULT}
+        if TESSDATA_PATH:
+            kwargs['path'] = TESSDATA_PATH
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        self.api.SetVariable("tessedit_char_whitelist", PLATE_CHARS)
+
+    def recognize(self, image):
+        """
+        Read one line of plate text
+
+        Args:
+            image: Grayscale or thresholded plate image (NumPy array)
+
+        Returns:
+            OCRResult
+        """
+        gray = _as_gray(image)
+        height, width = gray.shape
+        self.api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        raw = self.api.GetUTF8Text()
+
+        # Confidence of every recognized symbol
+        pairs = []
+        iterator = self.api.GetIterator()
+        level = tesserocr.RIL.SYMBOL
+        for symbol in tesserocr.iterate_level(iterator, level):
+            char = symbol.GetUTF8Text(level)
+            if char:
+                pairs.append((char, symbol.Confidence(level)))
+        text, confidences = _plate_chars(pairs)
+        return OCRResult(text, confidences, raw)
+
+    def close(self):
+        self.api.End()
+
+
+class PytesseractEngine:
+    """The tesseract program, started for every image"""
+
+    name = "pytesseract"
+
+    CONFIG = f"--oem 3 --psm 7 -c tessedit_char_whitelist={PLATE_CHARS}"
+
+    def __init__(self):
+        if TESSERACT_CMD:
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+    def recognize(self, image):
+        """
+        Read one line of plate text
+
+        Args:
+            image: Grayscale or thresholded plate image (NumPy array)
+
+        Returns:
+            OCRResult (each character gets its word's confidence)
+        """
+        data = pytesseract.image_to_data(
+            _as_gray(image), config=self.CONFIG, output_type=pytesseract.Output.DICT
+        )
+        words = [(word, float(conf)) for word, conf in zip(data["text"], data["conf"])
+                 if word.strip()]
+        pairs = [(char, conf) for word, conf in words for char in word]
+        text, confidences = _plate_chars(pairs)
+        return OCRResult(text, confidences, " ".join(word for word, _ in words))
+
+    def close(self):
+        pass
+
+
+class NativeEngine:
+    """Connected-component segmentation + kNN glyph classifier, no Tesseract"""
+
+    name = "native"
+
+    def __init__(self):
+        self.classifier = CharClassifier(PLATE_CHARS)
+
+    def recognize(self, image):
+        """
+        Read the characters of a thresholded plate
+
+        Args:
+            image: Thresholded plate image, dark characters on a light
+                plate (NumPy array)
+
+        Returns:
+            OCRResult (raw is the same as text)
+        """
+        pairs = self.classifier.classify(segment_characters(_as_gray(image)))
+        text, confidences = _plate_chars(pairs)
+        return OCRResult(text, confidences, text)
+
+    def close(self):
+        pass
+
+
+ENGINES = {
+    TesserocrEngine.name: TesserocrEngine,
+    PytesseractEngine.name: PytesseractEngine,
+    NativeEngine.name: NativeEngine,
+}
+
+
+def engine_class(name=None):
+    """
+    Resolve an OCR engine name
+
+    Args:
+        name: 'tesserocr', 'pytesseract', 'native' or 'auto'
+            (tesserocr when installed); defaults to OCR_ENGINE in config
+
+    Returns:
+        Engine class
+    """
+    name = name or OCR_ENGINE
+    if name == "auto":
+        name = "tesserocr" if tesserocr is not None else "pytesseract"
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine: {name}")
+    if name == "tesserocr" and tesserocr is None:
+        raise ValueError("OCR engine 'tesserocr' needs the tesserocr package")
+    if name == "pytesseract" and pytesseract is None:
+        raise ValueError("OCR engine 'pytesseract' needs the pytesseract package")
+    return ENGINES[name]
+
+
+class OCRPool:
+    """
+    Worker threads, each keeping its own OCR engine loaded
+
+    Tesseract releases the GIL while recognizing, so plates submitted
+    from several callers are read in parallel, up to one per worker.
+    """
+
+    def __init__(self, engine=None, workers=2):
+        self.engine_class = engine_class(engine)
+        self.workers = workers
+        self._requests = queue.Queue()
+        self._threads = []
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f"ocr-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        engine, failure = None, None
+        try:
+            engine = self.engine_class()
+        except Exception as e:
+            # Surface a broken setup (e.g. missing language data) to callers
+            failure = e
+
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            future, image = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            if engine is None:
+                future.set_exception(failure)
+                continue
+            try:
+                future.set_result(engine.recognize(image))
+            except Exception as e:
+                future.set_exception(e)
+
+        if engine is not None:
+            engine.close()
+
+    def submit(self, image):
+        """
+        Queue a plate image for recognition
+
+        Args:
+            image: Plate image (NumPy array); it must not be modified
+                until the result is ready
+
+        Returns:
+            concurrent.futures.Future of an OCRResult
+        """
+        future = Future()
+        self._requests.put((future, image))
+        return future
+
+    def recognize(self, image, timeout=None):
+        """Recognize a plate image and wait for the OCRResult"""
+        return self.submit(image).result(timeout)
+
+    def close(self):
+        """Stop the workers once the queued images are done"""
+        for _ in self._threads:
+            self._requests.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_ocr_pool():
+    """The process-wide OCRPool, started on first use from config"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = OCRPool(OCR_ENGINE, OCR_WORKERS)
+        return _shared_pool
+
+
+def use_ocr_engine(engine, workers=OCR_WORKERS):
+    """Replace the process-wide OCRPool with one running engine"""
+    global _shared_pool
+    with _shared_lock:
+        old, _shared_pool = _shared_pool, OCRPool(engine, workers)
+    if old is not None:
+        old.close()
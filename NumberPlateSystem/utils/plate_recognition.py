@@ -5,26 +5,43 @@ Contour-based plate detection (more reliable than Haar)
 
 import cv2
 import numpy as np
-import pytesseract
-from collections import Counter
-import re
 
-# IMPORTANT: Set Tesseract path (Windows)
-pytesseract.pytesseract.tesseract_cmd = (
-    r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-)
+from NumberPlateSystem.utils.ocr_engine import get_ocr_pool
 
-# Buffer to stabilize live OCR results
-plate_buffer = []
 
+def threshold_plate(plate_img):
+    """
+    Preprocess a cropped plate for OCR
+
+    Args:
+        plate_img: BGR plate crop
+
+    Returns:
+        Otsu-thresholded grayscale plate, upscaled 2x
+    """
+    plate_img = cv2.resize(
+        plate_img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC
+    )
+
+    gray_plate = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
+    gray_plate = cv2.bilateralFilter(gray_plate, 11, 17, 17)
+
+    _, thresh = cv2.threshold(
+        gray_plate, 0, 255,
+        cv2.THRESH_BINARY + cv2.THRESH_OTSU
+    )
+    return thresh
 
-def extract_plate_text(image, status_callback=None):
+
+def extract_plate_text(image, status_callback=None, stabilizer=None):
     """
     Extract license plate text from a live camera frame (PIL Image)
 
     Args:
         image: PIL Image captured from camera
         status_callback: Function to update UI status
+        stabilizer: The stream's PlateStabilizer, to vote over several
+            frames; without one a single reading is returned
 
     Returns:
         Final stabilized plate text or None
@@ -80,36 +97,28 @@ def extract_plate_text(image, status_callback=None):
 
 
         if plate_img is None:
+            if stabilizer:
+                stabilizer.miss()
             if status_callback:
                 status_callback("No plate detected")
             return None
 
-        # ---------- PREPROCESSING FOR OCR ----------
-        plate_img = cv2.resize(
-            plate_img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC
-        )
-
-        gray_plate = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
-        gray_plate = cv2.bilateralFilter(gray_plate, 11, 17, 17)
-
-        _, thresh = cv2.threshold(
-            gray_plate, 0, 255,
-            cv2.THRESH_BINARY + cv2.THRESH_OTSU
-        )
+        thresh = threshold_plate(plate_img)
 
+        # Same vehicle as the locked plate: no need to read it again
+        if stabilizer and stabilizer.locked:
+            if stabilizer.same_plate(thresh):
+                stabilizer.seen()
+                return stabilizer.locked
+            stabilizer.reset()
 
         # ---------- OCR ----------
-        config = (
-            "--oem 3 "
-            "--psm 7 "
-            "-c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-        )
-
-        text = pytesseract.image_to_string(thresh, config=config)
-        plate_text = re.sub(r'[^A-Z0-9]', '', text.upper())
+        # Long-lived engines (see config OCR_ENGINE), fed from memory
+        result = get_ocr_pool().recognize(thresh)
+        plate_text = result.text
 
         # Debug output (VERY useful)
-        print("OCR RAW OUTPUT:", repr(text))
+        print("OCR RAW OUTPUT:", repr(result.raw))
 
         if len(plate_text) < 6:
             if status_callback:
@@ -117,20 +126,21 @@ def extract_plate_text(image, status_callback=None):
             return None
 
         # ---------- LIVE STABILIZATION ----------
-        plate_buffer.append(plate_text)
+        if stabilizer:
+            final_plate = stabilizer.add(plate_text, result.confidences, thresh)
+            if final_plate is None:
+                if status_callback:
+                    status_callback(f"Reading plate ({len(stabilizer.readings)}/{stabilizer.frames})...")
+                return None
+        else:
+            final_plate = plate_text
 
-        if len(plate_buffer) >= 1:
-            final_plate = Counter(plate_buffer).most_common(1)[0][0]
-            plate_buffer.clear()
+        print("FINAL PLATE:", final_plate)
 
-            print("FINAL PLATE:", final_plate)
-
-            if status_callback:
-                status_callback("Plate detected successfully")
-
-            return final_plate
+        if status_callback:
+            status_callback("Plate detected successfully")
 
-        return None
+        return final_plate
 
     except Exception as e:
         print("OCR ERROR:", e)
@@ -0,0 +1,138 @@
+"""
+Per-stream voting over the plate readings of consecutive frames
+
+One OCR reading of a live frame is often off by a character (motion
+blur, glare, a bolt read as "I"). A PlateStabilizer belongs to one
+camera stream: it collects that stream's readings, votes on every
+character position weighted by the OCR confidence of the character,
+and locks the plate once every position is confident enough. While the
+same plate stays in view, extract_plate_text then skips OCR for it.
+"""
+from collections import Counter, defaultdict
+
+import cv2
+import numpy as np
+
+from NumberPlateSystem.config import (
+    PLATE_CONFIDENCE, PLATE_MIN_READINGS, PLATE_RELEASE_MISSES, PLATE_VOTE_FRAMES
+)
+
+# Plate crops are compared at this size (width, height)
+SIGNATURE_SIZE = (128, 32)
+
+# Correlation from which a crop shows the same plate; crops of one plate
+# score about 0.9, different plates below 0.55
+SAME_PLATE_SCORE = 0.65
+
+
+def plate_signature(thresh):
+    """Small blurred copy of a thresholded plate, for telling plates apart"""
+    small = cv2.resize(thresh, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(small, (3, 3), 0).astype(np.float32) / 255
+
+
+class PlateStabilizer:
+    """Character-position voting over one stream's recent plate readings"""
+
+    def __init__(self, frames=PLATE_VOTE_FRAMES, threshold=PLATE_CONFIDENCE,
+                 min_readings=PLATE_MIN_READINGS, release_after=PLATE_RELEASE_MISSES):
+        """
+        Args:
+            frames: Readings voted over; once this many are in without a
+                confident plate, the vote is returned anyway (unlocked)
+            threshold: Confidence (0-100) every character needs to lock
+            min_readings: Readings needed before locking
+            release_after: Frames without a plate after which the locked
+                vehicle is taken to have left
+        """
+        self.frames = frames
+        self.threshold = threshold
+        self.min_readings = min_readings
+        self.release_after = release_after
+        self.reset()
+
+    def reset(self):
+        """Start over for a new vehicle"""
+        self.readings = []
+        self.locked = None
+        self.confidences = []
+        self.signature = None
+        self.misses = 0
+
+    @property
+    def pending(self):
+        """True while a plate is being read: not locked, fewer than frames readings"""
+        return self.locked is None and 0 < len(self.readings) < self.frames
+
+    def same_plate(self, thresh):
+        """Whether a thresholded plate crop looks like the locked plate"""
+        if self.signature is None:
+            return False
+        # The middle of the locked plate, searched for in the new crop,
+        # so that crops cut a few pixels differently still match
+        middle = self.signature[3:-3, 8:-8]
+        score = cv2.matchTemplate(plate_signature(thresh), middle, cv2.TM_CCOEFF_NORMED).max()
+        return score >= SAME_PLATE_SCORE
+
+    def seen(self):
+        """Record a frame showing the locked plate again"""
+        self.misses = 0
+
+    def miss(self):
+        """Record a frame without a plate; releases the lock after release_after in a row"""
+        self.misses += 1
+        if self.misses >= self.release_after:
+            self.reset()
+
+    def add(self, text, confidences, thresh=None):
+        """
+        Add one OCR reading
+
+        Args:
+            text: Plate characters read
+            confidences: 0-100 confidence per character of text
+            thresh: The thresholded plate it was read from, kept to
+                recognize the plate without OCR once locked
+
+        Returns:
+            The plate once it is confident (locked) or the vote after
+            `frames` readings, else None
+        """
+        self.misses = 0
+        self.readings.append((text, list(confidences)))
+        self.readings = self.readings[-self.frames:]
+        if thresh is not None:
+            self.signature = plate_signature(thresh)
+
+        plate, self.confidences = self.vote()
+        if len(self.readings) >= self.min_readings and min(self.confidences, default=0) >= self.threshold:
+            self.locked = plate
+            return plate
+        if len(self.readings) >= self.frames:
+            return plate
+        return None
+
+    def vote(self):
+        """
+        Current best plate and the confidence of each of its characters
+
+        Readings of the most common length vote per position, each with
+        its character's confidence; a character's confidence is the
+        weight it got divided by the number of readings, so readings
+        that disagree (or have another length) count against it.
+        """
+        if not self.readings:
+            return "", []
+        lengths = Counter(len(text) for text, _ in self.readings)
+        length = max(lengths, key=lambda n: (lengths[n], n))
+
+        plate, confidences = [], []
+        for position in range(length):
+            weights = defaultdict(float)
+            for text, scores in self.readings:
+                if len(text) == length:
+                    weights[text[position]] += scores[position] if position < len(scores) else 0.0
+            char = max(weights, key=weights.get)
+            plate.append(char)
+            confidences.append(round(weights[char] / len(self.readings), 1))
+        return "".join(plate), confidences